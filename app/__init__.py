@@ -1,18 +1,18 @@
+import os
+
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
 from flask_login import LoginManager
 
 
 # Database extensions (imported by models via `from app import db`)
 db = SQLAlchemy()
-migrate = Migrate()
 login_manager = LoginManager()
 login_manager.login_view = 'auth.login'
 login_manager.login_message_category = 'info'
 
 
-def create_app():
+def create_app(config_overrides=None):
     app = Flask(
         __name__,
         static_folder='static',
@@ -21,24 +21,78 @@ def create_app():
 
     # Load configuration
     app.config.from_object('config.Config')
+    if config_overrides:
+        app.config.update(config_overrides)
+
+    # API responses are encoded with orjson when it is installed
+    from .serialization import init_app as init_json
+    init_json(app)
+
+    # Shared cache (memory, sqlite or redis); commits invalidate the tables they wrote
+    from .cache import cache
+    cache.init_app(app)
+
+    # Bytecode cache and {% cache %} fragments; must precede the first template load
+    from .templating import init_app as init_templating
+    init_templating(app)
 
     # Initialize extensions
     db.init_app(app)
-    migrate.init_app(app, db)
     login_manager.init_app(app)
 
+    # Flask-Migrate imports Alembic, which would add ~150 ms to every worker
+    # boot; only the `flask` command line (flask db ...) needs it
+    if os.environ.get('FLASK_RUN_FROM_CLI'):
+        from flask_migrate import Migrate
+        Migrate(app, db)
+
+    # Statements over SLOW_QUERY_THRESHOLD_MS are logged with their plan by a background thread
+    from .slowlog import slowlog
+    slowlog.init_app(app)
+
     # Import models so migrations can detect them
     from . import models
 
+    # Role permissions are compiled once here; the session user is cached
+    from .authz import authz
+    authz.init_app(app)
+
+    from .ratelimit import login_throttle
+    login_throttle.init_app(app)
+
+    # Record changes are audited; entries are written by a background thread
+    from .audit import audit
+    audit.init_app(app)
+
+    # Signing key and revocation set for the QR codes on printed clearances
+    from .verification import verifier
+    verifier.init_app(app)
+
+    # Counter-cache columns (households.member_count, ...) are kept by flush events
+    from . import counters
+    counters.init_app(app)
+
+    # The resident_directory read model follows resident/household flushes
+    from .services import directory
+    directory.init_app(app)
+
+    # Admins can profile a single request with ?_profile=1 or X-Profile: 1
+    from .profiler import profiler
+    profiler.init_app(app)
+
     @login_manager.user_loader
     def load_user(user_id):
         """Flask-Login user_loader callback."""
-        return models.User.query.get(int(user_id))
+        return authz.load_user(int(user_id))
 
     # Register HTTP routes
     from .routes import init_app as init_routes
     init_routes(app)
 
+    # Register CLI commands (flask seed, ...)
+    from .cli import init_app as init_cli
+    init_cli(app)
+
     # The db.create_all() call is removed.
     # It's better to manage the database schema with Flask-Migrate.
     # Use `flask db upgrade` to apply migrations.
@@ -0,0 +1,282 @@
+"""Audit trail of changes to record tables.
+
+Every insert, update and delete of a resident, household, blotter case,
+clearance or official is captured by mapper events during flush. Each
+entry records the acting user. Updates store ``{column: [old, new]}``;
+inserts and deletes store the row's values. Entries wait on the session
+until its transaction commits, so rolled-back work, including a
+rolled-back savepoint, is never logged.
+
+Committed entries are handed to `AuditWriter`, which buffers them in
+memory. A background thread inserts them in batches on its own
+connection, so a clerk's request never waits on the audit table. The
+buffer is flushed at exit. If it ever outgrows ``AUDIT_MAX_BUFFER``
+(e.g. the database is unreachable), callers write synchronously instead
+of dropping entries.
+
+Core bulk statements bypass mapper events. Code using them reports its
+changes with `record_bulk` on the same session.
+"""
+import atexit
+import logging
+import os
+import threading
+from collections import deque
+from datetime import date, datetime
+from decimal import Decimal
+
+from flask import current_app, has_request_context
+from flask_login import current_user
+from sqlalchemy import event, inspect, insert
+from sqlalchemy.orm import Session, scoped_session
+
+from app import db
+from app.partitions import SPECS, ensure_partition, is_partitioned, period_start
+
+logger = logging.getLogger(__name__)
+
+# Columns that change on every write or are derived; not worth recording
+IGNORED_COLUMNS = frozenset({'updated_at', 'search_vector', 'member_count', 'clearance_count', 'blotter_count'})
+
+_PENDING = 'audit_pending'
+
+
+def _jsonable(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def _actor():
+    """(user id, username) of the logged-in user, or (None, None) outside a request."""
+    if has_request_context() and current_user.is_authenticated:
+        return current_user.id, current_user.username
+    return None, None
+
+
+def _entry(action, entity, record_id, changes, actor=None, now=None):
+    user_id, username = actor or _actor()
+    return {
+        'occurred_at': now or datetime.utcnow(),
+        'user_id': user_id,
+        'username': username,
+        'action': action,
+        'entity': entity,
+        'record_id': record_id,
+        'changes': changes,
+    }
+
+
+def _add_pending(session, entries):
+    # Tag entries with the innermost transaction so a savepoint rollback drops only its own
+    transaction = session.get_nested_transaction() or session.get_transaction()
+    session.info.setdefault(_PENDING, []).extend((transaction, e) for e in entries)
+
+
+def _clean(changes):
+    return {
+        key: [_jsonable(v) for v in value] if isinstance(value, list) else _jsonable(value)
+        for key, value in changes.items()
+        if value is not None and key not in IGNORED_COLUMNS
+    }
+
+
+def record_bulk(session, action, entity, rows):
+    """Log changes made with Core bulk statements.
+
+    `rows` is an iterable of ``(record_id, changes)`` in the same shape the
+    ORM capture uses. Entries are written when `session` commits.
+    """
+    if isinstance(session, scoped_session):
+        session = session()
+    actor, now = _actor(), datetime.utcnow()
+    _add_pending(session, [
+        _entry(action, entity, record_id, _clean(changes), actor, now) for record_id, changes in rows
+    ])
+
+
+# -- capture -----------------------------------------------------------------
+
+def _row_values(state, mapper):
+    # Only loaded attributes: a delete must not trigger lazy loads mid-flush
+    return {
+        attr.key: _jsonable(state.dict[attr.key])
+        for attr in mapper.column_attrs
+        if attr.key in state.dict and attr.key not in IGNORED_COLUMNS and state.dict[attr.key] is not None
+    }
+
+
+def _after_insert(mapper, connection, target):
+    state = inspect(target)
+    _add_pending(state.session, [_entry('insert', mapper.local_table.name, target.id, _row_values(state, mapper))])
+
+
+def _after_update(mapper, connection, target):
+    state = inspect(target)
+    changes = {}
+    for attr in mapper.column_attrs:
+        if attr.key in IGNORED_COLUMNS:
+            continue
+        history = state.attrs[attr.key].history
+        if history.added or history.deleted:
+            old = history.deleted[0] if history.deleted else None
+            new = history.added[0] if history.added else None
+            if old != new:
+                changes[attr.key] = [_jsonable(old), _jsonable(new)]
+    if changes:
+        _add_pending(state.session, [_entry('update', mapper.local_table.name, target.id, changes)])
+
+
+def _after_delete(mapper, connection, target):
+    state = inspect(target)
+    _add_pending(state.session, [_entry('delete', mapper.local_table.name, target.id, _row_values(state, mapper))])
+
+
+def _hand_off_after_commit(session):
+    if session.in_nested_transaction():
+        return  # a savepoint was released; wait for the real commit
+    pending = session.info.pop(_PENDING, None)
+    if pending:
+        current_app.extensions['audit'].submit([entry for _, entry in pending])
+
+
+def _discard_after_rollback(session, previous_transaction):
+    pending = session.info.get(_PENDING)
+    if not pending:
+        return
+
+    def rolled_back(transaction):
+        while transaction is not None:
+            if transaction is previous_transaction:
+                return True
+            transaction = transaction.parent
+        return False
+
+    session.info[_PENDING] = [(t, e) for t, e in pending if not rolled_back(t)]
+
+
+_events_registered = False
+
+
+def _register_events():
+    global _events_registered
+    if _events_registered:
+        return
+    from .models import Blotter, Clearance, Household, Official, Resident
+
+    for model in (Resident, Household, Blotter, Clearance, Official):
+        event.listen(model, 'after_insert', _after_insert)
+        event.listen(model, 'after_update', _after_update)
+        event.listen(model, 'after_delete', _after_delete)
+    event.listen(Session, 'after_commit', _hand_off_after_commit)
+    event.listen(Session, 'after_soft_rollback', _discard_after_rollback)
+    _events_registered = True
+
+
+# -- writing -----------------------------------------------------------------
+
+class AuditWriter:
+    """Flask extension buffering audit entries and writing them in batches."""
+
+    def __init__(self, app=None):
+        self.app = None
+        self._buffer = deque()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._pid = None
+        self._partitioned = None
+        self._months = set()  # months whose partition is known to exist
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('AUDIT_ENABLED', True)
+        app.config.setdefault('AUDIT_ASYNC', True)
+        app.config.setdefault('AUDIT_FLUSH_INTERVAL', 1.0)
+        app.config.setdefault('AUDIT_BATCH_SIZE', 500)
+        app.config.setdefault('AUDIT_MAX_BUFFER', 100000)
+        if self.app is None:
+            atexit.register(self.flush)
+        self.app = app
+        self._partitioned = None
+        app.extensions['audit'] = self
+        _register_events()
+
+    def submit(self, entries):
+        config = self.app.config
+        if not config['AUDIT_ENABLED']:
+            return
+        if not config['AUDIT_ASYNC'] or len(self._buffer) >= config['AUDIT_MAX_BUFFER']:
+            self._write(entries)
+            return
+        with self._lock:
+            self._buffer.extend(entries)
+        self._ensure_thread()
+        if len(self._buffer) >= config['AUDIT_BATCH_SIZE']:
+            self._wake.set()
+
+    def flush(self):
+        """Write everything buffered now, in the calling thread."""
+        while self._buffer:
+            batch = self._take(self.app.config['AUDIT_BATCH_SIZE'])
+            try:
+                self._write(batch)
+            except Exception:
+                self._put_back(batch)
+                raise
+
+    def _take(self, limit):
+        with self._lock:
+            return [self._buffer.popleft() for _ in range(min(limit, len(self._buffer)))]
+
+    def _put_back(self, batch):
+        with self._lock:
+            self._buffer.extendleft(reversed(batch))
+
+    def _ensure_thread(self):
+        # Threads do not survive fork(); a forked worker starts its own
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive() or self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name='audit-writer', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        failures = 0
+        while True:
+            self._wake.wait(self.app.config['AUDIT_FLUSH_INTERVAL'] * (2 ** min(failures, 6)))
+            self._wake.clear()
+            try:
+                self.flush()
+                failures = 0
+            except Exception:
+                failures += 1
+                logger.exception('Writing %d audit entries failed; will retry', len(self._buffer))
+
+    def _write(self, entries):
+        if not entries:
+            return
+        with self.app.app_context():
+            with db.engine.begin() as conn:
+                self._ensure_partitions(conn, {period_start(e['occurred_at'], 'month') for e in entries})
+                from .models import AuditLog
+                conn.execute(insert(AuditLog.__table__), entries)
+
+    def _ensure_partitions(self, conn, months):
+        """Create missing monthly partitions (PostgreSQL, partitioned table only)."""
+        if conn.dialect.name != 'postgresql' or not (months - self._months):
+            return
+        if self._partitioned is None:
+            self._partitioned = is_partitioned(conn, 'audit_log')
+        if self._partitioned:
+            for month in sorted(months - self._months):
+                ensure_partition(conn, SPECS['audit_log'], month)
+        self._months |= months
+
+
+audit = AuditWriter()
@@ -0,0 +1,248 @@
+"""Role-based authorization and the cached session user.
+
+The role -> permission map is compiled once when the app starts, so a
+permission check during a request is a single frozenset lookup. The
+logged-in user is kept in a short-TTL cache keyed by session, which lets
+`load_user` skip the `users` query on most requests.
+
+Each user has a version counter in the app cache (app/cache.py), bumped
+when a change to their role, password, username or email is committed.
+Cached entries remember the version they were built under and are
+reloaded once it moves. With a shared cache backend ('sqlite' or
+'redis'), a demoted user therefore loses their permissions in every
+worker on their next request. With the per-process 'memory' backend,
+other workers may keep the old permissions for up to ``USER_CACHE_TTL``.
+"""
+import threading
+import time
+from functools import wraps
+
+from flask import abort, current_app, session
+from flask_login import UserMixin, current_user
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app.cache import cache
+
+
+# Every permission the app checks. Role maps may only reference these.
+PERMISSIONS = (
+    'records.view',
+    'records.create',
+    'records.edit',
+    'records.delete',
+    'clearances.issue',
+    'officials.manage',
+    'reports.view',
+    'users.manage',
+    'audit.view',
+    'system.maintain',
+)
+
+# '*' grants every permission in PERMISSIONS.
+DEFAULT_ROLE_PERMISSIONS = {
+    'admin': ('*',),
+    'user': ('records.view', 'records.create', 'reports.view'),
+}
+
+NO_PERMISSIONS = frozenset()
+
+
+def compile_role_permissions(role_map):
+    """Expand a role -> permissions mapping into frozensets.
+
+    Unknown permission names raise ValueError so that a typo in the config
+    fails at startup instead of silently denying access.
+    """
+    known = frozenset(PERMISSIONS)
+    compiled = {}
+    for role, granted in role_map.items():
+        granted = set(granted)
+        if '*' in granted:
+            granted.discard('*')
+            granted |= known
+        unknown = granted - known
+        if unknown:
+            raise ValueError(f"Unknown permission(s) for role {role!r}: {', '.join(sorted(unknown))}")
+        compiled[role] = frozenset(granted)
+    return compiled
+
+
+class SessionUser(UserMixin):
+    """Detached, read-only snapshot of a `User` used as `current_user`."""
+
+    __slots__ = ('id', 'username', 'email', 'role', 'permissions')
+
+    def __init__(self, id, username, email, role, permissions):
+        self.id = id
+        self.username = username
+        self.email = email
+        self.role = role
+        self.permissions = permissions
+
+    def can(self, permission):
+        return permission in self.permissions
+
+    def __repr__(self):
+        return f'<SessionUser {self.username} role={self.role}>'
+
+
+class UserCache:
+    """Thread-safe TTL cache of `SessionUser` objects.
+
+    Entries are grouped by user id and keyed by the session identifier
+    inside each group, so invalidating a user drops all of their sessions.
+    Each entry keeps the user's version it was built under and is only
+    returned while that version is current.
+    """
+
+    def __init__(self, ttl=60):
+        self.ttl = ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, user_id, session_key, version):
+        if version is None:
+            return None
+        with self._lock:
+            entry = self._entries.get(user_id, {}).get(session_key)
+        if entry is None:
+            return None
+        expires_at, entry_version, user = entry
+        if expires_at < time.monotonic() or entry_version != version:
+            return None
+        return user
+
+    def set(self, user_id, session_key, user, version):
+        if self.ttl <= 0 or version is None:
+            return
+        with self._lock:
+            self._entries.setdefault(user_id, {})[session_key] = (time.monotonic() + self.ttl, version, user)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class Authorization:
+    """Flask extension holding the compiled permission map and user cache."""
+
+    def __init__(self, app=None):
+        self.role_permissions = {}
+        self.user_cache = UserCache()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('ROLE_PERMISSIONS', DEFAULT_ROLE_PERMISSIONS)
+        app.config.setdefault('USER_CACHE_TTL', 60)
+        self.role_permissions = compile_role_permissions(app.config['ROLE_PERMISSIONS'])
+        self.user_cache.ttl = app.config['USER_CACHE_TTL']
+        app.extensions['authz'] = self
+        _register_invalidation_events()
+
+    def permissions_for(self, role):
+        return self.role_permissions.get(role, NO_PERMISSIONS)
+
+    def snapshot(self, user):
+        return SessionUser(
+            id=user.id,
+            username=user.username,
+            email=user.email,
+            role=user.role,
+            permissions=self.permissions_for(user.role),
+        )
+
+    def load_user(self, user_id):
+        """Return the `SessionUser` for this session, querying only on a miss."""
+        from .models import User
+
+        session_key = session.get('_id')
+        version = cache.version(_user_namespace(user_id))
+        user = self.user_cache.get(user_id, session_key, version)
+        if user is not None:
+            return user
+        record = User.query.get(user_id)
+        if record is None:
+            return None
+        user = self.snapshot(record)
+        self.user_cache.set(user_id, session_key, user, version)
+        return user
+
+
+authz = Authorization()
+
+
+def permission_required(permission):
+    """View decorator: require login and `permission` on the current user."""
+    if permission not in PERMISSIONS:
+        raise ValueError(f'Unknown permission {permission!r}')
+
+    def decorator(view):
+        @wraps(view)
+        def wrapped(*args, **kwargs):
+            if not current_user.is_authenticated:
+                return current_app.login_manager.unauthorized()
+            if permission not in getattr(current_user, 'permissions', NO_PERMISSIONS):
+                abort(403)
+            return view(*args, **kwargs)
+        return wrapped
+    return decorator
+
+
+# -- cache invalidation ------------------------------------------------------
+
+_events_registered = False
+
+# Changing any of these must evict the cached session user.
+_WATCHED_ATTRIBUTES = ('role', 'password_hash', 'username', 'email')
+
+
+def _register_invalidation_events():
+    global _events_registered
+    if _events_registered:
+        return
+    event.listen(Session, 'before_flush', _collect_changed_users)
+    event.listen(Session, 'after_commit', _invalidate_changed_users)
+    event.listen(Session, 'after_soft_rollback', _discard_changed_users)
+    _events_registered = True
+
+
+def _collect_changed_users(session, flush_context, instances):
+    from .models import User
+
+    changed = session.info.setdefault('authz_changed_users', set())
+    for obj in session.dirty:
+        if isinstance(obj, User):
+            state = inspect(obj)
+            if any(state.attrs[name].history.has_changes() for name in _WATCHED_ATTRIBUTES):
+                changed.add(obj.id)
+    for obj in session.deleted:
+        if isinstance(obj, User):
+            changed.add(obj.id)
+
+
+def _user_namespace(user_id):
+    return f'user:{user_id}'
+
+
+def _invalidate_changed_users(session):
+    if session.in_nested_transaction():
+        return  # a savepoint was released; wait for the real commit
+    changed = session.info.pop('authz_changed_users', None)
+    if changed:
+        for user_id in changed:
+            authz.user_cache.invalidate(user_id)
+        # Other workers see the new versions on their next load_user
+        cache.invalidate(*(_user_namespace(user_id) for user_id in sorted(changed)))
+
+
+def _discard_changed_users(session, previous_transaction):
+    # A rolled-back savepoint leaves the outer transaction's changes to commit
+    if previous_transaction.nested or session.in_transaction():
+        return
+    session.info.pop('authz_changed_users', None)
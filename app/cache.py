@@ -0,0 +1,345 @@
+"""Application cache with backends that can be shared between workers.
+
+``CACHE_BACKEND`` picks where values live:
+
+- 'memory': an LRU dict in each process. Fastest, but every worker keeps
+  its own copy and only sees its own invalidations.
+- 'sqlite': a SQLite file (``CACHE_URL``, default
+  ``instance/cache.sqlite3``) shared by every process on the host. It is
+  opened in WAL mode and memory-mapped, so reads are served from the OS
+  page cache.
+- 'redis': a Redis server at ``CACHE_URL``, shared across hosts. Needs
+  the `redis` package. A backend instance (e.g. a `RedisBackend` around
+  a fakeredis client) may be given instead of a name.
+
+A cached value names the namespaces it was built from, which are table
+names. Each namespace has a version counter kept in the backend, and
+the current versions are part of the value's key. `invalidate` bumps a
+counter, and from then on every worker sharing the backend looks up new
+keys. The old entries are never read again and age out on their TTL.
+
+Commits invalidate the tables they wrote. A before_flush hook notes the
+tables of new, changed and deleted objects, a do_orm_execute hook those
+of bulk insert/update/delete statements, and after_commit bumps their
+namespaces. Core statements run on the session's connection are noted
+with `note_changes`. So a resident created in one worker refreshes the dashboard
+stats and search results in all of them.
+
+The backend is a cache, not a store. When it fails, the error is logged
+and values are computed as if nothing were cached. Values are pickled
+for the shared backends, which must therefore only be writable by the
+app.
+"""
+import logging
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, scoped_session
+
+logger = logging.getLogger(__name__)
+
+_CHANGED = 'cache_tables_changed'
+
+_events_registered = False
+
+
+class MemoryBackend:
+    """Per-process LRU cache. Fast, but each worker caches separately."""
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def counters(self, keys):
+        with self._lock:
+            return [self._counters.get(k, 0) for k in keys]
+
+    def incr(self, key):
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+    def clear(self, prefix):
+        with self._lock:
+            self._entries.clear()
+            self._counters.clear()
+
+
+class SQLiteBackend:
+    """Cache in a local SQLite file, shared by all processes on the host.
+
+    Each thread keeps its own connection (reopened after a fork). Expired
+    rows are purged every PURGE_EVERY writes.
+    """
+
+    PURGE_EVERY = 500
+
+    def __init__(self, path, mmap_size=64 * 1024 * 1024):
+        self.path = path
+        self.mmap_size = mmap_size
+        self._local = threading.local()
+        self._writes = 0
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute(f'PRAGMA mmap_size={int(self.mmap_size)}')
+            conn.execute('CREATE TABLE IF NOT EXISTS cache_entries '
+                         '(key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL)')
+            conn.execute('CREATE TABLE IF NOT EXISTS cache_counters (key TEXT PRIMARY KEY, value INTEGER NOT NULL)')
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def get(self, key):
+        row = self._conn().execute(
+            'SELECT value FROM cache_entries WHERE key = ? AND expires_at > ?', (key, time.time()),
+        ).fetchone()
+        return pickle.loads(row[0]) if row else None
+
+    def set(self, key, value, ttl):
+        now = time.time()
+        conn = self._conn()
+        conn.execute(
+            'INSERT OR REPLACE INTO cache_entries (key, value, expires_at) VALUES (?, ?, ?)',
+            (key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), now + ttl),
+        )
+        self._writes += 1
+        if self._writes % self.PURGE_EVERY == 0:
+            conn.execute('DELETE FROM cache_entries WHERE expires_at <= ?', (now,))
+
+    def counters(self, keys):
+        placeholders = ','.join('?' * len(keys))
+        found = dict(self._conn().execute(
+            f'SELECT key, value FROM cache_counters WHERE key IN ({placeholders})', keys,
+        ))
+        return [found.get(k, 0) for k in keys]
+
+    def incr(self, key):
+        return self._conn().execute(
+            'INSERT INTO cache_counters (key, value) VALUES (?, 1) '
+            'ON CONFLICT(key) DO UPDATE SET value = value + 1 RETURNING value', (key,),
+        ).fetchone()[0]
+
+    def clear(self, prefix):
+        conn = self._conn()
+        for table in ('cache_entries', 'cache_counters'):
+            conn.execute(f'DELETE FROM {table} WHERE substr(key, 1, ?) = ?', (len(prefix), prefix))
+
+
+class RedisBackend:
+    """Cache in Redis, shared by every worker on every host."""
+
+    def __init__(self, url=None, client=None):
+        if client is None:
+            # Optional, and slow to import; only loaded when this backend is used
+            try:
+                import redis
+            except ImportError:
+                raise RuntimeError("CACHE_BACKEND is 'redis' but the redis package is not installed") from None
+            client = redis.Redis.from_url(url or 'redis://localhost:6379/0')
+        self.client = client
+
+    def get(self, key):
+        value = self.client.get(key)
+        return pickle.loads(value) if value is not None else None
+
+    def set(self, key, value, ttl):
+        self.client.set(key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), px=max(1, int(ttl * 1000)))
+
+    def counters(self, keys):
+        return [int(v) if v is not None else 0 for v in self.client.mget(keys)]
+
+    def incr(self, key):
+        return self.client.incr(key)
+
+    def clear(self, prefix):
+        keys = list(self.client.scan_iter(match=f'{prefix}*', count=1000))
+        if keys:
+            self.client.delete(*keys)
+
+
+class Cache:
+    """Flask extension: versioned-namespace cache over one backend."""
+
+    def __init__(self, app=None):
+        self.backend = MemoryBackend()
+        self.prefix = 'brms:'
+        self.default_ttl = 60
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('CACHE_BACKEND', 'memory')
+        app.config.setdefault('CACHE_URL', None)
+        app.config.setdefault('CACHE_KEY_PREFIX', 'brms')
+        app.config.setdefault('CACHE_DEFAULT_TTL', 60)
+        app.config.setdefault('CACHE_MAX_ENTRIES', 1024)
+
+        backend = app.config['CACHE_BACKEND']
+        url = app.config['CACHE_URL']
+        if backend == 'memory':
+            backend = MemoryBackend(app.config['CACHE_MAX_ENTRIES'])
+        elif backend == 'sqlite':
+            if not url:
+                os.makedirs(app.instance_path, exist_ok=True)
+                url = os.path.join(app.instance_path, 'cache.sqlite3')
+            backend = SQLiteBackend(url)
+        elif backend == 'redis':
+            backend = RedisBackend(url)
+        elif isinstance(backend, str):
+            raise ValueError(f'Unknown CACHE_BACKEND {backend!r}')
+        self.backend = backend
+        self.prefix = f"{app.config['CACHE_KEY_PREFIX']}:"
+        self.default_ttl = app.config['CACHE_DEFAULT_TTL']
+        app.extensions['cache'] = self
+        _register_invalidation_events()
+
+    def _key(self, key, namespaces):
+        if not namespaces:
+            return f'{self.prefix}{key}'
+        versions = self.backend.counters([f'{self.prefix}ns:{ns}' for ns in namespaces])
+        return f'{self.prefix}{key}@' + '.'.join(map(str, versions))
+
+    def get(self, key, namespaces=()):
+        """The cached value, or None if absent, expired or invalidated."""
+        try:
+            return self.backend.get(self._key(key, namespaces))
+        except Exception:
+            logger.warning('Cache read failed for %r', key, exc_info=True)
+            return None
+
+    def set(self, key, value, ttl=None, namespaces=()):
+        try:
+            self.backend.set(self._key(key, namespaces), value, self.default_ttl if ttl is None else ttl)
+        except Exception:
+            logger.warning('Cache write failed for %r', key, exc_info=True)
+
+    def get_or_set(self, key, compute, ttl=None, namespaces=()):
+        """The cached value for `key`, or `compute()` (cached unless None)."""
+        try:
+            full_key = self._key(key, namespaces)
+            value = self.backend.get(full_key)
+        except Exception:
+            logger.warning('Cache read failed for %r', key, exc_info=True)
+            return compute()
+        if value is not None:
+            return value
+        value = compute()
+        if value is not None:
+            try:
+                # Stored under the versions read above: if the namespace was
+                # invalidated meanwhile, this entry is simply never read
+                self.backend.set(full_key, value, self.default_ttl if ttl is None else ttl)
+            except Exception:
+                logger.warning('Cache write failed for %r', key, exc_info=True)
+        return value
+
+    def version(self, namespace):
+        """The current version of `namespace`, or None if the backend fails.
+
+        It changes whenever the namespace is invalidated, in any worker
+        sharing the backend, so callers may keep derived data in memory
+        as long as the version they built it under is still current.
+        """
+        try:
+            return self.backend.counters([f'{self.prefix}ns:{namespace}'])[0]
+        except Exception:
+            logger.warning('Cache read failed for namespace %r', namespace, exc_info=True)
+            return None
+
+    def invalidate(self, *namespaces):
+        """Retire every value built from any of `namespaces`, in all workers."""
+        for ns in namespaces:
+            try:
+                self.backend.incr(f'{self.prefix}ns:{ns}')
+            except Exception:
+                logger.exception('Cache invalidation failed for namespace %r', ns)
+
+    def clear(self):
+        self.backend.clear(self.prefix)
+
+
+cache = Cache()
+
+
+# -- invalidation ------------------------------------------------------------
+
+def note_changes(session, *tables):
+    """Invalidate `tables` when `session` commits.
+
+    For writes the hooks below cannot see, such as Core statements run on
+    ``session.connection()``.
+    """
+    if isinstance(session, scoped_session):
+        session = session()
+    session.info.setdefault(_CHANGED, set()).update(tables)
+
+
+def _note_changed_tables(session, flush_context, instances):
+    tables = session.info.setdefault(_CHANGED, set())
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        table = getattr(obj, '__tablename__', None)
+        if table:
+            tables.add(table)
+
+
+def _note_bulk_statement(orm_execute_state):
+    # update()/delete()/insert() run with session.execute never reach before_flush
+    if orm_execute_state.is_update or orm_execute_state.is_delete or orm_execute_state.is_insert:
+        table = getattr(orm_execute_state.statement.table, 'name', None)
+        if table:
+            note_changes(orm_execute_state.session, table)
+
+
+def _invalidate_after_commit(session):
+    if session.in_nested_transaction():
+        return  # a savepoint was released; wait for the real commit
+    tables = session.info.pop(_CHANGED, None)
+    if tables:
+        cache.invalidate(*sorted(tables))
+
+
+def _discard_after_rollback(session, previous_transaction):
+    # A rolled-back savepoint leaves the outer transaction's changes to commit
+    if previous_transaction.nested or session.in_transaction():
+        return
+    session.info.pop(_CHANGED, None)
+
+
+def _register_invalidation_events():
+    global _events_registered
+    if _events_registered:
+        return
+    event.listen(Session, 'before_flush', _note_changed_tables)
+    event.listen(Session, 'do_orm_execute', _note_bulk_statement)
+    event.listen(Session, 'after_commit', _invalidate_after_commit)
+    event.listen(Session, 'after_soft_rollback', _discard_after_rollback)
+    _events_registered = True
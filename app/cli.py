@@ -0,0 +1,471 @@
+"""Flask CLI commands, registered on the app in `create_app`.
+
+    flask seed --residents 100000 --seed 42
+    flask sync-prune
+    flask counters reconcile
+    flask directory rebuild
+    flask analytics households [--json]
+    flask masterlist generate --by purok --format pdf
+    flask partitions create --ahead 1
+    flask partitions archive --before 2020
+    flask schema check | info | columns [TABLE ...]
+    flask startup imports [--min-ms 5] [--top 20]
+    flask startup time [--runs 5]
+    flask slowlog report [--limit 20] [--order total|max|calls]
+    flask slowlog show FINGERPRINT
+    flask slowlog prune [--days 30]
+"""
+import os
+import statistics
+import subprocess
+import sys
+import time
+from datetime import date
+
+import click
+from flask.cli import AppGroup
+
+
+@click.command('seed')
+@click.option('--residents', default=10000, show_default=True, help='Approximate number of residents to generate.')
+@click.option('--seed', 'seed_value', default=42, show_default=True, help='Random seed; the same seed gives the same data.')
+@click.option('--batch-size', default=5000, show_default=True, help='Residents inserted per transaction.')
+@click.option('--puroks', default=7, show_default=True, help='Number of puroks.')
+@click.option('--blotters-per-1000', default=20, show_default=True, help='Blotter cases per 1,000 residents.')
+@click.option('--clearances-per-1000', default=120, show_default=True, help='Clearance requests per 1,000 residents.')
+def seed_command(residents, seed_value, batch_size, puroks, blotters_per_1000, clearances_per_1000):
+    """Generate realistic synthetic residents, households, blotters and clearances."""
+    from .seed import seed_database
+
+    started = time.perf_counter()
+
+    def progress(counts):
+        click.echo(f"  {counts['residents']:>9,} residents, {counts['households']:>8,} households "
+                   f"({time.perf_counter() - started:.1f}s)")
+
+    counts = seed_database(
+        residents,
+        seed=seed_value,
+        batch_size=batch_size,
+        puroks=puroks,
+        blotters_per_1000=blotters_per_1000,
+        clearances_per_1000=clearances_per_1000,
+        progress=progress,
+    )
+    summary = ', '.join(f'{count:,} {name}' for name, count in counts.items())
+    click.echo(f'Inserted {summary} in {time.perf_counter() - started:.1f}s.')
+
+
+@click.command('sync-prune')
+def sync_prune_command():
+    """Delete sync tombstones older than SYNC_TOMBSTONE_RETENTION_DAYS."""
+    from .services.sync import prune_tombstones
+
+    click.echo(f'Removed {prune_tombstones():,} tombstones.')
+
+
+@click.group('counters', cls=AppGroup)
+def counters_group():
+    """Maintain the counter-cache columns (households.member_count, ...)."""
+
+
+@counters_group.command('reconcile')
+def counters_reconcile_command():
+    """Recompute every counter from the child tables and fix any drift."""
+    from . import db
+    from .counters import reconcile
+
+    fixed = reconcile(db.session)
+    db.session.commit()
+    for column, rows in fixed.items():
+        click.echo(f'{column}: {rows:,} corrected')
+
+
+@click.group('directory', cls=AppGroup)
+def directory_group():
+    """Maintain the resident_directory read model."""
+
+
+@directory_group.command('rebuild')
+def directory_rebuild_command():
+    """Regenerate resident_directory from residents and households."""
+    from . import db
+    from .services.directory import rebuild
+
+    rows = rebuild(db.session)
+    db.session.commit()
+    click.echo(f'Rebuilt resident_directory: {rows:,} residents.')
+
+
+@click.group('analytics', cls=AppGroup)
+def analytics_group():
+    """Socio-economic reports over the household records."""
+
+
+@analytics_group.command('households')
+@click.option('--json', 'as_json', is_flag=True, help='Print the full result as JSON.')
+def analytics_households_command(as_json):
+    """Per-capita income, poverty incidence and sanitation coverage per purok."""
+    import json
+
+    from .services.analytics import household_analytics
+
+    started = time.perf_counter()
+    report = household_analytics()
+    elapsed = time.perf_counter() - started
+    if as_json:
+        click.echo(json.dumps(report, indent=2))
+        return
+
+    click.echo(f"{report['households']:,} households, {report['people']:,} people "
+               f"(computed in {elapsed * 1000:.0f} ms)")
+    click.echo(f"Poverty incidence {report['poverty_incidence']:.1%}, sanitary toilets "
+               f"{report['sanitation']['households']:.1%} of households")
+    click.echo(f"{'purok':<16} {'households':>10} {'poor':>7} {'median/capita':>14} {'sanitary':>9}")
+    for p in report['puroks']:
+        median = p['per_capita_income']['quartiles'][1]
+        click.echo(f"{p['purok']:<16} {p['households']:>10,} {p['poverty_incidence']:>7.1%} "
+                   f"{median if median is not None else 'n/a':>14} {p['sanitation']['households']:>9.1%}")
+
+
+@click.group('masterlist', cls=AppGroup)
+def masterlist_group():
+    """Voters' masterlists per purok or precinct."""
+
+
+@masterlist_group.command('generate')
+@click.option('--by', 'groupings', type=click.Choice(('purok', 'precinct')), multiple=True,
+              help='Grouping to generate (repeatable; default both).')
+@click.option('--format', 'formats', type=click.Choice(('html', 'pdf')), multiple=True,
+              help='Format to generate (repeatable; default both).')
+def masterlist_generate_command(groupings, formats):
+    """Pre-generate every masterlist into the document cache.
+
+    Lists whose voters have not changed since they were last generated
+    today are skipped, so this is cheap to re-run before printing.
+    """
+    from .services import masterlist as masterlist_service
+
+    generated = skipped = 0
+    started = time.perf_counter()
+    for grouping in groupings or masterlist_service.GROUPINGS:
+        for value, _ in masterlist_service.groups(grouping):
+            masterlist = masterlist_service.prepare(grouping, value)
+            for fmt in formats or masterlist_service.FORMATS:
+                if masterlist_service.cached_path(masterlist, fmt):
+                    skipped += 1
+                    continue
+                for _ in masterlist_service.generate(masterlist, fmt):
+                    pass
+                generated += 1
+    click.echo(f'Generated {generated} masterlist(s), {skipped} already up to date '
+               f'({time.perf_counter() - started:.1f}s).')
+
+
+@click.group('partitions', cls=AppGroup)
+def partitions_group():
+    """Manage the yearly/monthly partitions of blotters, clearances and audit_log."""
+
+
+def _partitioned_specs(conn, tables):
+    from .partitions import SPECS, is_partitioned
+
+    specs = [SPECS[t] for t in tables or SPECS]
+    ready = [spec for spec in specs if is_partitioned(conn, spec.table)]
+    for spec in specs:
+        if spec not in ready:
+            click.echo(f'{spec.table} is not partitioned; skipping.')
+    return ready
+
+
+@partitions_group.command('list')
+@click.option('--table', 'tables', multiple=True, type=click.Choice(['blotters', 'clearances', 'audit_log']))
+def partitions_list_command(tables):
+    """Show each partition with its range and estimated row count."""
+    from . import db
+    from .partitions import list_partitions
+
+    with db.engine.connect() as conn:
+        for spec in _partitioned_specs(conn, tables):
+            click.echo(f'{spec.table} (by {spec.interval} of {spec.column}):')
+            for p in list_partitions(conn, spec):
+                bounds = f'{p.lower:%Y-%m-%d} .. {p.upper:%Y-%m-%d}' if p.lower else 'default'
+                click.echo(f'  {p.name:<28} {bounds:<24} ~{p.rows:,} rows')
+
+
+@partitions_group.command('create')
+@click.option('--ahead', default=1, show_default=True, help='Years (or, for audit_log, months) to create beyond the current one.')
+@click.option('--table', 'tables', multiple=True, type=click.Choice(['blotters', 'clearances', 'audit_log']))
+def partitions_create_command(ahead, tables):
+    """Create the current and upcoming partitions if missing."""
+    from . import db
+    from .partitions import ensure_partitions, next_period, period_start
+
+    with db.engine.begin() as conn:
+        for spec in _partitioned_specs(conn, tables):
+            through = period_start(date.today(), spec.interval)
+            for _ in range(ahead):
+                through = next_period(through, spec.interval)
+            names = ensure_partitions(conn, spec, through)
+            click.echo(f"{spec.table}: {', '.join(names)}")
+
+
+@partitions_group.command('archive')
+@click.option('--before', 'before_year', type=int, required=True, help='Archive partitions ending on or before January 1 of this year.')
+@click.option('--output-dir', default=None, help='Directory for archives [default: PARTITION_ARCHIVE_DIR].')
+@click.option('--table', 'tables', multiple=True, type=click.Choice(['blotters', 'clearances', 'audit_log']))
+@click.option('--dry-run', is_flag=True, help='List what would be archived without changing anything.')
+def partitions_archive_command(before_year, output_dir, tables, dry_run):
+    """Export old partitions to compressed CSV files, then drop them.
+
+    Resident counters over the archived blotters and clearances are lowered
+    in the same transaction. Sync clients are not sent deletes for archived
+    rows; they keep them until a full resync.
+    """
+    from datetime import datetime
+
+    from flask import current_app
+
+    from . import db
+    from .cache import cache
+    from .partitions import archive_partition, list_partitions
+
+    output_dir = (output_dir or current_app.config.get('PARTITION_ARCHIVE_DIR')
+                  or os.path.join(current_app.instance_path, 'archive'))
+    cutoff = datetime(before_year, 1, 1)
+    with db.engine.connect() as conn:
+        due = [
+            (spec, partition)
+            for spec in _partitioned_specs(conn, tables)
+            for partition in list_partitions(conn, spec)
+            if partition.upper is not None and partition.upper <= cutoff
+        ]
+    for spec, partition in due:
+        if dry_run:
+            click.echo(f'Would archive {partition.name} (~{partition.rows:,} rows)')
+            continue
+        # One transaction per partition: a failure leaves it attached
+        with db.engine.begin() as conn:
+            manifest = archive_partition(conn, spec, partition, output_dir)
+        cache.invalidate(*manifest['tables'])
+        rows = ', '.join(f"{f['rows']:,} {f['table']}" for f in manifest['files'])
+        click.echo(f'Archived {partition.name}: {rows}')
+    if not due:
+        click.echo('Nothing to archive.')
+
+
+@click.group('schema', cls=AppGroup)
+def schema_group():
+    """Inspect the database schema (create and alter it with `flask db upgrade`)."""
+
+
+@schema_group.command('check')
+def schema_check_command():
+    """Test the connection and count the rows of every table."""
+    from sqlalchemy import func, select
+
+    from . import db
+
+    with db.engine.connect() as conn:
+        for table in sorted(db.metadata.tables.values(), key=lambda t: t.name):
+            try:
+                rows = conn.execute(select(func.count()).select_from(table)).scalar_one()
+            except Exception as e:
+                conn.rollback()
+                click.echo(f'{table.name:<24} ERROR {e.__class__.__name__}: {e}'.splitlines()[0])
+            else:
+                click.echo(f'{table.name:<24} {rows:>12,} rows')
+
+
+@schema_group.command('info')
+def schema_info_command():
+    """Show the database URL (password hidden), server version and migration revision."""
+    from sqlalchemy import inspect, text
+
+    from . import db
+
+    engine = db.engine
+    click.echo(f'url:       {engine.url.render_as_string(hide_password=True)}')
+    with engine.connect() as conn:
+        version = '.'.join(map(str, conn.dialect.server_version_info or ())) or 'unknown'
+        click.echo(f'server:    {engine.dialect.name} {version}')
+        revision = 'none (run `flask db upgrade`)'
+        if inspect(conn).has_table('alembic_version'):
+            revision = conn.execute(text('SELECT version_num FROM alembic_version')).scalar() or revision
+        click.echo(f'revision:  {revision}')
+
+
+@schema_group.command('columns')
+@click.argument('tables', nargs=-1)
+def schema_columns_command(tables):
+    """List the columns of TABLES (default: every table) as the database has them."""
+    from sqlalchemy import inspect
+
+    from . import db
+
+    inspector = inspect(db.engine)
+    for name in tables or sorted(inspector.get_table_names()):
+        if not inspector.has_table(name):
+            click.echo(f'{name}: no such table')
+            continue
+        click.echo(f'{name}:')
+        for column in inspector.get_columns(name):
+            nullable = '' if column['nullable'] else ' NOT NULL'
+            default = f" DEFAULT {column['default']}" if column.get('default') is not None else ''
+            click.echo(f"  {column['name']:<24} {column['type']}{nullable}{default}")
+
+
+@click.group('startup', cls=AppGroup)
+def startup_group():
+    """Measure how long a fresh worker takes to import and create the app."""
+
+
+def _fresh_worker(code, *python_options):
+    """Run `code` in a new interpreter configured like a worker.
+
+    FLASK_RUN_FROM_CLI is cleared so the app is created exactly as under
+    a WSGI server (without the CLI-only extensions).
+    """
+    from flask import current_app
+
+    env = {k: v for k, v in os.environ.items() if k != 'FLASK_RUN_FROM_CLI'}
+    return subprocess.run(
+        [sys.executable, *python_options, '-c', code],
+        cwd=os.path.dirname(current_app.root_path), env=env, capture_output=True, text=True, check=True,
+    )
+
+
+_CREATE_APP = 'from app import create_app; create_app()'
+
+
+@startup_group.command('imports')
+@click.option('--min-ms', default=5.0, show_default=True, help='Hide imports whose cumulative time is below this.')
+@click.option('--top', type=int, help='List the N slowest imports by cumulative time instead of the tree.')
+def startup_imports_command(min_ms, top):
+    """Import-time profile of create_app (python -X importtime), as a tree."""
+    stderr = _fresh_worker(_CREATE_APP, '-X', 'importtime').stderr
+    # A module is reported after the imports it triggered, one level deeper
+    pending = {}  # depth -> [(name, self ms, cumulative ms, children)]
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        node = (name.strip(), int(self_us) / 1000, int(cumulative_us) / 1000, pending.pop(depth + 1, []))
+        pending.setdefault(depth, []).append(node)
+        imports.append(node)
+    roots = pending.get(0, [])
+
+    click.echo(f'{len(imports)} modules imported in {sum(n[2] for n in roots):.0f} ms')
+    if top:
+        for name, self_ms, cumulative_ms, _ in sorted(imports, key=lambda n: -n[2])[:top]:
+            click.echo(f'{cumulative_ms:9.1f} ms {self_ms:8.1f} self  {name}')
+        return
+
+    def show(nodes, depth):
+        for name, self_ms, cumulative_ms, children in nodes:
+            if cumulative_ms >= min_ms:
+                click.echo(f'{cumulative_ms:9.1f} ms {self_ms:8.1f} self  {"  " * depth}{name}')
+                show(children, depth + 1)
+
+    show(roots, 0)
+
+
+@startup_group.command('time')
+@click.option('--runs', default=5, show_default=True, help='Fresh interpreters to time.')
+def startup_time_command(runs):
+    """Wall time to import the app and run create_app in a fresh interpreter."""
+    code = f'import time; t = time.perf_counter(); {_CREATE_APP}; print(time.perf_counter() - t)'
+    samples = [float(_fresh_worker(code).stdout.split()[-1]) * 1000 for _ in range(runs)]
+    click.echo(f'create_app: median {statistics.median(samples):.0f} ms, '
+               f'min {min(samples):.0f} ms, max {max(samples):.0f} ms over {runs} runs')
+
+
+@click.group('slowlog', cls=AppGroup)
+def slowlog_group():
+    """Statements that exceeded SLOW_QUERY_THRESHOLD_MS (see app/slowlog.py)."""
+
+
+@slowlog_group.command('report')
+@click.option('--limit', default=20, show_default=True)
+@click.option('--order', type=click.Choice(('total', 'max', 'calls')), default='total', show_default=True)
+def slowlog_report_command(limit, order):
+    """The slowest statement fingerprints."""
+    from sqlalchemy import select
+
+    from . import db
+    from .models import SlowQuery
+
+    column = {'total': SlowQuery.total_ms, 'max': SlowQuery.max_ms, 'calls': SlowQuery.calls}[order]
+    rows = db.session.scalars(select(SlowQuery).order_by(column.desc()).limit(limit)).all()
+    if not rows:
+        click.echo('No slow queries recorded.')
+        return
+    click.echo(f'{"fingerprint":<12} {"calls":>7} {"total ms":>11} {"mean ms":>9} {"max ms":>9}  last seen         statement')
+    for q in rows:
+        statement = q.statement if len(q.statement) <= 80 else q.statement[:77] + '...'
+        click.echo(f'{q.fingerprint[:12]:<12} {q.calls:>7,} {q.total_ms:>11,.0f} {q.total_ms / q.calls:>9,.1f} '
+                   f'{q.max_ms:>9,.1f}  {q.last_seen:%Y-%m-%d %H:%M}  {statement}')
+
+
+@slowlog_group.command('show')
+@click.argument('fingerprint')
+def slowlog_show_command(fingerprint):
+    """Totals, latest sample and query plan of FINGERPRINT (a prefix is enough)."""
+    from sqlalchemy import select
+
+    from . import db
+    from .models import SlowQuery, SlowQuerySample
+
+    matches = db.session.scalars(select(SlowQuery).where(SlowQuery.fingerprint.startswith(fingerprint, autoescape=True)).limit(2)).all()
+    if len(matches) != 1:
+        raise click.ClickException(f'{"No" if not matches else "More than one"} fingerprint matches {fingerprint!r}')
+    q = matches[0]
+    samples = select(SlowQuerySample).where(SlowQuerySample.fingerprint == q.fingerprint) \
+        .order_by(SlowQuerySample.occurred_at.desc())
+    latest = db.session.scalars(samples.limit(1)).first()
+    planned = db.session.scalars(samples.where(SlowQuerySample.plan.isnot(None)).limit(1)).first()
+
+    click.echo(f'{q.fingerprint}: {q.calls:,} calls, {q.total_ms:,.0f} ms total, '
+               f'{q.total_ms / q.calls:,.1f} ms mean, {q.max_ms:,.1f} ms max')
+    click.echo(f'seen {q.first_seen:%Y-%m-%d %H:%M} to {q.last_seen:%Y-%m-%d %H:%M}\n')
+    if latest is not None:
+        route = f'{latest.method} {latest.path} ({latest.endpoint})' if latest.endpoint else 'outside a request'
+        click.echo(f'latest: {latest.duration_ms:,.1f} ms at {latest.occurred_at:%Y-%m-%d %H:%M:%S}, {route}'
+                   f'{f", user {latest.user_id}" if latest.user_id else ""}')
+        click.echo(f'params: {latest.params}\n')
+        click.echo(latest.statement)
+    if planned is not None:
+        click.echo(f'\nplan ({planned.occurred_at:%Y-%m-%d %H:%M:%S}, {planned.duration_ms:,.1f} ms run):')
+        click.echo(planned.plan)
+
+
+@slowlog_group.command('prune')
+@click.option('--days', type=int, help='Keep this many days [default: SLOW_QUERY_RETENTION_DAYS].')
+def slowlog_prune_command(days):
+    """Delete samples older than the retention period."""
+    from datetime import datetime, timedelta
+
+    from flask import current_app
+
+    from . import db
+    from .slowlog import prune
+
+    days = current_app.config['SLOW_QUERY_RETENTION_DAYS'] if days is None else days
+    removed = prune(db.session, datetime.utcnow() - timedelta(days=days))
+    db.session.commit()
+    click.echo(f'Removed {removed:,} slow-query samples older than {days} days.')
+
+
+def init_app(app):
+    app.cli.add_command(counters_group)
+    app.cli.add_command(directory_group)
+    app.cli.add_command(analytics_group)
+    app.cli.add_command(masterlist_group)
+    app.cli.add_command(partitions_group)
+    app.cli.add_command(schema_group)
+    app.cli.add_command(startup_group)
+    app.cli.add_command(slowlog_group)
+    app.cli.add_command(seed_command)
+    app.cli.add_command(sync_prune_command)
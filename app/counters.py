@@ -0,0 +1,174 @@
+"""Counter-cache columns on households and residents.
+
+``households.member_count``, ``residents.clearance_count`` and
+``residents.blotter_count`` hold the number of child rows pointing at
+each parent, so list and stats pages read one column instead of counting
+or loading the children.
+
+Mapper events note every insert, delete and re-parenting of a child
+during flush. When the flush ends, the net change per parent is applied
+with one ``UPDATE ... SET n = n + delta`` per counter. The UPDATE runs in
+the flush's transaction, so a rollback undoes it with the rows.
+Incrementing in SQL (rather than from the loaded value) keeps concurrent
+writers from overwriting each other. Counter updates leave
+``updated_at`` alone: a household gaining a member is not an edit to
+sync or audit.
+
+Core bulk inserts bypass mapper events; code using them calls
+`count_inserted`, and code dropping child rows wholesale (partition
+archiving) calls `count_removed` first. `reconcile` recomputes every counter set-based, for
+``flask counters reconcile`` after imports or manual SQL.
+"""
+from collections import Counter, defaultdict, namedtuple
+
+from sqlalchemy import bindparam, event, func, inspect, select, text, update
+from sqlalchemy.orm import Session, scoped_session
+
+from .cache import note_changes
+
+CounterSpec = namedtuple('CounterSpec', 'child foreign_key parent column')
+
+_PENDING = 'counter_deltas'
+
+
+def _specs():
+    from .models import Blotter, Clearance, Household, Resident
+
+    return (
+        CounterSpec(Resident, 'household_id', Household, 'member_count'),
+        CounterSpec(Clearance, 'resident_id', Resident, 'clearance_count'),
+        CounterSpec(Blotter, 'reported_by_id', Resident, 'blotter_count'),
+    )
+
+
+def _note(session, spec, parent_id, delta):
+    if parent_id is None:
+        return
+    deltas = session.info.setdefault(_PENDING, defaultdict(Counter))
+    deltas[spec][parent_id] += delta
+
+
+def _apply(session, spec, deltas):
+    """Add each ``{parent_id: delta}`` to the parent's counter column."""
+    changed = [{'pid': pid, 'delta': delta} for pid, delta in deltas.items() if delta]
+    if not changed:
+        return
+    parent = spec.parent.__table__
+    column = parent.c[spec.column]
+    session.connection().execute(
+        update(parent)
+        .where(parent.c.id == bindparam('pid'))
+        # Naming updated_at keeps its onupdate default from firing
+        .values({column: column + bindparam('delta'), parent.c.updated_at: parent.c.updated_at}),
+        changed,
+    )
+    note_changes(session, parent.name)
+    # Loaded parents re-read the counter on next access
+    for item in changed:
+        obj = session.identity_map.get(session.identity_key(spec.parent, item['pid']))
+        if obj is not None:
+            session.expire(obj, [spec.column])
+
+
+def count_inserted(session, model, rows):
+    """Bump counters for child `rows` (column dicts) inserted with Core."""
+    if isinstance(session, scoped_session):
+        session = session()
+    for spec in _specs():
+        if spec.child is model:
+            _apply(session, spec, Counter(row.get(spec.foreign_key) for row in rows if row.get(spec.foreign_key)))
+
+
+def count_removed(conn, table, source):
+    """Lower counters for the rows of child `table` held in table `source`.
+
+    Call it before `source` is dropped or emptied, on the same connection
+    and transaction. Returns the names of the parent tables updated.
+    """
+    changed = []
+    for spec in _specs():
+        if spec.child.__tablename__ != table:
+            continue
+        parent, fk, column = spec.parent.__tablename__, spec.foreign_key, spec.column
+        conn.execute(text(
+            f'UPDATE {parent} SET {column} = {parent}.{column} - removed.n '
+            f'FROM (SELECT {fk} AS id, count(*) AS n FROM {source} WHERE {fk} IS NOT NULL GROUP BY {fk}) removed '
+            f'WHERE {parent}.id = removed.id'
+        ))
+        changed.append(parent)
+    return changed
+
+
+def reconcile(session):
+    """Recompute every counter; returns ``{column: rows corrected}``."""
+    fixed = {}
+    for spec in _specs():
+        parent, child = spec.parent.__table__, spec.child.__table__
+        column = parent.c[spec.column]
+        actual = (
+            select(func.count())
+            .where(child.c[spec.foreign_key] == parent.c.id)
+            .scalar_subquery()
+        )
+        result = session.execute(
+            update(parent)
+            .where(column != actual)
+            .values({column: actual, parent.c.updated_at: parent.c.updated_at})
+        )
+        fixed[f'{parent.name}.{spec.column}'] = result.rowcount
+    return fixed
+
+
+# -- events ------------------------------------------------------------------
+
+def _listeners(spec):
+    def after_insert(mapper, connection, target):
+        _note(inspect(target).session, spec, getattr(target, spec.foreign_key), 1)
+
+    def after_update(mapper, connection, target):
+        state = inspect(target)
+        history = state.attrs[spec.foreign_key].history
+        if history.added or history.deleted:
+            old = history.deleted[0] if history.deleted else None
+            new = history.added[0] if history.added else None
+            if old != new:
+                _note(state.session, spec, old, -1)
+                _note(state.session, spec, new, 1)
+
+    def before_delete(mapper, connection, target):
+        # Before, not after: reading an expired key after the DELETE would fail
+        _note(inspect(target).session, spec, getattr(target, spec.foreign_key), -1)
+
+    return after_insert, after_update, before_delete
+
+
+def _apply_pending(session, flush_context):
+    pending = session.info.pop(_PENDING, None)
+    for spec, deltas in (pending or {}).items():
+        _apply(session, spec, deltas)
+
+
+def _drop_stale(session, flush_context, instances):
+    # Left over only if the previous flush failed midway
+    session.info.pop(_PENDING, None)
+
+
+_events_registered = False
+
+
+def _register_events():
+    global _events_registered
+    if _events_registered:
+        return
+    for spec in _specs():
+        after_insert, after_update, before_delete = _listeners(spec)
+        event.listen(spec.child, 'after_insert', after_insert)
+        event.listen(spec.child, 'after_update', after_update)
+        event.listen(spec.child, 'before_delete', before_delete)
+    event.listen(Session, 'before_flush', _drop_stale)
+    event.listen(Session, 'after_flush_postexec', _apply_pending)
+    _events_registered = True
+
+
+def init_app(app):
+    _register_events()
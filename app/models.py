@@ -1,9 +1,19 @@
 from datetime import datetime
+from functools import lru_cache
 from app import db
+from flask import current_app
+from sqlalchemy import DDL, event
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
 from flask_login import UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
 
 
+@lru_cache(maxsize=None)
+def _hash_prefix(method):
+    """The `method$` prefix werkzeug writes for `method`, e.g. 'scrypt:32768:8:1$'."""
+    return generate_password_hash('', method=method).split('$', 1)[0] + '$'
+
+
 class User(UserMixin, db.Model):
     __tablename__ = 'users'
     id = db.Column(db.Integer, primary_key=True)
@@ -14,15 +24,109 @@ class User(UserMixin, db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = generate_password_hash(
+            password,
+            method=current_app.config['PASSWORD_HASH_METHOD'],
+            salt_length=current_app.config['PASSWORD_SALT_LENGTH'],
+        )
 
     def check_password(self, password):
         return check_password_hash(self.password_hash, password)
 
+    def password_needs_rehash(self):
+        """True if the stored hash was made with a different method or cost."""
+        prefix = _hash_prefix(current_app.config['PASSWORD_HASH_METHOD'])
+        return not (self.password_hash or '').startswith(prefix)
+
     def __repr__(self):
         return f'<User {self.username}>'
 
 
+class LoginAttempt(db.Model):
+    """Attempt log for the database-backed login rate limiter."""
+    __tablename__ = 'login_attempts'
+
+    id = db.Column(db.Integer, primary_key=True)
+    key = db.Column(db.String(190), nullable=False)
+    attempted_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_login_attempts_key_attempted_at', 'key', 'attempted_at'),
+    )
+
+
+class AuditLog(db.Model):
+    """Append-only change history of record tables, written by app/audit.py.
+
+    On PostgreSQL the migration creates this table partitioned by month on
+    `occurred_at` (primary key ``(id, occurred_at)``).
+    """
+    __tablename__ = 'audit_log'
+
+    id = db.Column(db.BigInteger().with_variant(db.Integer(), 'sqlite'), primary_key=True)
+    occurred_at = db.Column(db.DateTime, nullable=False)
+    user_id = db.Column(db.Integer, nullable=True)  # no FK: entries outlive their user
+    username = db.Column(db.String(64), nullable=True)
+    action = db.Column(db.String(10), nullable=False)  # insert, update, delete
+    entity = db.Column(db.String(30), nullable=False)  # table name
+    record_id = db.Column(db.Integer, nullable=False)
+    changes = db.Column(db.JSON().with_variant(JSONB(), 'postgresql'), nullable=True)
+
+    __table_args__ = (
+        db.Index('ix_audit_log_entity_record', 'entity', 'record_id', 'occurred_at'),
+        db.Index('ix_audit_log_user', 'user_id', 'occurred_at'),
+    )
+
+
+class SlowQuery(db.Model):
+    """Totals per statement fingerprint of queries over the slow-query threshold (app/slowlog.py)."""
+    __tablename__ = 'slow_queries'
+
+    fingerprint = db.Column(db.String(40), primary_key=True)
+    statement = db.Column(db.Text, nullable=False)  # normalized: literals and parameters as ?
+    calls = db.Column(db.Integer, nullable=False, default=0)
+    total_ms = db.Column(db.Float, nullable=False, default=0)
+    max_ms = db.Column(db.Float, nullable=False, default=0)
+    first_seen = db.Column(db.DateTime, nullable=False)
+    last_seen = db.Column(db.DateTime, nullable=False)
+
+
+class SlowQuerySample(db.Model):
+    """One slow execution: redacted parameters, calling route and query plan."""
+    __tablename__ = 'slow_query_samples'
+
+    id = db.Column(db.Integer, primary_key=True)
+    fingerprint = db.Column(db.String(40), nullable=False)  # no FK: pruned independently
+    occurred_at = db.Column(db.DateTime, nullable=False)
+    duration_ms = db.Column(db.Float, nullable=False)
+    statement = db.Column(db.Text, nullable=False)
+    params = db.Column(db.JSON().with_variant(JSONB(), 'postgresql'), nullable=True)
+    endpoint = db.Column(db.String(120), nullable=True)
+    method = db.Column(db.String(10), nullable=True)
+    path = db.Column(db.String(255), nullable=True)
+    user_id = db.Column(db.Integer, nullable=True)
+    plan = db.Column(db.Text, nullable=True)
+
+    __table_args__ = (
+        db.Index('ix_slow_query_samples_fingerprint', 'fingerprint', 'occurred_at'),
+        db.Index('ix_slow_query_samples_occurred_at', 'occurred_at'),
+    )
+
+
+class SyncTombstone(db.Model):
+    """A deleted record, kept so offline clients can drop their copy (see app/services/sync.py)."""
+    __tablename__ = 'sync_tombstones'
+
+    id = db.Column(db.Integer, primary_key=True)
+    entity = db.Column(db.String(30), nullable=False)  # table name, e.g. 'residents'
+    record_id = db.Column(db.Integer, nullable=False)
+    deleted_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_sync_tombstones_deleted_at_id', 'deleted_at', 'id'),
+    )
+
+
 class Household(db.Model):
     __tablename__ = 'households'
 
@@ -30,6 +134,7 @@ class Household(db.Model):
     address = db.Column(db.String(255), nullable=False)
     purok = db.Column(db.String(50), nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False, index=True)
 
     # New socio-economic fields
     category = db.Column(db.String(50), nullable=True)
@@ -37,8 +142,12 @@ class Household(db.Model):
     toilet_type = db.Column(db.String(50), nullable=True)
     remarks = db.Column(db.Text, nullable=True)
 
+    # Number of residents with this household_id, kept by app/counters.py
+    member_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+
     # Foreign key to the resident who is the head of this household
-    head_id = db.Column(db.Integer, db.ForeignKey('residents.id'), nullable=True)
+    # active_history: the resident directory must know the previous head to clear its flag
+    head_id = db.mapped_column(db.Integer, db.ForeignKey('residents.id'), nullable=True, active_history=True)
     head = db.relationship('Resident', back_populates='household_headed', foreign_keys=[head_id], post_update=True)
     residents = db.relationship('Resident', back_populates='household', cascade='all, delete-orphan', foreign_keys='Resident.household_id')
 
@@ -46,10 +155,20 @@ class Household(db.Model):
         return f'<Household id={self.id}>'
 
 
+# Residents who appear on the voters' masterlist
+VOTER_CONDITION = "voters_status = 'Registered' AND status = 'Active'"
+
+
 class Resident(db.Model):
     __tablename__ = 'residents'
     __table_args__ = (
         db.UniqueConstraint('first_name', 'last_name', 'birth_date', name='_resident_uc'),
+        db.Index('ix_residents_household_id', 'household_id'),
+        # Voters' masterlists (app/services/masterlist.py), in print order
+        db.Index('ix_residents_voters_purok', 'purok', 'last_name', 'first_name', 'middle_name', 'id',
+                 postgresql_where=db.text(VOTER_CONDITION), sqlite_where=db.text(VOTER_CONDITION)),
+        db.Index('ix_residents_voters_precinct', 'precinct', 'last_name', 'first_name', 'middle_name', 'id',
+                 postgresql_where=db.text(VOTER_CONDITION), sqlite_where=db.text(VOTER_CONDITION)),
     )
 
     id = db.Column(db.Integer, primary_key=True)
@@ -62,6 +181,8 @@ class Resident(db.Model):
     civil_status = db.Column(db.String(20), nullable=True)
     purok = db.Column(db.String(50), nullable=True)
     voters_status = db.Column(db.String(20), nullable=True)
+    # COMELEC precinct number, for registered voters
+    precinct = db.Column(db.String(20), nullable=True)
     identified_as = db.Column(db.String(50), nullable=True)
     email = db.Column(db.String(120), nullable=True)
     occupation = db.Column(db.String(120), nullable=True)
@@ -72,11 +193,16 @@ class Resident(db.Model):
     contact_number = db.Column(db.String(20), nullable=True)
     status = db.Column(db.String(30), default='Active', nullable=False)
 
-    household_id = db.Column(db.Integer, db.ForeignKey('households.id'), nullable=True)
+    # active_history: moving a resident must know the old household to fix its member_count
+    household_id = db.mapped_column(db.Integer, db.ForeignKey('households.id'), nullable=True, active_history=True)
     household = db.relationship('Household', back_populates='residents', foreign_keys=[household_id])
 
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False, index=True)
+
+    # Clearances requested and blotter cases reported, kept by app/counters.py
+    clearance_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    blotter_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
 
     clearances = db.relationship('Clearance', back_populates='resident', cascade='all, delete-orphan')
     blotters_reported = db.relationship('Blotter', back_populates='reported_by', foreign_keys='Blotter.reported_by_id')
@@ -92,6 +218,35 @@ class Resident(db.Model):
         return f'<Resident id={self.id} name={self.last_name}, {self.first_name}>'
 
 
+class ResidentDirectory(db.Model):
+    """Slim, denormalized copy of each resident for the listing pages.
+
+    Maintained from Resident and Household flushes by
+    app/services/directory.py; never written directly.
+    """
+    __tablename__ = 'resident_directory'
+
+    resident_id = db.Column(db.Integer, primary_key=True)  # residents.id; no FK, rows follow the resident
+    first_name = db.Column(db.String(80), nullable=False)
+    last_name = db.Column(db.String(80), nullable=False)
+    birth_date = db.Column(db.Date, nullable=True)
+    purok = db.Column(db.String(50), nullable=True)
+    household_id = db.Column(db.Integer, nullable=True)
+    is_head = db.Column(db.Boolean, default=False, nullable=False)
+    status = db.Column(db.String(30), nullable=False)
+
+    # Listing order is (last_name, first_name); on PostgreSQL the name index
+    # carries the remaining columns so a page is an index-only scan
+    __table_args__ = (
+        db.Index(
+            'ix_resident_directory_name', 'last_name', 'first_name', 'resident_id',
+            postgresql_include=['birth_date', 'purok', 'household_id', 'is_head', 'status'],
+        ),
+        db.Index('ix_resident_directory_purok_name', 'purok', 'last_name', 'first_name'),
+        db.Index('ix_resident_directory_status_name', 'status', 'last_name', 'first_name'),
+    )
+
+
 class Blotter(db.Model):
     __tablename__ = 'blotters'
 
@@ -104,30 +259,124 @@ class Blotter(db.Model):
     respondent_name = db.Column(db.String(120), nullable=True)
     reported_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     hearing_date = db.Column(db.DateTime, nullable=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False, index=True)
 
-    reported_by_id = db.Column(db.Integer, db.ForeignKey('residents.id'), nullable=True)
+    reported_by_id = db.mapped_column(db.Integer, db.ForeignKey('residents.id'), nullable=True, active_history=True)
     reported_by = db.relationship('Resident', back_populates='blotters_reported', foreign_keys=[reported_by_id])
 
+    # Full-text index over title, respondent, details and location, kept up by
+    # a trigger on PostgreSQL (see app/services/blotter_search.py); unused elsewhere
+    search_vector = db.deferred(db.Column(TSVECTOR().with_variant(db.Text(), 'sqlite'), nullable=True))
+
+    # hearing_date mirrors the next scheduled hearing (see app/services/hearings.py)
+    hearings = db.relationship('Hearing', back_populates='blotter', cascade='all, delete-orphan', order_by='Hearing.starts_at')
+
+    # On PostgreSQL the table is partitioned by year of reported_at and its
+    # primary key is (id, reported_at); see app/partitions.py
+    __table_args__ = (
+        db.Index('ix_blotters_search_vector', 'search_vector', postgresql_using='gin').ddl_if(dialect='postgresql'),
+        db.Index('ix_blotters_status_reported_at', 'status', 'reported_at'),
+        db.Index('ix_blotters_reported_by_id', 'reported_by_id'),
+    )
+
     def __repr__(self) -> str:
         return f'<Blotter id={self.id} title={self.case_title!r} status={self.status}>'
 
 
+# Run on create_all(); migration 9e6b1d4f7a25 installs the same trigger on existing databases
+BLOTTER_SEARCH_TRIGGER_DDL = (
+    """
+    CREATE OR REPLACE FUNCTION blotters_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('simple', coalesce(NEW.case_title, '')), 'A') ||
+            setweight(to_tsvector('simple', coalesce(NEW.respondent_name, '')), 'A') ||
+            setweight(to_tsvector('simple', coalesce(NEW.details, '')), 'B') ||
+            setweight(to_tsvector('simple', coalesce(NEW.location, '')), 'C');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER blotters_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF case_title, respondent_name, details, location ON blotters
+    FOR EACH ROW EXECUTE FUNCTION blotters_search_vector_update()
+    """,
+)
+
+for _statement in BLOTTER_SEARCH_TRIGGER_DDL:
+    event.listen(Blotter.__table__, 'after_create', DDL(_statement).execute_if(dialect='postgresql'))
+
+
 class Clearance(db.Model):
     __tablename__ = 'clearances'
 
     id = db.Column(db.Integer, primary_key=True)
     clearance_type = db.Column(db.String(80), nullable=False)  # e.g., Barangay Clearance, Indigency
     purpose = db.Column(db.String(180), nullable=True)
-    status = db.Column(db.String(30), default='Pending', nullable=False)
+    status = db.Column(db.String(30), default='Pending', nullable=False)  # Pending -> Approved -> Issued [-> Revoked]
+    requested_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    approved_at = db.Column(db.DateTime, nullable=True)
     issued_at = db.Column(db.DateTime, nullable=True)
+    revoked_at = db.Column(db.DateTime, nullable=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False, index=True)
 
-    resident_id = db.Column(db.Integer, db.ForeignKey('residents.id'), nullable=False)
+    resident_id = db.mapped_column(db.Integer, db.ForeignKey('residents.id'), nullable=False, active_history=True)
     resident = db.relationship('Resident', back_populates='clearances')
 
+    # On PostgreSQL the table is partitioned by year of requested_at and its
+    # primary key is (id, requested_at); see app/partitions.py
+    __table_args__ = (
+        # The processing queue is read by status in request order
+        db.Index('ix_clearances_status_requested_at', 'status', 'requested_at'),
+        db.Index('ix_clearances_status_issued_at', 'status', 'issued_at'),
+        db.Index('ix_clearances_resident_id', 'resident_id'),
+    )
+
+    @property
+    def reference_no(self):
+        return clearance_reference_no(self.id, self.requested_at)
+
     def __repr__(self) -> str:
         return f'<Clearance id={self.id} type={self.clearance_type!r} status={self.status}>'
 
 
+class Hearing(db.Model):
+    __tablename__ = 'hearings'
+
+    id = db.Column(db.Integer, primary_key=True)
+    # Not enforced by PostgreSQL once blotters is partitioned (migration 8b4e2f7c1d56)
+    blotter_id = db.Column(db.Integer, db.ForeignKey('blotters.id'), nullable=False)
+    official_id = db.Column(db.Integer, db.ForeignKey('officials.id'), nullable=True)  # presiding official
+    venue = db.Column(db.String(120), nullable=True)
+    starts_at = db.Column(db.DateTime, nullable=False)
+    ends_at = db.Column(db.DateTime, nullable=False)
+    status = db.Column(db.String(30), default='Scheduled', nullable=False)  # Scheduled, Held, Cancelled
+    notes = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    blotter = db.relationship('Blotter', back_populates='hearings')
+    official = db.relationship('Official')
+
+    __table_args__ = (
+        db.CheckConstraint('ends_at > starts_at', name='ck_hearings_interval'),
+        # Overlap lookups are range scans on (resource, starts_at)
+        db.Index('ix_hearings_official_starts_at', 'official_id', 'starts_at'),
+        # Venues are matched case-insensitively (app/services/hearings.py)
+        db.Index('ix_hearings_lower_venue_starts_at', db.func.lower(venue), 'starts_at'),
+        db.Index('ix_hearings_starts_at', 'starts_at'),
+        db.Index('ix_hearings_blotter_id', 'blotter_id'),
+    )
+
+    def __repr__(self) -> str:
+        return f'<Hearing id={self.id} blotter={self.blotter_id} {self.starts_at:%Y-%m-%d %H:%M} status={self.status}>'
+
+
+def clearance_reference_no(clearance_id, requested_at):
+    """Printed reference number, e.g. CLR-2025-00245."""
+    return f'CLR-{requested_at:%Y}-{clearance_id:05d}'
+
+
 class Official(db.Model):
     __tablename__ = 'officials'
 
@@ -0,0 +1,164 @@
+"""Range partitioning of the large, time-ordered tables (PostgreSQL only).
+
+`SPECS` declares which tables are partitioned, on which column and per
+what period. Migrations turn the tables into partitioned ones. The
+functions here create upcoming partitions and archive old ones:
+`flask partitions create` ensures next year's partitions exist (run it
+from cron), and `flask partitions archive --before YEAR` exports whole
+partitions to gzip-compressed CSV under ``PARTITION_ARCHIVE_DIR`` and
+then drops them. Each archive gets a JSON manifest (bounds, row counts
+and checksums); the CSV files have a header row and load back with
+``COPY ... FROM ... WITH (FORMAT csv, HEADER true)``.
+
+Every table also has a DEFAULT partition that catches rows outside the
+created ranges. It should stay empty; `list_partitions` reports its size.
+
+Archiving removes rows from the live database. The counter-cache columns
+counting them (``residents.blotter_count``, ``residents.clearance_count``)
+are lowered in the same transaction. Offline sync clients are not sent
+deletes for them: no tombstones are written, and clients keep their copies
+until they do a full resync.
+"""
+import gzip
+import hashlib
+import json
+import os
+import re
+from collections import namedtuple
+from datetime import date, datetime
+
+from sqlalchemy import text
+
+from .counters import count_removed
+
+PartitionSpec = namedtuple('PartitionSpec', 'table column interval dependents')
+
+# dependents: (table, column) rows referencing this table's ids, exported and
+# removed along with an archived partition (their foreign keys cannot point
+# at a partitioned table)
+SPECS = {
+    'blotters': PartitionSpec('blotters', 'reported_at', 'year', (('hearings', 'blotter_id'),)),
+    'clearances': PartitionSpec('clearances', 'requested_at', 'year', ()),
+    'audit_log': PartitionSpec('audit_log', 'occurred_at', 'month', ()),
+}
+
+Partition = namedtuple('Partition', 'name lower upper rows')
+
+_BOUND = re.compile(r"FROM \('([^']+)'\) TO \('([^']+)'\)")
+
+
+def period_start(day, interval):
+    if interval == 'year':
+        return date(day.year, 1, 1)
+    return date(day.year, day.month, 1)
+
+
+def next_period(start, interval):
+    if interval == 'year':
+        return date(start.year + 1, 1, 1)
+    return date(start.year + start.month // 12, start.month % 12 + 1, 1)
+
+
+def partition_name(spec, start):
+    if spec.interval == 'year':
+        return f'{spec.table}_y{start:%Y}'
+    return f'{spec.table}_y{start:%Y}m{start:%m}'
+
+
+def is_partitioned(conn, table):
+    if conn.dialect.name != 'postgresql':
+        return False
+    return bool(conn.execute(text(
+        'SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid '
+        'WHERE c.relname = :table AND pg_table_is_visible(c.oid)'
+    ), {'table': table}).scalar())
+
+
+def ensure_partition(conn, spec, start):
+    """Create the partition of `spec` beginning at `start` if it does not exist."""
+    start = period_start(start, spec.interval)
+    conn.execute(text(
+        f'CREATE TABLE IF NOT EXISTS {partition_name(spec, start)} PARTITION OF {spec.table} '
+        f"FOR VALUES FROM ('{start.isoformat()}') TO ('{next_period(start, spec.interval).isoformat()}')"
+    ))
+
+
+def ensure_partitions(conn, spec, through, start=None):
+    """Create every partition from `start` (default: current period) through `through`."""
+    period = period_start(start or date.today(), spec.interval)
+    created = []
+    while period <= through:
+        ensure_partition(conn, spec, period)
+        created.append(partition_name(spec, period))
+        period = next_period(period, spec.interval)
+    return created
+
+
+def list_partitions(conn, spec):
+    """Partitions of `spec` in bound order; the default partition has no bounds."""
+    rows = conn.execute(text(
+        'SELECT c.relname, pg_get_expr(c.relpartbound, c.oid), c.reltuples::bigint '
+        'FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid '
+        'JOIN pg_class p ON p.oid = i.inhparent WHERE p.relname = :table'
+    ), {'table': spec.table}).all()
+    partitions = []
+    for name, bound, estimate in rows:
+        match = _BOUND.search(bound)
+        lower = datetime.fromisoformat(match.group(1)) if match else None
+        upper = datetime.fromisoformat(match.group(2)) if match else None
+        partitions.append(Partition(name, lower, upper, max(estimate, 0)))
+    return sorted(partitions, key=lambda p: (p.lower is None, p.lower or datetime.min))
+
+
+def _export(conn, query, path):
+    """COPY the rows of `query` into a gzip'd CSV at `path`; returns (rows, sha256)."""
+    raw = conn.connection.dbapi_connection
+    with raw.cursor() as cursor, gzip.open(path, 'wt', encoding='utf-8', newline='') as out:
+        cursor.copy_expert(f'COPY ({query}) TO STDOUT WITH (FORMAT csv, HEADER true)', out)
+        rows = cursor.rowcount
+    digest = hashlib.sha256()
+    with open(path, 'rb') as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b''):
+            digest.update(chunk)
+    return rows, digest.hexdigest()
+
+
+def archive_partition(conn, spec, partition, directory):
+    """Detach `partition`, export it (and dependent rows) to `directory`, then drop it.
+
+    Runs inside the caller's transaction, so a failed export leaves the
+    partition attached. Counters over the dropped rows are lowered in the
+    same transaction. Returns the manifest written alongside the data; its
+    'tables' are every table whose rows changed.
+    """
+    os.makedirs(directory, exist_ok=True)
+    conn.execute(text(f'ALTER TABLE {spec.table} DETACH PARTITION {partition.name}'))
+
+    manifest = {
+        'table': spec.table,
+        'partition': partition.name,
+        'column': spec.column,
+        'from': partition.lower.isoformat(),
+        'to': partition.upper.isoformat(),
+        'archived_at': datetime.utcnow().isoformat(timespec='seconds'),
+        'files': [],
+    }
+    exports = [(spec.table, f'SELECT * FROM {partition.name} ORDER BY id')]
+    for table, column in spec.dependents:
+        exports.append((table, f'SELECT * FROM {table} WHERE {column} IN (SELECT id FROM {partition.name}) ORDER BY id'))
+    for table, query in exports:
+        path = os.path.join(directory, f'{partition.name}.{table}.csv.gz')
+        rows, checksum = _export(conn, query, path)
+        manifest['files'].append({'table': table, 'path': os.path.basename(path), 'rows': rows, 'sha256': checksum})
+
+    changed = {spec.table}
+    for table, column in spec.dependents:
+        conn.execute(text(f'DELETE FROM {table} WHERE {column} IN (SELECT id FROM {partition.name})'))
+        changed.add(table)
+    changed.update(count_removed(conn, spec.table, partition.name))
+    conn.execute(text(f'DROP TABLE {partition.name}'))
+    manifest['tables'] = sorted(changed)
+
+    with open(os.path.join(directory, f'{partition.name}.manifest.json'), 'w') as fh:
+        json.dump(manifest, fh, indent=2)
+    return manifest
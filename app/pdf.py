@@ -0,0 +1,111 @@
+"""A minimal PDF writer that emits a document one page at a time.
+
+It covers what printed lists need and nothing more: pages of text in the
+standard Helvetica fonts (not embedded, WinAnsi encoding) and thin rules.
+`render` serializes each page as soon as the iterable produces it, so a
+document of any length is written in constant memory. The page tree and
+cross-reference table, which need every page's object number and byte
+offset, are written last.
+"""
+import zlib
+
+A4 = (595, 842)
+
+# Font resource name -> standard Type 1 font
+FONTS = (('F1', 'Helvetica'), ('F2', 'Helvetica-Bold'))
+
+_CATALOG, _PAGES, _RESOURCES, _INFO = 1, 2, 3, 4
+_FIRST_FONT = 5
+_FIRST_PAGE = _FIRST_FONT + len(FONTS)
+
+
+def _string(text):
+    data = str(text).encode('cp1252', errors='replace')
+    return b'(' + data.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)') + b')'
+
+
+class Page:
+    """Drawing operations for one page.
+
+    Coordinates are in points from the top-left corner, like the layout
+    they are computed from; they are flipped to PDF's bottom-left origin
+    when drawn.
+    """
+
+    def __init__(self, size=A4):
+        self.width, self.height = size
+        self._ops = []
+
+    def text(self, x, y, text, size=9, bold=False):
+        font = b'F2' if bold else b'F1'
+        self._ops.append(b'BT /%s %d Tf %.2f %.2f Td %s Tj ET' % (font, size, x, self.height - y, _string(text)))
+
+    def line(self, x1, y1, x2, y2, width=0.5):
+        self._ops.append(b'%.2f w %.2f %.2f m %.2f %.2f l S' % (width, x1, self.height - y1, x2, self.height - y2))
+
+    def content(self):
+        return b'\n'.join(self._ops)
+
+
+def render(pages, title=''):
+    """Yield the PDF for an iterable of `Page` objects as byte chunks.
+
+    The header and shared resources come first, then one chunk per page,
+    then the trailer. An empty iterable still produces a valid document
+    with a single blank page.
+    """
+    offsets = {}
+    position = 0
+
+    def obj(number, body):
+        nonlocal position
+        offsets[number] = position
+        data = b'%d 0 obj\n%s\nendobj\n' % (number, body)
+        position += len(data)
+        return data
+
+    def emit(data):
+        nonlocal position
+        position += len(data)
+        return data
+
+    head = [emit(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')]
+    head.append(obj(_CATALOG, b'<< /Type /Catalog /Pages %d 0 R >>' % _PAGES))
+    fonts = b' '.join(b'/%s %d 0 R' % (name.encode(), _FIRST_FONT + i) for i, (name, _) in enumerate(FONTS))
+    head.append(obj(_RESOURCES, b'<< /Font << %s >> >>' % fonts))
+    head.append(obj(_INFO, b'<< /Title %s /Producer (Barangay RMS) >>' % _string(title)))
+    for i, (_, base_font) in enumerate(FONTS):
+        head.append(obj(_FIRST_FONT + i, (
+            b'<< /Type /Font /Subtype /Type1 /BaseFont /%s /Encoding /WinAnsiEncoding >>' % base_font.encode()
+        )))
+    yield b''.join(head)
+
+    kids = []
+
+    def page_chunk(page):
+        number = _FIRST_PAGE + 2 * len(kids)
+        content = zlib.compress(page.content())
+        chunk = obj(number, b'<< /Length %d /Filter /FlateDecode >>\nstream\n%s\nendstream' % (len(content), content))
+        chunk += obj(number + 1, (
+            b'<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %d %d] /Resources %d 0 R /Contents %d 0 R >>'
+            % (_PAGES, page.width, page.height, _RESOURCES, number)
+        ))
+        kids.append(number + 1)
+        return chunk
+
+    for page in pages:
+        yield page_chunk(page)
+    if not kids:
+        yield page_chunk(Page())
+
+    tail = [obj(_PAGES, b'<< /Type /Pages /Kids [%s] /Count %d >>' % (
+        b' '.join(b'%d 0 R' % kid for kid in kids), len(kids),
+    ))]
+    xref_at = position
+    size = kids[-1] + 1
+    tail.append(b'xref\n0 %d\n0000000000 65535 f \n' % size)
+    tail.extend(b'%010d 00000 n \n' % offsets[n] for n in range(1, size))
+    tail.append(b'trailer\n<< /Size %d /Root %d 0 R /Info %d 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (
+        size, _CATALOG, _INFO, xref_at,
+    ))
+    yield b''.join(tail)
@@ -0,0 +1,311 @@
+"""On-demand profiling of single requests.
+
+An admin (permission 'system.maintain') adds ``X-Profile: 1`` or
+``?_profile=1`` to a request, and that request is run under a profiler.
+Nothing is redeployed and other requests are unaffected: without the
+trigger the only cost is one header/argument lookup.
+
+``PROFILER_ENGINE`` picks the profiler:
+
+- 'cprofile': deterministic; the download is a ``.prof`` file for
+  ``python -m pstats`` or snakeviz.
+- 'pyinstrument': statistical sampling, with far less overhead on deep
+  call stacks. Needs the `pyinstrument` package; the download is its
+  interactive HTML report.
+- 'auto' (default): pyinstrument when installed, else cProfile.
+
+Every SQL statement the request executes is logged with its parameters
+and duration. The profile, the statement log and a text summary are
+written to ``PROFILER_DIR`` (default ``instance/profiles``), so every
+worker adds to the same set and profiles survive restarts. Only the
+newest ``PROFILER_MAX_PROFILES`` are kept. They are listed at
+/admin/profiles (app/routes/profiles.py), and the response of a profiled
+request carries its id and URL in ``X-Profile-Id`` and ``X-Profile-Url``.
+"""
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import secrets
+import time
+from contextvars import ContextVar
+from datetime import datetime
+
+from flask import g, request, url_for
+from flask_login import current_user
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+PERMISSION = 'system.maintain'
+
+# Statements of the request being profiled, or None when it is not
+_sql_log = ContextVar('profiler_sql_log', default=None)
+
+_events_registered = False
+
+
+def _short_repr(value, limit=200):
+    text = repr(value)
+    return text if len(text) <= limit else text[:limit] + '...'
+
+
+class _CProfileEngine:
+    name = 'cprofile'
+    extension = '.prof'
+
+    def __init__(self):
+        self._profile = cProfile.Profile()
+
+    def start(self):
+        self._profile.enable()
+
+    def stop(self):
+        self._profile.disable()
+
+    def write(self, path):
+        stats = pstats.Stats(self._profile)
+        stats.dump_stats(path)
+        out = io.StringIO()
+        stats.stream = out
+        stats.sort_stats('cumulative').print_stats(60)
+        return out.getvalue()
+
+
+class _PyinstrumentEngine:
+    name = 'pyinstrument'
+    extension = '.html'
+
+    def __init__(self, interval):
+        from pyinstrument import Profiler
+        self._profiler = Profiler(interval=interval)
+
+    def start(self):
+        self._profiler.start()
+
+    def stop(self):
+        self._profiler.stop()
+
+    def write(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(self._profiler.output_html())
+        return self._profiler.output_text(unicode=True, color=False, show_all=False)
+
+
+def _pyinstrument_installed():
+    try:
+        import pyinstrument  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class RequestProfiler:
+    """Flask extension: profiles requests that ask for it."""
+
+    def __init__(self, app=None):
+        self.directory = None
+        self.engine = 'cprofile'
+        self.max_profiles = 50
+        self.max_statements = 1000
+        self.interval = 0.001
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('PROFILER_ENABLED', True)
+        app.config.setdefault('PROFILER_ENGINE', 'auto')
+        app.config.setdefault('PROFILER_DIR', None)
+        app.config.setdefault('PROFILER_MAX_PROFILES', 50)
+        app.config.setdefault('PROFILER_MAX_STATEMENTS', 1000)
+        app.config.setdefault('PROFILER_SAMPLE_INTERVAL', 0.001)
+        if not app.config['PROFILER_ENABLED']:
+            return
+
+        engine = app.config['PROFILER_ENGINE']
+        if engine == 'auto':
+            engine = 'pyinstrument' if _pyinstrument_installed() else 'cprofile'
+        elif engine == 'pyinstrument' and not _pyinstrument_installed():
+            raise RuntimeError("PROFILER_ENGINE is 'pyinstrument' but the pyinstrument package is not installed")
+        elif engine != 'cprofile' and engine != 'pyinstrument':
+            raise ValueError(f'Unknown PROFILER_ENGINE {engine!r}')
+        self.engine = engine
+        self.directory = app.config['PROFILER_DIR'] or os.path.join(app.instance_path, 'profiles')
+        self.max_profiles = app.config['PROFILER_MAX_PROFILES']
+        self.max_statements = app.config['PROFILER_MAX_STATEMENTS']
+        self.interval = app.config['PROFILER_SAMPLE_INTERVAL']
+        os.makedirs(self.directory, exist_ok=True)
+
+        app.before_request(self._start)
+        app.after_request(self._finish)
+        app.teardown_request(self._teardown)
+        app.extensions['profiler'] = self
+        _register_sql_events()
+
+    # -- request hooks -------------------------------------------------------
+
+    def _requested(self):
+        if not (request.headers.get('X-Profile') or request.args.get('_profile')):
+            return False
+        # The profile pages themselves are never profiled
+        if request.blueprint == 'profiles':
+            return False
+        return current_user.is_authenticated and PERMISSION in getattr(current_user, 'permissions', ())
+
+    def _start(self):
+        if not self._requested():
+            return
+        engine = _PyinstrumentEngine(self.interval) if self.engine == 'pyinstrument' else _CProfileEngine()
+        try:
+            engine.start()
+        except (RuntimeError, ValueError):
+            # e.g. another profiler is already active in this thread
+            logger.warning('Could not start the request profiler', exc_info=True)
+            return
+        statements = []
+        _sql_log.set(statements)
+        g._profile = {
+            'engine': engine,
+            'sql': statements,
+            'started': time.perf_counter(),
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+        }
+
+    def _finish(self, response):
+        state = g.pop('_profile', None)
+        if state is not None:
+            profile_id = self._save(state, response.status_code)
+            if profile_id:
+                response.headers['X-Profile-Id'] = profile_id
+                response.headers['X-Profile-Url'] = url_for('profiles.detail', profile_id=profile_id)
+        return response
+
+    def _teardown(self, exc):
+        # Reached with the profile still running when the view raised
+        state = g.pop('_profile', None)
+        if state is not None:
+            self._save(state, 500, error=repr(exc) if exc else None)
+
+    def _save(self, state, status, error=None):
+        engine = state['engine']
+        engine.stop()
+        duration = time.perf_counter() - state['started']
+        _sql_log.set(None)
+        profile_id = f"{datetime.now():%Y%m%d-%H%M%S-%f}-{secrets.token_hex(2)}"
+        try:
+            summary = engine.write(os.path.join(self.directory, profile_id + engine.extension))
+            statements = state['sql']
+            meta = {
+                'id': profile_id,
+                'created_at': state['created_at'],
+                'method': request.method,
+                'path': request.full_path.rstrip('?'),
+                'endpoint': request.endpoint,
+                'user': getattr(current_user, 'username', None),
+                'status': status,
+                'error': error,
+                'duration_ms': round(duration * 1000, 2),
+                'engine': engine.name,
+                'download': profile_id + engine.extension,
+                'sql_count': len(statements),
+                'sql_ms': round(sum(s['duration_ms'] for s in statements), 2),
+                'sql_truncated': len(statements) >= self.max_statements,
+                'sql': statements,
+                'summary': summary,
+            }
+            with open(os.path.join(self.directory, profile_id + '.json'), 'w', encoding='utf-8') as f:
+                json.dump(meta, f)
+            self._prune()
+        except OSError:
+            logger.exception('Could not save request profile %s', profile_id)
+            return None
+        logger.info('Profiled %s %s as %s (%.1f ms)', request.method, request.path, profile_id, meta['duration_ms'])
+        return profile_id
+
+    # -- storage -------------------------------------------------------------
+
+    def _prune(self):
+        """Delete all but the newest `max_profiles` profiles."""
+        ids = sorted(name[:-5] for name in os.listdir(self.directory) if name.endswith('.json'))
+        for profile_id in ids[:-self.max_profiles]:
+            for name in os.listdir(self.directory):
+                if name.startswith(profile_id + '.'):
+                    try:
+                        os.remove(os.path.join(self.directory, name))
+                    except FileNotFoundError:
+                        pass  # pruned by another worker
+
+    def _path(self, profile_id, extension):
+        # Ids are generated here; anything else could be a path traversal
+        if not profile_id.replace('-', '').isalnum():
+            return None
+        path = os.path.join(self.directory, profile_id + extension)
+        return path if os.path.exists(path) else None
+
+    def list(self):
+        """Metadata of the stored profiles, newest first, without statements."""
+        profiles = []
+        for name in sorted(os.listdir(self.directory), reverse=True):
+            if not name.endswith('.json'):
+                continue
+            meta = self.get(name[:-5])
+            if meta is not None:
+                meta.pop('sql', None)
+                meta.pop('summary', None)
+                profiles.append(meta)
+        return profiles
+
+    def get(self, profile_id):
+        """One profile's metadata, statement log and summary, or None."""
+        path = self._path(profile_id, '.json')
+        if path is None:
+            return None
+        try:
+            with open(path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def download_path(self, profile_id):
+        """Path of the profile's .prof or .html file, or None."""
+        meta = self.get(profile_id)
+        return meta and self._path(profile_id, os.path.splitext(meta['download'])[1])
+
+
+profiler = RequestProfiler()
+
+
+# -- SQL statement log -------------------------------------------------------
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _sql_log.get() is not None:
+        conn.info.setdefault('profiler_started', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    log = _sql_log.get()
+    if log is None:
+        return
+    starts = conn.info.get('profiler_started')
+    if not starts:
+        return
+    duration = time.perf_counter() - starts.pop()
+    if len(log) < profiler.max_statements:
+        log.append({
+            'statement': statement,
+            'params': _short_repr(parameters),
+            'executemany': executemany,
+            'duration_ms': round(duration * 1000, 3),
+        })
+
+
+def _register_sql_events():
+    global _events_registered
+    if _events_registered:
+        return
+    event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+    _events_registered = True
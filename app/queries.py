@@ -0,0 +1,183 @@
+"""Repository of the hot read queries, cached as lambda statements.
+
+The dashboard, the search API and the resident listing run the same few
+SELECTs on every request. Built through the ORM each time, a statement
+costs more Python than the database needs to answer it: the expression
+is constructed, its cache key computed and, for ``Model.query.count()``,
+wrapped in a subquery. Here each one is a `lambda_stmt`. SQLAlchemy
+analyses a lambda once per code location. After that a call only pulls
+the closed-over values out as bound parameters and finds the compiled
+SQL in the engine's compiled cache.
+
+Optional filters are appended with ``stmt += lambda s: ...``, so each
+combination of filters gets its own cache entry. Closed-over values must
+be plain parameters (dates, strings, ints); anything that changes the
+shape of the SQL belongs in the Python control flow around the lambdas.
+
+`CacheStats` counts compiled-cache hits and misses on an engine. The
+benchmark suite reports the hit rate per scenario.
+"""
+from datetime import timedelta
+
+from sqlalchemy import event, func, lambda_stmt, select
+from sqlalchemy.engine.default import CACHE_HIT, CACHE_MISS
+
+from app import db
+from app.models import Blotter, Clearance, Hearing, Household, Resident, ResidentDirectory
+from app.services.hearings import ACTIVE_STATUSES
+
+
+# -- dashboard ----------------------------------------------------------------
+
+def dashboard_counts(now):
+    """Every figure on the dashboard, in one statement of indexed subqueries.
+
+    Returns a row with labelled columns: total_residents,
+    new_residents_week, residents_added (this month), total_households,
+    new_households_week, households_added, active_blotters,
+    blotters_due_today, blotters_resolved, clearances_issued_month (last
+    30 days), clearances_issued (this month), pending_clearances and
+    processed_today.
+    """
+    week_ago = now - timedelta(days=7)
+    month_ago = now - timedelta(days=30)
+    month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    tomorrow_start = today_start + timedelta(days=1)
+    return db.session.execute(lambda_stmt(lambda: select(
+        select(func.count()).select_from(Resident).scalar_subquery().label('total_residents'),
+        select(func.count()).where(Resident.created_at >= week_ago)
+        .scalar_subquery().label('new_residents_week'),
+        select(func.count()).where(Resident.created_at >= month_start)
+        .scalar_subquery().label('residents_added'),
+        select(func.count()).select_from(Household).scalar_subquery().label('total_households'),
+        select(func.count()).where(Household.created_at >= week_ago)
+        .scalar_subquery().label('new_households_week'),
+        select(func.count()).where(Household.created_at >= month_start)
+        .scalar_subquery().label('households_added'),
+        select(func.count()).where(Blotter.status == 'Open')
+        .scalar_subquery().label('active_blotters'),
+        select(func.count(func.distinct(Hearing.blotter_id))).where(
+            Hearing.status.in_(ACTIVE_STATUSES),
+            Hearing.starts_at >= today_start,
+            Hearing.starts_at < tomorrow_start,
+        ).scalar_subquery().label('blotters_due_today'),
+        select(func.count()).where(Blotter.status == 'Resolved', Blotter.reported_at >= month_start)
+        .scalar_subquery().label('blotters_resolved'),
+        select(func.count()).where(Clearance.status == 'Issued', Clearance.issued_at >= month_ago)
+        .scalar_subquery().label('clearances_issued_month'),
+        select(func.count()).where(Clearance.status == 'Issued', Clearance.issued_at >= month_start)
+        .scalar_subquery().label('clearances_issued'),
+        select(func.count()).where(Clearance.status == 'Pending')
+        .scalar_subquery().label('pending_clearances'),
+        select(func.count()).where(
+            Clearance.status == 'Issued',
+            Clearance.issued_at >= today_start,
+            Clearance.issued_at < tomorrow_start,
+        ).scalar_subquery().label('processed_today'),
+    ))).one()
+
+
+def recent_residents(limit=5):
+    """The most recently added residents."""
+    return db.session.execute(lambda_stmt(lambda: (
+        select(Resident.id, Resident.first_name, Resident.last_name, Resident.address,
+               Resident.birth_date, Resident.status)
+        .order_by(Resident.created_at.desc())
+        .limit(limit)
+    ))).all()
+
+
+def open_blotters(limit=5):
+    """The latest open blotter cases, with the reporter's name (None if unset)."""
+    return db.session.execute(lambda_stmt(lambda: (
+        select(Blotter.id, Blotter.case_title, Blotter.location, Blotter.hearing_date,
+               Blotter.reported_by_id, Resident.first_name, Resident.last_name)
+        .outerjoin(Resident, Blotter.reported_by_id == Resident.id)
+        .where(Blotter.status == 'Open')
+        .order_by(Blotter.reported_at.desc())
+        .limit(limit)
+    ))).all()
+
+
+# -- search -------------------------------------------------------------------
+
+def search_residents(q, limit=5):
+    """Residents whose first name, last name or address contains `q`."""
+    pattern = f'%{q}%'
+    return db.session.execute(lambda_stmt(lambda: (
+        select(Resident.id, Resident.first_name, Resident.last_name, Resident.address)
+        .where(Resident.first_name.ilike(pattern)
+               | Resident.last_name.ilike(pattern)
+               | Resident.address.ilike(pattern))
+        .limit(limit)
+    ))).all()
+
+
+# -- resident directory -------------------------------------------------------
+
+def _directory_filters(stmt, q, purok, status):
+    if q:
+        pattern = f'%{q}%'
+        stmt += lambda s: s.where(
+            ResidentDirectory.first_name.ilike(pattern) | ResidentDirectory.last_name.ilike(pattern)
+        )
+    if purok:
+        stmt += lambda s: s.where(ResidentDirectory.purok == purok)
+    if status:
+        stmt += lambda s: s.where(ResidentDirectory.status == status)
+    return stmt
+
+
+def directory_page(q, purok, status, limit, offset):
+    """One page of directory rows ordered by name."""
+    d = ResidentDirectory
+    stmt = lambda_stmt(lambda: select(
+        d.resident_id, d.first_name, d.last_name, d.birth_date, d.purok, d.household_id, d.is_head, d.status,
+    ))
+    stmt = _directory_filters(stmt, q, purok, status)
+    stmt += lambda s: s.order_by(d.last_name, d.first_name, d.resident_id).limit(limit).offset(offset)
+    return db.session.execute(stmt).all()
+
+
+def directory_count(q, purok, status):
+    """Number of directory rows matching the filters."""
+    stmt = lambda_stmt(lambda: select(func.count()).select_from(ResidentDirectory))
+    return db.session.execute(_directory_filters(stmt, q, purok, status)).scalar_one()
+
+
+# -- cache statistics ---------------------------------------------------------
+
+class CacheStats:
+    """Counts statements run on `engine` by how their compiled form was found.
+
+    `hits` were served from the compiled cache, `misses` were compiled
+    and cached, and `uncached` could not be cached at all (raw SQL, or
+    statements without a cache key).
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.hits = self.misses = self.uncached = 0
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        hit = getattr(context, 'cache_hit', None)
+        if hit is CACHE_HIT:
+            self.hits += 1
+        elif hit is CACHE_MISS:
+            self.misses += 1
+        else:
+            self.uncached += 1
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses + self.uncached
+        return self.hits / total if total else None
+
+    def __enter__(self):
+        self.hits = self.misses = self.uncached = 0
+        event.listen(self.engine, 'after_cursor_execute', self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, 'after_cursor_execute', self._on_execute)
@@ -0,0 +1,194 @@
+"""Sliding-window rate limiting for the login form.
+
+Each key (``ip:<addr>`` or ``user:<name>``) keeps a log of attempt times.
+A key is limited once it has `limit` attempts within the last `window`
+seconds; the limit lifts as the oldest attempts age out of the window.
+The check runs before the password is hashed, so a brute-force attempt
+is rejected without spending any hashing CPU.
+
+Two backends are provided: an in-memory log (per worker process) and a
+database-backed log in the ``login_attempts`` table that is shared by all
+workers. Keys that are never tried again would stay in either log, so at
+most once per window each process sweeps out every expired attempt.
+"""
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, func, insert, select
+
+from app import db
+
+
+class MemoryBackend:
+    """Per-process attempt log. Fast, but each worker counts separately."""
+
+    def __init__(self):
+        self._log = {}
+        self._lock = threading.Lock()
+        self._swept_at = time.time()
+
+    def add(self, key, window):
+        now = time.time()
+        with self._lock:
+            if now - self._swept_at >= window:
+                self._sweep(now - window)
+                self._swept_at = now
+            log = self._log.setdefault(key, deque())
+            self._trim(log, now - window)
+            log.append(now)
+
+    def stats(self, key, window):
+        """Return ``(attempts in window, seconds until the oldest expires)``."""
+        now = time.time()
+        with self._lock:
+            log = self._log.get(key)
+            if not log:
+                return 0, 0
+            self._trim(log, now - window)
+            if not log:
+                del self._log[key]
+                return 0, 0
+            return len(log), log[0] + window - now
+
+    def reset(self, key):
+        with self._lock:
+            self._log.pop(key, None)
+
+    def _sweep(self, cutoff):
+        """Drop the keys whose attempts are all older than `cutoff`."""
+        for key in [k for k, log in self._log.items() if not log or log[-1] <= cutoff]:
+            del self._log[key]
+
+    @staticmethod
+    def _trim(log, cutoff):
+        while log and log[0] <= cutoff:
+            log.popleft()
+
+
+class DatabaseBackend:
+    """Attempt log stored in ``login_attempts``, shared across workers.
+
+    Uses its own connection so that counting attempts never commits or
+    rolls back the request's session.
+    """
+
+    def __init__(self):
+        self._pruned_at = time.monotonic()
+
+    def add(self, key, window):
+        from .models import LoginAttempt
+
+        now = datetime.utcnow()
+        cutoff = now - timedelta(seconds=window)
+        prune_all = time.monotonic() - self._pruned_at >= window
+        with db.engine.begin() as conn:
+            if prune_all:
+                conn.execute(delete(LoginAttempt).where(LoginAttempt.attempted_at <= cutoff))
+            else:
+                conn.execute(delete(LoginAttempt).where(LoginAttempt.key == key, LoginAttempt.attempted_at <= cutoff))
+            conn.execute(insert(LoginAttempt).values(key=key, attempted_at=now))
+        if prune_all:
+            self._pruned_at = time.monotonic()
+
+    def stats(self, key, window):
+        from .models import LoginAttempt
+
+        now = datetime.utcnow()
+        with db.engine.connect() as conn:
+            count, oldest = conn.execute(
+                select(func.count(), func.min(LoginAttempt.attempted_at)).where(
+                    LoginAttempt.key == key,
+                    LoginAttempt.attempted_at > now - timedelta(seconds=window),
+                )
+            ).one()
+        if not count:
+            return 0, 0
+        return count, (oldest + timedelta(seconds=window) - now).total_seconds()
+
+    def reset(self, key):
+        from .models import LoginAttempt
+
+        with db.engine.begin() as conn:
+            conn.execute(delete(LoginAttempt).where(LoginAttempt.key == key))
+
+
+BACKENDS = {
+    'memory': MemoryBackend,
+    'database': DatabaseBackend,
+}
+
+
+class SlidingWindowLimiter:
+    def __init__(self, backend, limit, window):
+        self.backend = backend
+        self.limit = limit
+        self.window = window
+
+    def retry_after(self, key):
+        """Seconds until `key` may try again, or 0 if it is not limited."""
+        count, expires_in = self.backend.stats(key, self.window)
+        if count < self.limit:
+            return 0
+        return max(1, int(expires_in + 0.999))
+
+    def hit(self, key):
+        self.backend.add(key, self.window)
+
+    def reset(self, key):
+        self.backend.reset(key)
+
+
+class LoginThrottle:
+    """Flask extension limiting login attempts per client IP and per username.
+
+    Every attempt counts against the IP; only failed attempts count against
+    the username, and a successful login clears that username's log.
+    """
+
+    def __init__(self, app=None):
+        self.enabled = True
+        self.per_ip = None
+        self.per_username = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('LOGIN_RATE_LIMIT_ENABLED', True)
+        app.config.setdefault('LOGIN_RATE_LIMIT_BACKEND', 'memory')
+        app.config.setdefault('LOGIN_RATE_LIMIT_WINDOW', 300)
+        app.config.setdefault('LOGIN_MAX_ATTEMPTS_PER_IP', 30)
+        app.config.setdefault('LOGIN_MAX_FAILURES_PER_USERNAME', 5)
+
+        backend_name = app.config['LOGIN_RATE_LIMIT_BACKEND']
+        if backend_name not in BACKENDS:
+            raise ValueError(f'Unknown LOGIN_RATE_LIMIT_BACKEND {backend_name!r}')
+        backend = BACKENDS[backend_name]()
+        window = app.config['LOGIN_RATE_LIMIT_WINDOW']
+        self.enabled = app.config['LOGIN_RATE_LIMIT_ENABLED']
+        self.per_ip = SlidingWindowLimiter(backend, app.config['LOGIN_MAX_ATTEMPTS_PER_IP'], window)
+        self.per_username = SlidingWindowLimiter(backend, app.config['LOGIN_MAX_FAILURES_PER_USERNAME'], window)
+        app.extensions['login_throttle'] = self
+
+    def check(self, ip, username):
+        """Record an attempt from `ip` and return the seconds to wait, or 0."""
+        if not self.enabled:
+            return 0
+        ip_key, user_key = f'ip:{ip}', f'user:{username.lower()}'
+        wait = max(self.per_ip.retry_after(ip_key), self.per_username.retry_after(user_key))
+        if wait:
+            return wait
+        self.per_ip.hit(ip_key)
+        return 0
+
+    def record_failure(self, username):
+        if self.enabled:
+            self.per_username.hit(f'user:{username.lower()}')
+
+    def reset(self, username):
+        if self.enabled:
+            self.per_username.reset(f'user:{username.lower()}')
+
+
+login_throttle = LoginThrottle()
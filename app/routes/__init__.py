@@ -7,6 +7,10 @@ from .blotter import blotter
 from .clearances import clearances
 from .officials import officials
 from .reports import reports
+from .sync import sync
+from .audit import audit
+from .verify import verify
+from .profiles import profiles
 
 def init_app(app):
     app.register_blueprint(auth)
@@ -17,3 +21,7 @@ def init_app(app):
     app.register_blueprint(clearances)
     app.register_blueprint(officials)
     app.register_blueprint(reports)
+    app.register_blueprint(sync)
+    app.register_blueprint(audit)
+    app.register_blueprint(verify)
+    app.register_blueprint(profiles)
@@ -0,0 +1,87 @@
+from datetime import datetime, timedelta
+from flask import Blueprint, request, jsonify
+from sqlalchemy import and_, or_, select
+from app import db
+from app.audit import audit as audit_writer
+from app.authz import permission_required
+from app.models import AuditLog
+
+audit = Blueprint('audit', __name__)
+
+
+def _parse_date(value):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d') if value else None
+    except ValueError:
+        return None
+
+
+@audit.route('/api/audit')
+@permission_required('audit.view')
+def api_audit():
+    """Change history, newest first.
+
+    Filter by record (``entity`` and ``record_id``) and/or by ``user_id``,
+    optionally within ``from``/``to`` (YYYY-MM-DD, inclusive). Page with
+    ``limit`` and the ``next`` cursor from the previous response.
+    """
+    entity = request.args.get('entity') or None
+    record_id = request.args.get('record_id', type=int)
+    user_id = request.args.get('user_id', type=int)
+    if record_id is not None and not entity:
+        return jsonify({'error': 'entity is required with record_id'}), 400
+    if not entity and user_id is None:
+        return jsonify({'error': 'Filter by entity/record_id or user_id'}), 400
+
+    stmt = select(AuditLog).order_by(AuditLog.occurred_at.desc(), AuditLog.id.desc())
+    if entity:
+        stmt = stmt.where(AuditLog.entity == entity)
+    if record_id is not None:
+        stmt = stmt.where(AuditLog.record_id == record_id)
+    if user_id is not None:
+        stmt = stmt.where(AuditLog.user_id == user_id)
+
+    # Date bounds on occurred_at let PostgreSQL skip whole monthly partitions
+    for param in ('from', 'to'):
+        value = request.args.get(param)
+        day = _parse_date(value)
+        if value and day is None:
+            return jsonify({'error': f'Invalid {param} date'}), 400
+        if day and param == 'from':
+            stmt = stmt.where(AuditLog.occurred_at >= day)
+        elif day:
+            stmt = stmt.where(AuditLog.occurred_at < day + timedelta(days=1))
+
+    cursor = request.args.get('next')
+    if cursor:
+        try:
+            occurred_at, last_id = cursor.rsplit('_', 1)
+            occurred_at, last_id = datetime.fromisoformat(occurred_at), int(last_id)
+        except ValueError:
+            return jsonify({'error': 'Invalid cursor'}), 400
+        stmt = stmt.where(or_(
+            AuditLog.occurred_at < occurred_at,
+            and_(AuditLog.occurred_at == occurred_at, AuditLog.id < last_id),
+        ))
+
+    limit = min(max(request.args.get('limit', 50, type=int), 1), 200)
+    # Include entries still waiting in this process's buffer
+    audit_writer.flush()
+    entries = db.session.scalars(stmt.limit(limit + 1)).all()
+    more = len(entries) > limit
+    entries = entries[:limit]
+    return jsonify({
+        'entries': [
+            {
+                'id': e.id,
+                'occurred_at': e.occurred_at.isoformat(),
+                'user_id': e.user_id,
+                'username': e.username,
+                'action': e.action,
+                'entity': e.entity,
+                'record_id': e.record_id,
+                'changes': e.changes,
+            } for e in entries
+        ],
+        'next': f'{entries[-1].occurred_at.isoformat()}_{entries[-1].id}' if more else None,
+    })
@@ -2,6 +2,7 @@ from flask import Blueprint, render_template, redirect, url_for, flash, request
 from app.forms import LoginForm, RegisterForm
 from app.models import User
 from app import db
+from app.ratelimit import login_throttle
 from flask_login import login_user, logout_user, login_required, current_user
 
 auth = Blueprint('auth', __name__)
@@ -13,11 +14,26 @@ def login():
 
     form = LoginForm()
     if form.validate_on_submit():
-        user = User.query.filter_by(username=form.username.data).first()
+        username = form.username.data
+        # Throttle before hashing so brute-force attempts cost no CPU
+        retry_after = login_throttle.check(request.remote_addr, username)
+        if retry_after:
+            minutes = (retry_after + 59) // 60
+            flash(f'Too many login attempts. Please try again in {minutes} minute(s).', 'error')
+            return render_template('login.html', form=form), 429, {'Retry-After': str(retry_after)}
+
+        user = User.query.filter_by(username=username).first()
         if user is None or not user.check_password(form.password.data):
+            login_throttle.record_failure(username)
             flash('Invalid username or password.', 'error')
             return redirect(url_for('auth.login'))
-        
+        login_throttle.reset(username)
+
+        # Upgrade hashes made with an older method or cost
+        if user.password_needs_rehash():
+            user.set_password(form.password.data)
+            db.session.commit()
+
         login_user(user, remember=True)
         
         # Redirect to the next page if it exists, otherwise to the dashboard
@@ -1,9 +1,186 @@
-from flask import Blueprint, render_template
+from datetime import datetime, timedelta
+from flask import Blueprint, render_template, request, jsonify
 from flask_login import login_required
+from app.authz import permission_required
+from app.models import Blotter, Hearing
+from app.services import blotter_search
+from app.services import hearings as hearing_service
 
 blotter = Blueprint('blotter', __name__)
 
+
+def _parse_datetime(value):
+    try:
+        return datetime.fromisoformat(value) if value else None
+    except ValueError:
+        return None
+
+
+def _hearing_json(h):
+    return {
+        'id': h.id,
+        'blotter_id': h.blotter_id,
+        'starts_at': h.starts_at.isoformat(),
+        'ends_at': h.ends_at.isoformat(),
+        'venue': h.venue,
+        'status': h.status,
+        'official_id': h.official_id,
+    }
+
+
 @blotter.route('/blotter')
 @login_required
 def index():
     return render_template('blotter.html')
+
+
+@blotter.route('/api/blotters/search')
+@login_required
+def api_search_blotters():
+    """Ranked search. Params: q, status, case_type, from, to (YYYY-MM-DD, inclusive), limit, offset."""
+    q = request.args.get('q', '').strip()
+    if len(q) < 2:
+        return jsonify({'error': 'Search text must be at least 2 characters'}), 400
+    dates = {}
+    for param in ('from', 'to'):
+        value = request.args.get(param)
+        dates[param] = _parse_datetime(value)
+        if value and dates[param] is None:
+            return jsonify({'error': f'Invalid {param} date'}), 400
+    limit = min(max(request.args.get('limit', 20, type=int), 1), 50)
+    offset = max(request.args.get('offset', 0, type=int), 0)
+
+    results = blotter_search.search(
+        q,
+        status=request.args.get('status') or None,
+        case_type=request.args.get('case_type') or None,
+        date_from=dates['from'],
+        date_to=dates['to'],
+        limit=limit + 1,
+        offset=offset,
+    )
+    return jsonify({
+        'results': [
+            {
+                'id': r.id,
+                'case_title': r.case_title,
+                'case_type': r.case_type,
+                'status': r.status,
+                'reported_at': r.reported_at.isoformat(),
+                'respondent_name': r.respondent_name,
+                'location': r.location,
+                'rank': r.rank,
+                'snippet': r.snippet,
+            } for r in results[:limit]
+        ],
+        'has_more': len(results) > limit,
+    })
+
+
+@blotter.route('/api/hearings')
+@login_required
+def api_calendar():
+    """Hearings between ``start`` and ``end`` (ISO dates, end exclusive)."""
+    start = _parse_datetime(request.args.get('start'))
+    end = _parse_datetime(request.args.get('end'))
+    if start is None or end is None or end <= start:
+        return jsonify({'error': 'Valid start and end dates are required'}), 400
+    if end - start > timedelta(days=92):
+        return jsonify({'error': 'Date range may not exceed 92 days'}), 400
+
+    rows = hearing_service.calendar(
+        start, end,
+        official_id=request.args.get('official_id', type=int),
+        venue=request.args.get('venue') or None,
+        include_cancelled=request.args.get('include_cancelled') == '1',
+    )
+    return jsonify([
+        {
+            'id': r.id,
+            'blotter_id': r.blotter_id,
+            'case_title': r.case_title,
+            'case_status': r.case_status,
+            'starts_at': r.starts_at.isoformat(),
+            'ends_at': r.ends_at.isoformat(),
+            'venue': r.venue,
+            'status': r.status,
+            'official': {
+                'id': r.official_id,
+                'name': f'{r.official_first_name} {r.official_last_name}',
+            } if r.official_id else None,
+        } for r in rows
+    ])
+
+
+@blotter.route('/api/hearings/free-slots')
+@login_required
+def api_free_slots():
+    """Free start times on ``date`` for an official and/or venue."""
+    day = _parse_datetime(request.args.get('date'))
+    duration = request.args.get('duration', 60, type=int)
+    official_id = request.args.get('official_id', type=int)
+    venue = request.args.get('venue') or None
+    if day is None:
+        return jsonify({'error': 'A valid date is required'}), 400
+    if official_id is None and not venue:
+        return jsonify({'error': 'official_id or venue is required'}), 400
+    if not 0 < duration <= hearing_service.MAX_HEARING_DURATION.seconds // 60:
+        return jsonify({'error': 'Invalid duration'}), 400
+
+    slots = hearing_service.free_slots(day.date(), timedelta(minutes=duration), official_id, venue)
+    return jsonify([{'starts_at': s.starts_at.isoformat(), 'ends_at': s.ends_at.isoformat()} for s in slots])
+
+
+@blotter.route('/api/blotters/<int:blotter_id>/hearings', methods=['POST'])
+@permission_required('records.create')
+def api_schedule_hearing(blotter_id):
+    """Schedule a hearing. Body: starts_at, ends_at or duration (minutes), official_id, venue, notes."""
+    case = Blotter.query.get_or_404(blotter_id)
+    payload = request.get_json(silent=True) or {}
+    starts_at = _parse_datetime(payload.get('starts_at'))
+    ends_at = _parse_datetime(payload.get('ends_at'))
+    if starts_at is None:
+        return jsonify({'error': 'A valid hearing start time is required'}), 400
+    if ends_at is None:
+        try:
+            ends_at = starts_at + timedelta(minutes=int(payload.get('duration', 60)))
+        except (TypeError, ValueError):
+            return jsonify({'error': 'Invalid duration'}), 400
+
+    try:
+        official_id = int(payload['official_id']) if payload.get('official_id') else None
+    except (TypeError, ValueError):
+        return jsonify({'error': 'Invalid official'}), 400
+
+    try:
+        hearing = hearing_service.schedule(
+            case, starts_at, ends_at,
+            official_id=official_id,
+            venue=(payload.get('venue') or '').strip(),
+            notes=(payload.get('notes') or '').strip(),
+        )
+    except hearing_service.SchedulingError as e:
+        status = 409 if e.conflicts else 400
+        return jsonify({'error': str(e), 'conflicts': [_hearing_json(h) for h in e.conflicts]}), status
+
+    return jsonify({'success': True, 'message': 'Hearing scheduled', 'hearing': _hearing_json(hearing)}), 201
+
+
+@blotter.route('/api/hearings/<int:hearing_id>/cancel', methods=['POST'])
+@permission_required('records.edit')
+def api_cancel_hearing(hearing_id):
+    hearing = Hearing.query.get_or_404(hearing_id)
+    hearing_service.cancel(hearing)
+    return jsonify({'success': True, 'hearing': _hearing_json(hearing)})
+
+
+@blotter.route('/api/blotters/<int:blotter_id>/timeline')
+@login_required
+def api_timeline(blotter_id):
+    case = Blotter.query.get_or_404(blotter_id)
+    events = hearing_service.timeline(case)
+    for e in events:
+        for key in ('at', 'ends_at'):
+            if e.get(key):
+                e[key] = e[key].isoformat()
+    return jsonify({'id': case.id, 'case_title': case.case_title, 'status': case.status, 'events': events})
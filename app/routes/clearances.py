@@ -1,9 +1,107 @@
-from flask import Blueprint, render_template
+from flask import Blueprint, render_template, request, jsonify, abort
 from flask_login import login_required
+from app.authz import permission_required
+from app.models import clearance_reference_no
+from app.services import clearances as clearance_service
 
 clearances = Blueprint('clearances', __name__)
 
+
+def _parse_ids(values):
+    """Clearance ids from a JSON list or a comma-separated string."""
+    if isinstance(values, str):
+        values = [v for v in values.split(',') if v.strip()]
+    try:
+        return [int(v) for v in values]
+    except (TypeError, ValueError):
+        return None
+
+
 @clearances.route('/clearances')
 @login_required
 def index():
-    return render_template('clearances.html')
+    clearance_type = request.args.get('type') or None
+    queue = clearance_service.queue_rows(clearance_type=clearance_type)
+    stats = clearance_service.queue_stats()
+    return render_template(
+        'clearances.html',
+        queue=queue,
+        stats=stats,
+        clearance_type=clearance_type,
+        reference_no=clearance_reference_no,
+    )
+
+
+@clearances.route('/api/clearances/queue')
+@login_required
+def api_queue():
+    """Clearances awaiting approval or issuing, oldest request first."""
+    limit = min(request.args.get('limit', 200, type=int), 1000)
+    offset = request.args.get('offset', 0, type=int)
+    rows = clearance_service.queue_rows(
+        clearance_type=request.args.get('type') or None,
+        limit=limit,
+        offset=offset,
+    )
+    return jsonify([
+        {
+            'id': r.id,
+            'reference_no': clearance_reference_no(r.id, r.requested_at),
+            'clearance_type': r.clearance_type,
+            'purpose': r.purpose,
+            'status': r.status,
+            'requested_at': r.requested_at.isoformat(),
+            'approved_at': r.approved_at.isoformat() if r.approved_at else None,
+            'resident': {'id': r.resident_id, 'first_name': r.first_name, 'last_name': r.last_name},
+        } for r in rows
+    ])
+
+
+@clearances.route('/api/clearances/batch', methods=['POST'])
+@permission_required('clearances.issue')
+def api_batch():
+    """Approve, issue or revoke many clearances at once.
+
+    Body: ``{"action": "approve" | "issue" | "revoke", "ids": [1, 2, ...]}``.
+    """
+    payload = request.get_json(silent=True) or {}
+    action = payload.get('action')
+    ids = _parse_ids(payload.get('ids') or [])
+    if action not in clearance_service.TRANSITIONS:
+        return jsonify({'error': 'Action must be "approve", "issue" or "revoke"'}), 400
+    if not ids:
+        return jsonify({'error': 'At least one clearance id is required'}), 400
+    try:
+        updated, stamped_at = clearance_service.batch_transition(ids, action)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({
+        'success': True,
+        'action': action,
+        'updated': updated,
+        'skipped': sorted(set(ids) - set(updated)),
+        'timestamp': stamped_at.isoformat(),
+    })
+
+
+@clearances.route('/clearances/<int:clearance_id>/document')
+@login_required
+def document(clearance_id):
+    """Printable document for one issued clearance."""
+    documents, _ = clearance_service.render_documents([clearance_id])
+    if not documents:
+        abort(404)
+    return render_template('clearance_print.html', documents=documents, missing=[])
+
+
+@clearances.route('/clearances/print')
+@login_required
+def print_batch():
+    """Printable documents for ``?ids=1,2,3``, one page per clearance."""
+    ids = _parse_ids(request.args.get('ids', ''))
+    if not ids:
+        abort(400)
+    if len(ids) > clearance_service.MAX_BATCH_SIZE:
+        abort(400)
+    documents, missing = clearance_service.render_documents(ids)
+    return render_template('clearance_print.html', documents=documents, missing=missing)
@@ -1,11 +1,18 @@
 from flask import Blueprint, render_template, jsonify, request, current_app
-from app import db
+from app import db, queries
+from app.cache import cache
 from flask_login import login_required
+from app.authz import permission_required
 from app.models import Resident, Household, Blotter, Clearance, Official
+from app.services import blotter_search
+from app.services import hearings as hearing_service
+from app.services import records as record_service
+from app.serialization import rows_response
 from datetime import datetime, timedelta
 import logging
-from sqlalchemy import func, exc
-from sqlalchemy import text
+from sqlalchemy import exc
+from sqlalchemy import select, text
+import hashlib
 import json
 import os
 from werkzeug.utils import secure_filename
@@ -14,125 +21,88 @@ dashboard = Blueprint('dashboard', __name__)
 
 logger = logging.getLogger(__name__)
 
-def get_monthly_stats():
+# Choices of the New Record form (rendered into the dashboard and served by /api/record-types)
+RECORD_TYPES = [
+    {'value': 'resident', 'label': 'New Resident'},
+    {'value': 'household', 'label': 'New Household'},
+    {'value': 'blotter', 'label': 'New Blotter Case'},
+    {'value': 'clearance', 'label': 'New Clearance Request'}
+]
+
+def get_monthly_stats(counts=None):
     """Get statistics for the current month"""
-    now = datetime.utcnow()
-    month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-    
-    monthly_stats = {
-        'residents_added': Resident.query.filter(
-            Resident.created_at >= month_start
-        ).count(),
-        'households_added': Household.query.filter(
-            Household.created_at >= month_start
-        ).count(),
-        'clearances_issued': Clearance.query.filter(
-            Clearance.status == 'Issued',
-            Clearance.issued_at >= month_start
-        ).count(),
-        'blotters_resolved': Blotter.query.filter(
-            Blotter.status == 'Resolved',
-            Blotter.reported_at >= month_start
-        ).count()
+    if counts is None:
+        counts = queries.dashboard_counts(datetime.utcnow())
+    return {
+        'residents_added': counts.residents_added,
+        'households_added': counts.households_added,
+        'clearances_issued': counts.clearances_issued,
+        'blotters_resolved': counts.blotters_resolved,
     }
-    
-    return monthly_stats
+
+
+def _recent_residents_data(rows, today):
+    return [
+        {
+            'id': r.id,
+            'first_name': r.first_name,
+            'last_name': r.last_name,
+            'address': r.address,
+            'age': (today - r.birth_date).days // 365 if r.birth_date else 'N/A',
+            'status': r.status
+        } for r in rows
+    ]
+
+
+def _open_blotters_data(rows):
+    return [
+        {
+            'id': b.id,
+            'case_title': b.case_title,
+            'location': b.location,
+            'hearing_date': b.hearing_date,
+            'reported_by': {
+                'first_name': b.first_name,
+                'last_name': b.last_name
+            } if b.reported_by_id is not None else None
+        } for b in rows
+    ]
+
+
+class _LazyCounts:
+    """The dashboard counts row, queried on first attribute access.
+
+    The stat cards and clearance panel are cached template fragments; when
+    both come from the fragment cache the query is not run at all.
+    """
+
+    def __init__(self, now):
+        self._now = now
+        self._row = None
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        if self._row is None:
+            self._row = queries.dashboard_counts(self._now)
+        return getattr(self._row, name)
+
 
 @dashboard.route('/dashboard')
 
 @login_required
 def index():
     try:
-        # Get current date and calculate date ranges
         now = datetime.utcnow()
-        week_ago = now - timedelta(days=7)
-        month_ago = now - timedelta(days=30)
-        
-        try:
-            # Query statistics
-            total_residents = Resident.query.count()
-        except Exception as e:
-            logger.error(f"Error fetching total residents: {e}")
-            total_residents = 0
-        total_households = Household.query.count()
-        
-        # Residents added this week
-        new_residents_week = Resident.query.filter(
-            Resident.created_at >= week_ago
-        ).count()
-        
-        # Households added this week
-        new_households_week = Household.query.filter(
-            Household.created_at >= week_ago
-        ).count()
-        
-        # Active blotters (Open status)
-        active_blotters = Blotter.query.filter(
-            Blotter.status == 'Open'
-        ).count()
-        
-        # Blotters due today (hearing date is today)
         today = now.date()
-        blotters_due_today = Blotter.query.filter(
-            func.date(Blotter.hearing_date) == today
-        ).count()
-        
-        # Clearances issued in last 30 days
-        clearances_issued_month = Clearance.query.filter(
-            Clearance.status == 'Issued',
-            Clearance.issued_at >= month_ago
-        ).count()
-        
-        # Recent residents (last 5 added)
-        recent_residents = Resident.query.order_by(
-            Resident.created_at.desc()
-        ).limit(5).all()
-        
-        # Open blotters (last 5)
-        open_blotters = Blotter.query.filter(
-            Blotter.status == 'Open'
-        ).order_by(Blotter.reported_at.desc()).limit(5).all()
-        
-        # Pending clearances
-        pending_clearances = Clearance.query.filter(
-            Clearance.status == 'Pending'
-        ).count()
-        
-        # Processed clearances today
-        clearances_processed_today = Clearance.query.filter(
-            Clearance.status == 'Issued',
-            func.date(Clearance.issued_at) == today
-        ).count()
-        
-        # Get monthly statistics
-        monthly_stats = get_monthly_stats()
-        
-        # Calculate age for residents
-        for resident in recent_residents:
-            if resident.birth_date:
-                age = (now.date() - resident.birth_date).days // 365
-                resident.age = age
-            else:
-                resident.age = 'N/A'
-        
-        # Prepare dashboard data
+
         dashboard_data = {
-            'stats': {
-                'total_residents': total_residents,
-                'total_households': total_households,
-                'new_residents_week': new_residents_week,
-                'new_households_week': new_households_week,
-                'active_blotters': active_blotters,
-                'blotters_due_today': blotters_due_today,
-                'clearances_issued_month': clearances_issued_month
-            },
-            'monthly_stats': monthly_stats,
-            'recent_residents': recent_residents,
-            'open_blotters': open_blotters,
-            'clearance_summary': {
-                'pending': pending_clearances,
-                'processed_today': clearances_processed_today
-            },
+            # Every count on the page comes from one cached statement (app/queries.py)
+            'stats': _LazyCounts(now),
+            'recent_residents': _recent_residents_data(queries.recent_residents(), today),
+            'open_blotters': _open_blotters_data(queries.open_blotters()),
+            'record_types': RECORD_TYPES,
+            'cache_ttl': None,
             'today': today
         }
         
@@ -150,20 +120,15 @@ def index():
                 'new_households_week': 0,
                 'active_blotters': 0,
                 'blotters_due_today': 0,
-                'clearances_issued_month': 0
-            },
-            'monthly_stats': {
-                'residents_added': 0,
-                'households_added': 0,
-                'clearances_issued': 0,
-                'blotters_resolved': 0
+                'clearances_issued_month': 0,
+                'pending_clearances': 0,
+                'processed_today': 0
             },
             'recent_residents': [],
             'open_blotters': [],
-            'clearance_summary': {
-                'pending': 0,
-                'processed_today': 0
-            },
+            'record_types': RECORD_TYPES,
+            # Placeholder zeros must not be cached as the real figures
+            'cache_ttl': 0,
             'today': datetime.utcnow().date()
         }
         
@@ -229,12 +194,13 @@ def api_dashboard_stats():
             print(f"Error counting active blotters: {e}")
             active_blotters = 0
         
-        # Blotters due today (hearing date is today)
+        # Blotters due today (a hearing is scheduled today)
         today = now.date()
+        # Compare timestamps against a range (not date(issued_at)) so indexes
+        # and partition pruning apply
+        today_start = datetime.combine(today, datetime.min.time())
         try:
-            blotters_due_today = Blotter.query.filter(
-                func.date(Blotter.hearing_date) == today
-            ).count()
+            blotters_due_today = hearing_service.due_on(today)
         except Exception as e:
             print(f"Error counting blotters due today: {e}")
             blotters_due_today = 0
@@ -251,18 +217,14 @@ def api_dashboard_stats():
         
         # Recent residents (last 5 added)
         try:
-            recent_residents = Resident.query.order_by(
-                Resident.created_at.desc()
-            ).limit(5).all()
+            recent_residents = queries.recent_residents()
         except Exception as e:
             print(f"Error fetching recent residents: {e}")
             recent_residents = []
         
-        # Open blotters (last 5)
+        # Open blotters (last 5), with the reporter's name joined in
         try:
-            open_blotters = Blotter.query.filter(
-                Blotter.status == 'Open'
-            ).order_by(Blotter.reported_at.desc()).limit(5).all()
+            open_blotters = queries.open_blotters()
         except Exception as e:
             print(f"Error fetching open blotters: {e}")
             open_blotters = []
@@ -280,20 +242,13 @@ def api_dashboard_stats():
         try:
             clearances_processed_today = Clearance.query.filter(
                 Clearance.status == 'Issued',
-                func.date(Clearance.issued_at) == today
+                Clearance.issued_at >= today_start,
+                Clearance.issued_at < today_start + timedelta(days=1)
             ).count()
         except Exception as e:
             print(f"Error counting processed clearances: {e}")
             clearances_processed_today = 0
         
-        # Calculate age for residents
-        for resident in recent_residents:
-            if resident.birth_date:
-                age = (now.date() - resident.birth_date).days // 365
-                resident.age = age
-            else:
-                resident.age = 'N/A'
-        
         # Prepare dashboard data
         dashboard_data = {
             'stats': {
@@ -305,28 +260,8 @@ def api_dashboard_stats():
                 'blotters_due_today': blotters_due_today,
                 'clearances_issued_month': clearances_issued_month
             },
-            'recent_residents': [
-                {
-                    'id': r.id,
-                    'first_name': r.first_name,
-                    'last_name': r.last_name,
-                    'address': r.address,
-                    'age': r.age,
-                    'status': r.status
-                } for r in recent_residents
-            ],
-            'open_blotters': [
-                {
-                    'id': b.id,
-                    'case_title': b.case_title,
-                    'location': b.location,
-                    'hearing_date': b.hearing_date.isoformat() if b.hearing_date else None,
-                    'reported_by': {
-                        'first_name': b.reported_by.first_name,
-                        'last_name': b.reported_by.last_name
-                    } if b.reported_by else None
-                } for b in open_blotters
-            ],
+            'recent_residents': _recent_residents_data(recent_residents, today),
+            'open_blotters': _open_blotters_data(open_blotters),
             'clearance_summary': {
                 'pending': pending_clearances,
                 'processed_today': clearances_processed_today
@@ -346,18 +281,12 @@ def api_dashboard_stats():
 @login_required
 def api_record_types():
     """API endpoint to get available record types"""
-    record_types = [
-        {'value': 'resident', 'label': 'New Resident'},
-        {'value': 'household', 'label': 'New Household'},
-        {'value': 'blotter', 'label': 'New Blotter Case'},
-        {'value': 'clearance', 'label': 'New Clearance Request'}
-    ]
-    return jsonify(record_types)
+    return jsonify(RECORD_TYPES)
 
 
 
 @dashboard.route('/api/new-record', methods=['POST'])
-@login_required
+@permission_required('records.create')
 def api_new_record():
     """API endpoint to create a new record"""
     try:
@@ -382,58 +311,67 @@ def api_new_record():
         return jsonify({'error': 'Failed to create record'}), 500
 
 
+@dashboard.route('/api/new-records', methods=['POST'])
+@permission_required('records.create')
+def api_new_records():
+    """Create several records at once.
+
+    Body: ``{"records": [{"recordType": ..., <form fields>}, ...], "partial": false}``.
+    Without ``partial`` nothing is saved unless every record is valid.
+    """
+    payload = request.get_json(silent=True) or {}
+    records = payload.get('records')
+    if not isinstance(records, list) or not records:
+        return jsonify({'error': 'A non-empty list of records is required'}), 400
+
+    try:
+        created, results = record_service.create_batch(records, partial=bool(payload.get('partial')))
+    except record_service.RecordError as e:
+        return jsonify({'error': str(e)}), e.status
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"New records error: {e}", exc_info=True)
+        return jsonify({'error': 'Failed to create records'}), 500
+
+    failed = sum(1 for result in results if not result['success'])
+    if failed and not payload.get('partial'):
+        return jsonify({'success': False, 'error': f'{failed} record(s) are invalid; nothing was saved',
+                        'results': results}), 400
+    return jsonify({
+        'success': not failed,
+        'message': f'{created} record(s) created' + (f', {failed} failed' if failed else ''),
+        'created': created,
+        'results': results,
+    }), 201 if created else 400
+
+
 @dashboard.route('/api/residents', methods=['POST'])
-@login_required
+@permission_required('records.create')
 def api_create_resident():
     return create_new_resident(request.form, request.files)
 
 def create_new_resident(form_data, files_data):
     """Create a new resident record"""
     try:
-        # Extract form data
-        first_name = form_data.get('firstName', '').strip()
-        middle_name = form_data.get('middleName', '').strip()
-        last_name = form_data.get('lastName', '').strip()
-        alias = form_data.get('alias', '').strip()
-        place_of_birth = form_data.get('placeOfBirth', '').strip()
-        birth_date_str = form_data.get('birthDate', '')
-        civil_status = form_data.get('civilStatus', '').strip()
-        purok = form_data.get('purok', '').strip()
-        voters_status = form_data.get('votersStatus', '').strip()
-        identified_as = form_data.get('identifiedAs', '').strip()
-        email = form_data.get('email', '').strip()
-        occupation = form_data.get('occupation', '').strip()
-        citizenship = form_data.get('citizenship', '').strip()
-        sex = form_data.get('sex', '')
-        address = form_data.get('address', '').strip()
-        contact_number = form_data.get('contactNumber', '').strip()
-        
-        # Validation
-        if not first_name or not last_name or not address:
-            return jsonify({'error': 'First name, last name, and address are required'}), 400
-        
-        # Parse birth date
-        birth_date = None
-        if birth_date_str:
-            try:
-                birth_date = datetime.strptime(birth_date_str, '%Y-%m-%d').date()
-            except ValueError:
-                return jsonify({'error': 'Invalid birth date format'}), 400
-        
+        try:
+            values = record_service.parse_resident(form_data)
+        except record_service.RecordError as e:
+            return jsonify({'error': str(e)}), e.status
+
         # Check for existing resident to prevent duplicates
         query = Resident.query.filter(
-            Resident.first_name.ilike(first_name),
-            Resident.last_name.ilike(last_name)
+            Resident.first_name.ilike(values['first_name']),
+            Resident.last_name.ilike(values['last_name'])
         )
 
-        if birth_date:
-            query = query.filter_by(birth_date=birth_date)
+        if values['birth_date']:
+            query = query.filter_by(birth_date=values['birth_date'])
         else:
             # Handles cases where birth date is not provided
             query = query.filter(Resident.birth_date.is_(None))
 
         if query.first():
-            return jsonify({'error': 'A resident with the same name and birth date already exists.'}), 409
+            return jsonify({'error': record_service.DUPLICATE_RESIDENT}), 409
 
         # Handle file upload
         profile_picture = files_data.get('profilePicture')
@@ -450,36 +388,16 @@ def create_new_resident(form_data, files_data):
             profile_picture.save(profile_picture_path)  # Save the file
             profile_picture_path = os.path.join('uploads', filename)  # Store relative path
 
-
         # Create resident
-        resident = Resident(
-            first_name=first_name,
-            middle_name=middle_name,
-            last_name=last_name,
-            alias=alias,
-            place_of_birth=place_of_birth,
-            birth_date=birth_date,
-            civil_status=civil_status,
-            purok=purok,
-            voters_status=voters_status,
-            identified_as=identified_as,
-            email=email,
-            occupation=occupation,
-            citizenship=citizenship,
-            profile_picture=profile_picture_path,
-            sex=sex,
-            address=address,
-            contact_number=contact_number,
-            status='Active'
-        )
-        
+        resident = Resident(profile_picture=profile_picture_path, **values)
+
         db.session.add(resident)
         try:
             db.session.commit()
         except exc.IntegrityError:
             db.session.rollback()
             # This catches race conditions if two identical requests are made at the same time.
-            return jsonify({'error': 'A resident with the same name and birth date already exists.'}), 409
+            return jsonify({'error': record_service.DUPLICATE_RESIDENT}), 409
         
         return jsonify({
             'success': True,
@@ -496,42 +414,17 @@ def create_new_resident(form_data, files_data):
 def create_new_household(form_data):
     """Create a new household record"""
     try:
-        # Extract and validate required fields
-        head_id = form_data.get('headId')
-        address = form_data.get('address', '').strip()
-        if not head_id or not address:
-            return jsonify({'error': 'Head of Family and Address are required'}), 400
+        try:
+            values = record_service.parse_household(form_data)
+        except record_service.RecordError as e:
+            return jsonify({'error': str(e)}), e.status
 
         # Check if head_id is a valid resident
-        head_resident = Resident.query.get(head_id)
-        if not head_resident:
+        if not db.session.get(Resident, values['head_id']):
             return jsonify({'error': 'Selected Head of Family is not a valid resident'}), 400
 
-        # Extract optional fields
-        purok = form_data.get('purok', '').strip()
-        category = form_data.get('category', '').strip()
-        monthly_income_str = form_data.get('monthlyIncome', '').strip()
-        toilet_type = form_data.get('toiletType', '').strip()
-        remarks = form_data.get('remarks', '').strip()
-
-        # Parse monthly income
-        monthly_income = None
-        if monthly_income_str:
-            try:
-                monthly_income = float(monthly_income_str)
-            except ValueError:
-                return jsonify({'error': 'Invalid monthly income format'}), 400
-
         # Create household
-        household = Household(
-            head_id=int(head_id),
-            address=address,
-            purok=purok if purok else None,
-            category=category if category else None,
-            monthly_income=monthly_income,
-            toilet_type=toilet_type if toilet_type else None,
-            remarks=remarks if remarks else None
-        )
+        household = Household(**values)
         
         db.session.add(household)
         db.session.commit()
@@ -551,25 +444,13 @@ def create_new_household(form_data):
 def create_new_blotter(form_data):
     """Create a new blotter record"""
     try:
-        # Extract form data
-        case_title = form_data.get('caseTitle', '').strip()
-        case_type = form_data.get('caseType', '').strip()
-        details = form_data.get('details', '').strip()
-        location = form_data.get('location', '').strip()
-        respondent_name = form_data.get('respondentName', '').strip()
-        
-        # Validation
-        if not case_title or not details:
-            return jsonify({'error': 'Case title and details are required'}), 400
-        
+        try:
+            values = record_service.parse_blotter(form_data)
+        except record_service.RecordError as e:
+            return jsonify({'error': str(e)}), e.status
+
         # Create blotter
-        blotter = Blotter(
-            case_title=case_title,
-            case_type=case_type if case_type else None,
-            details=details,
-            location=location if location else None,
-            status='Open'
-        )
+        blotter = Blotter(**values)
         
         db.session.add(blotter)
         db.session.commit()
@@ -589,27 +470,17 @@ def create_new_blotter(form_data):
 def create_new_clearance(form_data):
     """Create a new clearance record"""
     try:
-        # Extract form data
-        clearance_type = form_data.get('clearanceType', '').strip()
-        purpose = form_data.get('purpose', '').strip()
-        resident_id = form_data.get('residentId', '').strip()
-        
-        # Validation
-        if not all([clearance_type, purpose, resident_id]):
-            return jsonify({'error': 'Clearance type, purpose, and resident are required'}), 400
-        
+        try:
+            values = record_service.parse_clearance(form_data)
+        except record_service.RecordError as e:
+            return jsonify({'error': str(e)}), e.status
+
         # Check if resident exists
-        resident = Resident.query.get(resident_id)
-        if not resident:
+        if not db.session.get(Resident, values['resident_id']):
             return jsonify({'error': 'Selected resident not found'}), 400
         
         # Create clearance
-        clearance = Clearance(
-            clearance_type=clearance_type,
-            purpose=purpose,
-            resident_id=int(resident_id) if resident_id else None,
-            status='Pending'
-        )
+        clearance = Clearance(**values)
         
         db.session.add(clearance)
         db.session.commit()
@@ -626,6 +497,34 @@ def create_new_clearance(form_data):
         return jsonify({'error': 'Failed to create clearance request'}), 500
 
 
+def _search_results(query):
+    # Search residents
+    residents = queries.search_residents(query, limit=5)
+
+    # Search blotters (title, respondent, narrative and location)
+    blotters = blotter_search.search(query, limit=5)
+
+    return {
+        'residents': [
+            {
+                'id': r.id,
+                'name': f"{r.first_name} {r.last_name}",
+                'address': r.address,
+                'type': 'resident'
+            } for r in residents
+        ],
+        'blotters': [
+            {
+                'id': b.id,
+                'title': b.case_title,
+                'status': b.status,
+                'snippet': b.snippet,
+                'type': 'blotter'
+            } for b in blotters
+        ]
+    }
+
+
 @dashboard.route('/api/search')
 @login_required
 def api_search():
@@ -636,38 +535,12 @@ def api_search():
         if not query or len(query) < 2:
             return jsonify({'results': []})
         
-        # Search residents
-        residents = Resident.query.filter(
-            db.or_(
-                Resident.first_name.ilike(f'%{query}%'),
-                Resident.last_name.ilike(f'%{query}%'),
-                Resident.address.ilike(f'%{query}%')
-            )
-        ).limit(5).all()
-        
-        # Search blotters
-        blotters = Blotter.query.filter(
-            Blotter.case_title.ilike(f'%{query}%')
-        ).limit(5).all()
-        
-        results = {
-            'residents': [
-                {
-                    'id': r.id,
-                    'name': f"{r.first_name} {r.last_name}",
-                    'address': r.address,
-                    'type': 'resident'
-                } for r in residents
-            ],
-            'blotters': [
-                {
-                    'id': b.id,
-                    'title': b.case_title,
-                    'status': b.status,
-                    'type': 'blotter'
-                } for b in blotters
-            ]
-        }
+        # Cached per query until a resident or blotter is written
+        results = cache.get_or_set(
+            f'search:{hashlib.sha1(query.encode()).hexdigest()}',
+            lambda: _search_results(query),
+            namespaces=('residents', 'blotters'),
+        )
         
         return jsonify(results)
         
@@ -681,509 +554,13 @@ def api_search():
 def api_residents():
     """API endpoint to get all residents for dropdown selection"""
     try:
-        residents = Resident.query.filter(
-            Resident.status == 'Active'
-        ).order_by(Resident.last_name, Resident.first_name).all()
-        
-        residents_data = [
-            {
-                'id': r.id,
-                'first_name': r.first_name,
-                'last_name': r.last_name,
-                'address': r.address
-            } for r in residents
-        ]
-        
-        return jsonify(residents_data)
+        # Rows go straight to JSON; no Resident instances or per-row dicts
+        return rows_response(db.session.execute(
+            select(Resident.id, Resident.first_name, Resident.last_name, Resident.address)
+            .where(Resident.status == 'Active')
+            .order_by(Resident.last_name, Resident.first_name)
+        ))
         
     except Exception as e:
         print(f"Residents API error: {e}")
         return jsonify({'error': 'Failed to fetch residents'}), 500
-
-
-@dashboard.route('/dashboard/test-data')
-def insert_test_data():
-    """Insert sample data for testing dashboard functionality"""
-    try:
-        from datetime import date
-        
-        # Check if data already exists
-        if Resident.query.count() > 0:
-            return "Test data already exists!"
-        
-        # Create sample residents
-        resident1 = Resident(
-            first_name="Juan",
-            last_name="Dela Cruz",
-            sex="Male",
-            birth_date=date(1985, 5, 15),
-            address="123 Main Street, Purok 1",
-            status="Active"
-        )
-        resident2 = Resident(
-            first_name="Maria",
-            last_name="Santos",
-            sex="Female", 
-            birth_date=date(1990, 8, 22),
-            address="456 Oak Avenue, Purok 2",
-            status="Active"
-        )
-        resident3 = Resident(
-            first_name="Ana",
-            last_name="Lopez",
-            sex="Female",
-            birth_date=date(1995, 3, 10),
-            address="789 Pine Road, Purok 3",
-            status="Active"
-        )
-        db.session.add_all([resident1, resident2, resident3])
-        db.session.commit()
-
-        # Create sample households and link heads
-        household1 = Household(
-            address="123 Main Street, Purok 1",
-            purok="Purok 1",
-            head_id=resident1.id
-        )
-        household2 = Household(
-            address="456 Oak Avenue, Purok 2", 
-            purok="Purok 2",
-            head_id=resident2.id
-        )
-        db.session.add_all([household1, household2])
-        db.session.commit()
-
-        # Link residents to their households
-        resident1.household_id = household1.id
-        resident2.household_id = household2.id
-        db.session.commit()
-        
-        # Create sample blotters
-        blotter1 = Blotter(
-            case_title="Noise Complaint",
-            details="Loud music playing late at night",
-            status="Open",
-            location="Purok 1",
-            reported_by_id=resident1.id
-        )
-        blotter2 = Blotter(
-            case_title="Boundary Dispute",
-            details="Property line disagreement between neighbors",
-            status="Open", 
-            location="Purok 2",
-            reported_by_id=resident2.id
-        )
-        
-        db.session.add(blotter1)
-        db.session.add(blotter2)
-        db.session.commit()
-        
-        # Create sample clearances
-        clearance1 = Clearance(
-            clearance_type="Barangay Clearance",
-            purpose="Employment",
-            status="Issued",
-            issued_at=datetime.utcnow(),
-            resident_id=resident1.id
-        )
-        clearance2 = Clearance(
-            clearance_type="Indigency Certificate",
-            purpose="Government Assistance",
-            status="Pending",
-            resident_id=resident2.id
-        )
-        
-        db.session.add(clearance1)
-        db.session.add(clearance2)
-        db.session.commit()
-        
-        return "Test data inserted successfully! Dashboard should now show real data."
-        
-    except Exception as e:
-        db.session.rollback()
-        return f"Error inserting test data: {str(e)}"
-
-
-@dashboard.route('/api/insert-sample-data')
-def insert_sample_data():
-    """Insert sample data for testing"""
-    try:
-        from app import db
-        
-        # Check if data already exists
-        if Resident.query.count() > 0:
-            return jsonify({
-                'status': 'info',
-                'message': 'Sample data already exists'
-            })
-        
-        print("Starting sample data creation...")
-        
-        # Create sample resident
-        resident = Resident(
-            first_name='Juan',
-            last_name='Dela Cruz',
-            sex='Male',
-            address='123 Main Street, Barangay San Jose',
-            contact_number='09123456789',
-            email='juan@example.com',
-            status='Active'
-        )
-        db.session.add(resident)
-        db.session.commit()  # Commit resident to get ID
-        print(f"Created resident with ID: {resident.id}")
-
-        # Create sample household and link the resident as head
-        household = Household(
-            head_id=resident.id,
-            address='123 Main Street, Barangay San Jose',
-            purok='Purok 1'
-        )
-        db.session.add(household)
-        db.session.commit()  # Commit household to get ID
-        print(f"Created household with ID: {household.id}")
-        
-        # Verify resident ID was generated
-        if not resident.id:
-            raise Exception("Resident ID was not generated")
-        
-        print(f"Created resident with ID: {resident.id}")
-        
-        # Double-check resident exists in database
-        resident_check = Resident.query.get(resident.id)
-        if not resident_check:
-            raise Exception(f"Resident with ID {resident.id} not found in database after commit")
-        print(f"Verified resident exists in database: {resident_check.first_name} {resident_check.last_name}")
-        
-        # Also check with a direct SQL query to be sure
-        try:
-            result = db.session.execute('SELECT id, first_name, last_name FROM residents WHERE id = :id', {'id': resident.id})
-            row = result.fetchone()
-            if not row:
-                raise Exception(f"Resident not found in direct SQL query")
-            print(f"Direct SQL query confirmed resident: {row[1]} {row[2]}")
-        except Exception as sql_error:
-            print(f"SQL query error: {sql_error}")
-            raise Exception(f"Failed to verify resident with SQL: {sql_error}")
-        
-        # Create sample blotter
-        blotter = Blotter(
-            case_title='Noise Complaint',
-            case_type='Complaint',
-            details='Loud music playing late at night',
-            status='Open',
-            location='123 Main Street'
-        )
-        db.session.add(blotter)
-        db.session.commit()  # Commit blotter
-        print(f"Created blotter with ID: {blotter.id}")
-        
-        # Create sample clearance - now with proper resident ID
-        clearance = Clearance(
-            clearance_type='Barangay Clearance',
-            purpose='Employment',
-            status='Pending',
-            resident_id=resident.id  # Use the actual resident ID
-        )
-        print(f"Creating clearance with resident_id: {resident.id}")
-        db.session.add(clearance)
-        db.session.commit()  # Commit clearance
-        print(f"Created clearance with ID: {clearance.id}")
-        
-        return jsonify({
-            'status': 'success',
-            'message': 'Sample data inserted successfully',
-            'counts': {
-                'households': Household.query.count(),
-                'residents': Resident.query.count(),
-                'blotters': Blotter.query.count(),
-                'clearances': Clearance.query.count()
-            },
-            'resident_id_used': resident.id
-        })
-        
-    except Exception as e:
-        db.session.rollback()
-        import traceback
-        print(f"Error in sample data creation: {str(e)}")
-        print(f"Traceback: {traceback.format_exc()}")
-        return jsonify({
-            'status': 'error',
-            'message': f'Failed to insert sample data: {str(e)}',
-            'traceback': traceback.format_exc()
-        }), 500
-
-
-@dashboard.route('/api/test-db')
-def test_database():
-    """Simple endpoint to test database connectivity"""
-    try:
-        # Test basic connection
-        db.session.execute('SELECT 1')
-        
-        # Test if tables exist
-        tables = []
-        try:
-            residents_count = Resident.query.count()
-            tables.append(f"Residents: {residents_count}")
-        except Exception as e:
-            tables.append(f"Residents table error: {str(e)}")
-            
-        try:
-            households_count = Household.query.count()
-            tables.append(f"Households: {households_count}")
-        except Exception as e:
-            tables.append(f"Households table error: {str(e)}")
-            
-        try:
-            blotters_count = Blotter.query.count()
-            tables.append(f"Blotters: {blotters_count}")
-        except Exception as e:
-            tables.append(f"Blotters table error: {str(e)}")
-            
-        try:
-            clearances_count = Clearance.query.count()
-            tables.append(f"Clearances: {clearances_count}")
-        except Exception as e:
-            tables.append(f"Clearances table error: {str(e)}")
-        
-        return jsonify({
-            'status': 'success',
-            'message': 'Database connection successful',
-            'tables': tables
-        })
-        
-    except Exception as e:
-        import traceback
-        traceback.print_exc()
-        return jsonify({
-            'status': 'error',
-            'message': f'Database connection failed: {str(e)}',
-            'traceback': traceback.format_exc()
-        }), 500
-
-
-@dashboard.route('/api/create-tables')
-def create_database_tables():
-    """Create database tables if they don't exist"""
-    try:
-        from app import db
-        
-        # Create all tables
-        db.create_all()
-        
-        return jsonify({
-            'status': 'success',
-            'message': 'Database tables created successfully'
-        })
-        
-    except Exception as e:
-        return jsonify({
-            'status': 'error',
-            'message': f'Failed to create tables: {str(e)}'
-        }), 500
-
-
-@dashboard.route('/api/db-info')
-def database_info():
-    """Get database connection information"""
-    try:
-        from app import db
-        from config import Config
-        
-        # Get database URI (masked for security)
-        db_uri = Config.SQLALCHEMY_DATABASE_URI
-        if 'postgresql://' in db_uri:
-            # Mask password in URI
-            parts = db_uri.split('@')
-            if len(parts) == 2:
-                user_pass = parts[0].replace('postgresql://', '')
-                if ':' in user_pass:
-                    user, password = user_pass.split(':', 1)
-                    masked_uri = f"postgresql://{user}:***@{parts[1]}"
-                else:
-                    masked_uri = f"postgresql://{user_pass}@{parts[1]}"
-            else:
-                masked_uri = "postgresql://***"
-        else:
-            masked_uri = db_uri
-            
-        return jsonify({
-            'status': 'success',
-            'database_uri': masked_uri,
-            'database_type': 'PostgreSQL' if 'postgresql://' in db_uri else 'Other',
-            'sqlalchemy_track_modifications': Config.SQLALCHEMY_TRACK_MODIFICATIONS
-        })
-        
-    except Exception as e:
-        return jsonify({
-            'status': 'error',
-            'message': f'Failed to get database info: {str(e)}'
-        }), 500
-
-
-@dashboard.route('/api/fix-database-schema')
-def fix_database_schema():
-    """Add missing columns to existing database tables"""
-    try:
-        from app import db
-        
-        # Check what columns exist and add missing ones
-        changes_made = []
-        
-        # Check residents table
-        try:
-            # Try to add contact_number column
-            db.session.execute('ALTER TABLE residents ADD COLUMN IF NOT EXISTS contact_number VARCHAR(20)')
-            changes_made.append("Added contact_number to residents table")
-        except Exception as e:
-            changes_made.append(f"contact_number column: {str(e)}")
-            
-        try:
-            # Try to add email column
-            db.session.execute('ALTER TABLE residents ADD COLUMN IF NOT EXISTS email VARCHAR(120)')
-            changes_made.append("Added email to residents table")
-        except Exception as e:
-            changes_made.append(f"email column: {str(e)}")
-        
-        # Check households table
-        try:
-            # Try to add contact_number column
-            db.session.execute('ALTER TABLE households ADD COLUMN IF NOT EXISTS contact_number VARCHAR(20)')
-            changes_made.append("Added contact_number to households table")
-        except Exception as e:
-            changes_made.append(f"households contact_number column: {str(e)}")
-        
-        # Check blotters table
-        try:
-            # Try to add case_type column
-            db.session.execute('ALTER TABLE blotters ADD COLUMN IF NOT EXISTS case_type VARCHAR(50)')
-            changes_made.append("Added case_type to blotters table")
-        except Exception as e:
-            changes_made.append(f"case_type column: {str(e)}")
-            
-        try:
-            # Try to add respondent_name column
-            db.session.execute('ALTER TABLE blotters ADD COLUMN IF NOT EXISTS respondent_name VARCHAR(120)')
-            changes_made.append("Added respondent_name to blotters table")
-        except Exception as e:
-            changes_made.append(f"respondent_name column: {str(e)}")
-        
-        # Commit the changes
-        db.session.commit()
-        
-        return jsonify({
-            'status': 'success',
-            'message': 'Database schema updated successfully',
-            'changes_made': changes_made
-        })
-        
-    except Exception as e:
-        db.session.rollback()
-        import traceback
-        return jsonify({
-            'status': 'error',
-            'message': f'Failed to update database schema: {str(e)}',
-            'traceback': traceback.format_exc()
-        }), 500
-
-
-@dashboard.route('/api/table-structure')
-def check_table_structure():
-    """Check the current structure of database tables"""
-    try:
-        from app import db
-        
-        table_info = {}
-        
-        # Check residents table structure
-        try:
-            result = db.session.execute("""
-                SELECT column_name, data_type, is_nullable, column_default
-                FROM information_schema.columns 
-                WHERE table_name = 'residents' 
-                ORDER BY ordinal_position
-            """)
-            residents_columns = [dict(row) for row in result]
-            table_info['residents'] = residents_columns
-        except Exception as e:
-            table_info['residents'] = f"Error: {str(e)}"
-        
-        # Check households table structure
-        try:
-            result = db.session.execute("""
-                SELECT column_name, data_type, is_nullable, column_default
-                FROM information_schema.columns 
-                WHERE table_name = 'households' 
-                ORDER BY ordinal_position
-            """)
-            households_columns = [dict(row) for row in result]
-            table_info['households'] = households_columns
-        except Exception as e:
-            table_info['households'] = f"Error: {str(e)}"
-        
-        # Check blotters table structure
-        try:
-            result = db.session.execute("""
-                SELECT column_name, data_type, is_nullable, column_default
-                FROM information_schema.columns 
-                WHERE table_name = 'blotters' 
-                ORDER BY ordinal_position
-            """)
-            blotters_columns = [dict(row) for row in result]
-            table_info['blotters'] = blotters_columns
-        except Exception as e:
-            table_info['blotters'] = f"Error: {str(e)}"
-        
-        # Check clearances table structure
-        try:
-            result = db.session.execute("""
-                SELECT column_name, data_type, is_nullable, column_default
-                FROM information_schema.columns 
-                WHERE table_name = 'clearances' 
-                ORDER BY ordinal_position
-            """)
-            clearances_columns = [dict(row) for row in result]
-            table_info['clearances'] = clearances_columns
-        except Exception as e:
-            table_info['clearances'] = f"Error: {str(e)}"
-        
-        return jsonify({
-            'status': 'success',
-            'table_structures': table_info
-        })
-        
-    except Exception as e:
-        import traceback
-        return jsonify({
-            'status': 'error',
-            'message': f'Failed to check table structure: {str(e)}',
-            'traceback': traceback.format_exc()
-        }), 500
-
-
-@dashboard.route('/api/recreate-tables')
-def recreate_tables():
-    """Drop and recreate all tables with correct schema (WARNING: This will delete all data)"""
-    try:
-        from app import db
-        
-        # Drop all tables
-        db.drop_all()
-        
-        # Create all tables with new schema
-        db.create_all()
-        
-        return jsonify({
-            'status': 'success',
-            'message': 'All tables recreated successfully with correct schema',
-            'warning': 'All existing data has been deleted'
-        })
-        
-    except Exception as e:
-        import traceback
-        return jsonify({
-            'status': 'error',
-            'message': f'Failed to recreate tables: {str(e)}',
-            'traceback': traceback.format_exc()
-        }), 500
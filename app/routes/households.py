@@ -1,7 +1,8 @@
-from flask import Blueprint, render_template, request
+from flask import Blueprint, abort, render_template, request
 from flask_login import login_required
-from datetime import date
+from sqlalchemy.orm import contains_eager
 from app.models import Household, Resident
+from app.services import households as household_service
 from app import db
 
 households = Blueprint('households', __name__)
@@ -12,14 +13,20 @@ def index():
     page = request.args.get('page', 1, type=int)
     query = request.args.get('q', '')
 
-    # Base query
-    households_query = Household.query.order_by(Household.id.desc())
+    # Base query; the head's name comes from the same join, not a query per row
+    households_query = (
+        Household.query
+        .outerjoin(Household.head)
+        .options(contains_eager(Household.head).load_only(
+            Resident.first_name, Resident.middle_name, Resident.last_name))
+        .order_by(Household.id.desc())
+    )
 
     # Search functionality
     if query:
         search_term = f'%{query}%'
-        # Join with residents to search by head of family name
-        households_query = households_query.join(Household.head, isouter=True).filter(
+        # Search by head of family name too
+        households_query = households_query.filter(
             db.or_(
                 (Resident.first_name + ' ' + Resident.last_name).ilike(search_term),
                 Household.address.ilike(search_term),
@@ -31,10 +38,11 @@ def index():
     pagination = households_query.paginate(page=page, per_page=10, error_out=False)
     households_list = pagination.items
 
-    # Stats
-    total_households = Household.query.count()
-    total_residents = Resident.query.count()
-    avg_members = (total_residents / total_households) if total_households > 0 else 0
+    # Stats, from the member_count counters rather than counting residents
+    total_households, total_members = db.session.execute(
+        db.select(db.func.count(Household.id), db.func.coalesce(db.func.sum(Household.member_count), 0))
+    ).one()
+    avg_members = (total_members / total_households) if total_households > 0 else 0
 
     stats = {
         'total_households': total_households,
@@ -47,6 +55,9 @@ def index():
 @login_required
 def view(household_id):
     """Displays the details of a single household."""
-    household = Household.query.get_or_404(household_id)
-    # We pass today's date to calculate age in the template
-    return render_template('view_household.html', household=household, today=date.today())
+    # One query for the household, head and members; ages are precomputed
+    detail = household_service.load_detail(household_id)
+    if detail is None:
+        abort(404)
+    return render_template('view_household.html', household=detail.household, head=detail.head,
+                           members=detail.members)
@@ -1,9 +1,116 @@
-from flask import Blueprint, render_template
+from datetime import datetime
+from flask import Blueprint, render_template, request, jsonify
 from flask_login import login_required
+from sqlalchemy import exc
+from app import db
+from app.authz import permission_required
+from app.models import Official
+from app.services import officials as roster_service
 
 officials = Blueprint('officials', __name__)
 
+OFFICIAL_FIELDS = ('first_name', 'last_name', 'position', 'term_start', 'term_end', 'status')
+
+
+def _official_json(o):
+    return {
+        'id': o.id,
+        'first_name': o.first_name,
+        'last_name': o.last_name,
+        'position': o.position,
+        'term_start': o.term_start.isoformat() if o.term_start else None,
+        'term_end': o.term_end.isoformat() if o.term_end else None,
+        'status': o.status,
+    }
+
+
+def _apply_payload(official, payload):
+    """Copy fields from `payload` onto `official`. Returns an error message or None."""
+    for field in OFFICIAL_FIELDS:
+        if field not in payload:
+            continue
+        value = payload[field]
+        if field in ('term_start', 'term_end'):
+            try:
+                value = datetime.strptime(value, '%Y-%m-%d').date() if value else None
+            except (TypeError, ValueError):
+                return f'Invalid {field.replace("_", " ")} format'
+        elif isinstance(value, str):
+            value = value.strip()
+        setattr(official, field, value)
+
+    if not official.first_name or not official.last_name or not official.position:
+        return 'First name, last name, and position are required'
+    if official.term_start and official.term_end and official.term_end < official.term_start:
+        return 'Term end must not be before term start'
+    return None
+
+
 @officials.route('/officials')
 @login_required
 def index():
     return render_template('officials.html')
+
+
+@officials.route('/api/officials')
+@login_required
+def api_roster():
+    """Officials serving on ``?date=YYYY-MM-DD`` (default today)."""
+    day = None
+    if request.args.get('date'):
+        try:
+            day = datetime.strptime(request.args['date'], '%Y-%m-%d').date()
+        except ValueError:
+            return jsonify({'error': 'Invalid date format'}), 400
+    return jsonify([
+        {
+            'id': s.id,
+            'name': s.name,
+            'position': s.position,
+            'term_start': s.term_start.isoformat() if s.term_start else None,
+            'term_end': s.term_end.isoformat() if s.term_end else None,
+        } for s in roster_service.active_roster(day)
+    ])
+
+
+@officials.route('/api/officials/<int:official_id>')
+@login_required
+def api_get_official(official_id):
+    return jsonify(_official_json(Official.query.get_or_404(official_id)))
+
+
+@officials.route('/api/officials', methods=['POST'])
+@permission_required('officials.manage')
+def api_create_official():
+    official = Official(status='Active')
+    error = _apply_payload(official, request.get_json(silent=True) or {})
+    if error:
+        return jsonify({'error': error}), 400
+    db.session.add(official)
+    db.session.commit()  # the roster cache is cleared on commit
+    return jsonify({'success': True, 'official': _official_json(official)}), 201
+
+
+@officials.route('/api/officials/<int:official_id>', methods=['PUT', 'PATCH'])
+@permission_required('officials.manage')
+def api_update_official(official_id):
+    official = Official.query.get_or_404(official_id)
+    error = _apply_payload(official, request.get_json(silent=True) or {})
+    if error:
+        db.session.rollback()
+        return jsonify({'error': error}), 400
+    db.session.commit()
+    return jsonify({'success': True, 'official': _official_json(official)})
+
+
+@officials.route('/api/officials/<int:official_id>', methods=['DELETE'])
+@permission_required('officials.manage')
+def api_delete_official(official_id):
+    official = Official.query.get_or_404(official_id)
+    db.session.delete(official)
+    try:
+        db.session.commit()
+    except exc.IntegrityError:
+        db.session.rollback()
+        return jsonify({'error': 'This official presides over recorded hearings. Set their status to Inactive instead.'}), 409
+    return jsonify({'success': True})
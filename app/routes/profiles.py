@@ -0,0 +1,39 @@
+from flask import Blueprint, abort, jsonify, render_template, request, send_file
+from app.authz import permission_required
+from app.profiler import profiler
+
+profiles = Blueprint('profiles', __name__)
+
+
+@profiles.route('/admin/profiles')
+@permission_required('system.maintain')
+def index():
+    """Stored request profiles, newest first."""
+    entries = profiler.list()
+    if request.accept_mimetypes.best == 'application/json':
+        return jsonify({'profiles': entries})
+    return render_template('profiles.html', profiles=entries, engine=profiler.engine,
+                           max_profiles=profiler.max_profiles)
+
+
+@profiles.route('/admin/profiles/<profile_id>')
+@permission_required('system.maintain')
+def detail(profile_id):
+    """One profile: summary, SQL statement log, and a download link."""
+    profile = profiler.get(profile_id)
+    if profile is None:
+        abort(404)
+    if request.accept_mimetypes.best == 'application/json':
+        return jsonify(profile)
+    slowest = sorted(profile['sql'], key=lambda s: s['duration_ms'], reverse=True)[:10]
+    return render_template('profile.html', profile=profile, slowest=slowest)
+
+
+@profiles.route('/admin/profiles/<profile_id>/download')
+@permission_required('system.maintain')
+def download(profile_id):
+    """The raw profile: .prof (cProfile) or .html (pyinstrument)."""
+    path = profiler.download_path(profile_id)
+    if path is None:
+        abort(404)
+    return send_file(path, as_attachment=True)
@@ -1,9 +1,56 @@
-from flask import Blueprint, render_template
+from flask import Blueprint, Response, abort, jsonify, render_template, request, send_file, stream_with_context
 from flask_login import login_required
+from app.authz import permission_required
+from app.services import masterlist as masterlist_service
+from app.services import officials as roster_service
 
 reports = Blueprint('reports', __name__)
 
 @reports.route('/reports')
 @login_required
 def index():
-    return render_template('reports.html')
+    return render_template('reports.html', signatories=roster_service.signatories())
+
+
+@reports.route('/api/reports/households')
+@permission_required('reports.view')
+def household_analytics():
+    """Per-capita income, poverty classification, income quantiles and
+    sanitation coverage, barangay-wide and per purok."""
+    # Imported here so workers only load NumPy once this report is requested
+    from app.services import analytics
+
+    return jsonify(analytics.household_analytics())
+
+
+@reports.route('/reports/masterlist')
+@permission_required('reports.view')
+def masterlist_index():
+    """Puroks and precincts with registered voters, linking to their masterlists."""
+    groups = {grouping: masterlist_service.groups(grouping) for grouping in masterlist_service.GROUPINGS}
+    return render_template(
+        'masterlist.html',
+        groups=groups,
+        label=masterlist_service.label,
+        rows_per_page=masterlist_service.ROWS_PER_PAGE,
+    )
+
+
+@reports.route('/reports/masterlist/print')
+@permission_required('reports.view')
+def masterlist_print():
+    """Masterlist for ``?purok=...`` or ``?precinct=...`` as ``format=html`` or ``pdf``.
+
+    Served from the document cache when the list has not changed since it
+    was last generated, otherwise streamed page by page.
+    """
+    fmt = request.args.get('format', 'html')
+    grouping = next((g for g in masterlist_service.GROUPINGS if request.args.get(g)), None)
+    if fmt not in masterlist_service.FORMATS or grouping is None:
+        abort(400)
+    masterlist = masterlist_service.prepare(grouping, request.args[grouping])
+    mimetype = masterlist_service.FORMATS[fmt]
+    path = masterlist_service.cached_path(masterlist, fmt)
+    if path:
+        return send_file(path, mimetype=mimetype, conditional=True)
+    return Response(stream_with_context(masterlist_service.generate(masterlist, fmt)), mimetype=mimetype)
@@ -0,0 +1,34 @@
+from flask import Blueprint, request, jsonify
+from flask_login import current_user, login_required
+from app.authz import permission_required
+from app.services import sync as sync_service
+
+sync = Blueprint('sync', __name__)
+
+
+@sync.route('/api/sync')
+@permission_required('records.view')
+def api_pull():
+    """Changes since ``?cursor=`` (omit for a full download), ``?limit=`` rows per table."""
+    try:
+        changes = sync_service.pull(request.args.get('cursor'), limit=request.args.get('limit', type=int))
+    except sync_service.SyncError as e:
+        return jsonify({'error': str(e)}), 400
+    if changes['reset']:
+        return jsonify({'reset': True, 'error': 'Cursor is too old; discard local data and sync again'}), 410
+    return jsonify(changes)
+
+
+@sync.route('/api/sync', methods=['POST'])
+@login_required
+def api_push():
+    """Apply a batch of offline edits. Body: ``{"changes": [{op, entity, id, base_updated_at, fields, ref}]}``."""
+    payload = request.get_json(silent=True) or {}
+    try:
+        results = sync_service.push(payload.get('changes'), current_user.can)
+    except sync_service.SyncError as e:
+        return jsonify({'error': str(e)}), 400
+    summary = {}
+    for result in results:
+        summary[result['status']] = summary.get(result['status'], 0) + 1
+    return jsonify({'results': results, 'summary': summary})
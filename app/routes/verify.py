@@ -0,0 +1,32 @@
+from flask import Blueprint, jsonify, render_template, request
+from app.verification import verifier
+
+verify = Blueprint('verify', __name__)
+
+
+@verify.route('/verify/<token>')
+def clearance(token):
+    """Public check of the QR code on a printed clearance.
+
+    Needs no login and reads no records: the token's signature proves its
+    contents, and revocations come from the in-memory set.
+    """
+    claims = verifier.verify(token)
+    if claims is None:
+        status = 'invalid'
+    elif verifier.is_revoked(claims.clearance_id):
+        status = 'revoked'
+    else:
+        status = 'valid'
+    code = 404 if status == 'invalid' else 200
+
+    if request.accept_mimetypes.best == 'application/json':
+        payload = {'status': status}
+        if claims:
+            payload.update({
+                'clearance_id': claims.clearance_id,
+                'clearance_type': claims.clearance_type,
+                'issued_on': claims.issued_on.isoformat(),
+            })
+        return jsonify(payload), code
+    return render_template('verify.html', status=status, claims=claims), code
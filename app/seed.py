@@ -0,0 +1,417 @@
+"""Synthetic barangay data for local load testing (``flask seed``).
+
+Generates households with a head, spouse, children and the occasional
+extended-family member. Names follow common Filipino surname/given-name
+frequencies, and puroks get uneven populations. Blotter cases and
+clearance requests are generated in proportion to the population. Output
+is fully determined by the seed.
+
+Rows are generated and bulk-inserted one chunk of households at a time, so
+memory stays flat from 10k to 1M residents. Ids are allocated up front,
+which lets households, residents, heads, blotters and clearances be wired
+together without reading generated keys back.
+"""
+import random
+import zlib
+from datetime import date, datetime, time, timedelta
+
+from sqlalchemy import bindparam, func, select, text
+
+from app import db
+from app.models import Blotter, Clearance, Hearing, Household, Official, Resident
+from app.services import directory
+
+# Roughly in order of frequency in the Philippines
+SURNAMES = (
+    'Dela Cruz', 'Garcia', 'Reyes', 'Ramos', 'Mendoza', 'Santos', 'Flores', 'Gonzales',
+    'Bautista', 'Villanueva', 'Fernandez', 'Cruz', 'De Guzman', 'Lopez', 'Perez', 'Castillo',
+    'Francisco', 'Rivera', 'Aquino', 'Castro', 'Sanchez', 'Torres', 'De Leon', 'Domingo',
+    'Martinez', 'Rodriguez', 'Santiago', 'Soriano', 'Delos Santos', 'Diaz', 'Hernandez',
+    'Tolentino', 'Valdez', 'Ramirez', 'Morales', 'Mercado', 'Tan', 'Aguilar', 'Navarro',
+    'Manalo', 'Gomez', 'Dizon', 'Del Rosario', 'Javier', 'Corpuz', 'Gutierrez', 'Salvador',
+    'Velasco', 'Miranda', 'David', 'Pascual', 'Robles', 'Sarmiento', 'Marquez', 'Cabrera',
+    'Ocampo', 'Padilla', 'Enriquez', 'Lim', 'Agustin',
+)
+MALE_NAMES = (
+    'Juan', 'Jose', 'Mark', 'John Paul', 'Michael', 'Christian', 'Angelo', 'Jerome', 'Carlo',
+    'Ramon', 'Antonio', 'Roberto', 'Eduardo', 'Renato', 'Rogelio', 'Danilo', 'Ricardo', 'Joel',
+    'Reynaldo', 'Jomar', 'Kevin', 'Jericho', 'Paolo', 'Miguel', 'Rafael', 'Gabriel', 'Nathaniel',
+    'Adrian', 'Francis', 'Ryan', 'Ernesto', 'Rodel', 'Arnel', 'Noel', 'Jayson', 'Bryan',
+)
+FEMALE_NAMES = (
+    'Maria', 'Ana', 'Rosa', 'Cristina', 'Jennifer', 'Michelle', 'Mary Grace', 'Joy', 'Kristine',
+    'Angelica', 'Princess', 'Jasmine', 'Nicole', 'Camille', 'Andrea', 'Elena', 'Teresita',
+    'Lourdes', 'Erlinda', 'Leonora', 'Marites', 'Rowena', 'Maricel', 'Lea', 'Jocelyn', 'Rhea',
+    'Althea', 'Bea', 'Sofia', 'Samantha', 'Rosario', 'Gloria', 'Divina', 'Liza', 'Aileen', 'Janine',
+)
+STREETS = (
+    'Rizal St.', 'Mabini St.', 'Bonifacio St.', 'Luna St.', 'Burgos St.', 'Del Pilar St.',
+    'Quezon Ave.', 'Aguinaldo St.', 'Jacinto St.', 'Sampaguita St.', 'Ilang-Ilang St.', 'Narra St.',
+)
+OCCUPATIONS = (
+    'Farmer', 'Fisherman', 'Tricycle Driver', 'Vendor', 'Sari-sari Store Owner', 'Construction Worker',
+    'Teacher', 'Nurse', 'Office Clerk', 'Call Center Agent', 'OFW', 'Carpenter', 'Housekeeper',
+    'Barangay Tanod', 'Security Guard', 'Self-employed', 'Unemployed',
+)
+HOUSEHOLD_CATEGORIES = (('Regular', 80), ('Single Parent', 8), ('Senior Headed', 9), ('With PWD', 3))
+TOILET_TYPES = (('Water-sealed', 78), ('Antipolo', 15), ('None', 7))
+# Household size 1..10; mean ~4.1 as in the PSA census
+HOUSEHOLD_SIZES = (8, 13, 17, 19, 16, 11, 7, 4, 3, 2)
+BLOTTER_CASES = (
+    ('Noise Complaint', 'Complaint', 'Loud videoke past curfew hours in the residence of'),
+    ('Boundary Dispute', 'Dispute', 'Disagreement over the property line and fence built by'),
+    ('Unpaid Debt', 'Dispute', 'Non-payment of a personal loan of PHP {amount} by'),
+    ('Physical Injury', 'Incident', 'Altercation resulting in minor physical injuries involving'),
+    ('Theft', 'Incident', 'Alleged theft of a cellphone and wallet by'),
+    ('Trespassing', 'Complaint', 'Repeated entry into the complainant\'s yard without permission by'),
+    ('Verbal Altercation', 'Complaint', 'Exchange of insults and threats in public with'),
+    ('Stray Animals', 'Complaint', 'Dogs left roaming and damaging plants, owned by'),
+)
+BLOTTER_STATUSES = (('Resolved', 60), ('Open', 25), ('Referred', 8), ('Dismissed', 7))
+CLEARANCE_TYPES = (
+    ('Barangay Clearance', 55), ('Certificate of Residency', 18), ('Indigency Certificate', 15),
+    ('Business Permit', 7), ('Good Moral Character', 5),
+)
+CLEARANCE_PURPOSES = (
+    'Employment', 'Local Employment', 'Scholarship', 'School Requirement', 'Medical Assistance',
+    'Financial Assistance', 'Bank Requirement', 'Postal ID', 'Business Registration', 'Police Clearance',
+)
+CLEARANCE_STATUSES = (('Issued', 85), ('Pending', 10), ('Approved', 5))
+HEARING_VENUES = ('Barangay Hall', 'Lupon Room')
+ROSTER = (
+    ('Punong Barangay', 1), ('Barangay Kagawad', 7), ('Barangay Secretary', 1),
+    ('Barangay Treasurer', 1), ('SK Chairperson', 1),
+)
+
+
+def _zipf_weights(n, s=0.8):
+    return [1 / (rank ** s) for rank in range(1, n + 1)]
+
+
+class Generator:
+    """Deterministic row generator; all randomness comes from one `random.Random`."""
+
+    def __init__(self, seed, puroks, today, years_of_history=3):
+        self.rng = random.Random(seed)
+        self.today = today
+        self.history_start = today - timedelta(days=365 * years_of_history)
+        self.puroks = [f'Purok {i}' for i in range(1, puroks + 1)]
+        # Older puroks near the barangay center are more populous
+        self.purok_weights = [1.5 - 0.9 * i / max(1, puroks - 1) for i in range(puroks)]
+        self.surname_weights = _zipf_weights(len(SURNAMES))
+        self.male_weights = _zipf_weights(len(MALE_NAMES), 0.6)
+        self.female_weights = _zipf_weights(len(FEMALE_NAMES), 0.6)
+        self.taken = set()
+
+    # -- helpers -------------------------------------------------------------
+
+    def pick(self, weighted):
+        values, weights = zip(*weighted)
+        return self.rng.choices(values, weights)[0]
+
+    def surname(self):
+        return self.rng.choices(SURNAMES, self.surname_weights)[0]
+
+    def given_name(self, sex):
+        if sex == 'Male':
+            return self.rng.choices(MALE_NAMES, self.male_weights)[0]
+        return self.rng.choices(FEMALE_NAMES, self.female_weights)[0]
+
+    def birth_date(self, age):
+        return self.today - timedelta(days=int(age * 365.25) + self.rng.randrange(365))
+
+    def unique_birth_date(self, first, last, birth):
+        """Shift `birth` until (first, last, birth) is unused (the residents unique key)."""
+        while True:
+            key = zlib.crc32(f'{first}|{last}|{birth.toordinal()}'.encode())
+            if key not in self.taken:
+                self.taken.add(key)
+                return birth
+            birth -= timedelta(days=1)
+
+    def timestamp_between(self, start, end):
+        span = max(1, int((end - start).total_seconds()))
+        return start + timedelta(seconds=self.rng.randrange(span))
+
+    def contact_number(self):
+        return f'09{self.rng.randrange(10**9):09d}'
+
+    # -- records -------------------------------------------------------------
+
+    def person(self, resident_id, household_id, purok, address, sex, age, last_name, created_at,
+               civil_status=None, middle_name=None):
+        first = self.given_name(sex)
+        birth = self.unique_birth_date(first, last_name, self.birth_date(age))
+        adult = age >= 18
+        row = {
+            'id': resident_id,
+            'first_name': first,
+            'middle_name': middle_name if middle_name is not None else self.surname(),
+            'last_name': last_name,
+            'birth_date': birth,
+            'place_of_birth': self.rng.choice(('Same barangay', 'Manila', 'Cebu City', 'Davao City', 'Iloilo City')),
+            'civil_status': civil_status or ('Single' if not adult or self.rng.random() < 0.5 else 'Married'),
+            'purok': purok,
+            'voters_status': 'Registered' if adult and self.rng.random() < 0.82 else 'Not Registered',
+            'sex': sex,
+            'occupation': self.rng.choice(OCCUPATIONS) if adult else 'Student',
+            'citizenship': 'Filipino',
+            'address': address,
+            'contact_number': self.contact_number() if adult and self.rng.random() < 0.7 else None,
+            'status': 'Active' if self.rng.random() < 0.97 else self.rng.choice(('Moved Out', 'Deceased')),
+            'household_id': household_id,
+            'created_at': created_at,
+            'updated_at': created_at,
+            'clearance_count': 0,
+            'blotter_count': 0,
+        }
+        row['precinct'] = self.precinct(purok, resident_id) if row['voters_status'] == 'Registered' else None
+        return row
+
+    @staticmethod
+    def precinct(purok, resident_id):
+        """Two precincts per purok: 0003A and 0003B for Purok 3."""
+        return f"{int(purok.rsplit(' ', 1)[-1]):04d}{'AB'[resident_id % 2]}"
+
+    def household(self, household_id, next_resident_id):
+        """Return ``(household_row, member_rows)``; the head is the first member."""
+        rng = self.rng
+        size = rng.choices(range(1, len(HOUSEHOLD_SIZES) + 1), HOUSEHOLD_SIZES)[0]
+        purok = rng.choices(self.puroks, self.purok_weights)[0]
+        address = f'{rng.randrange(1, 400)} {rng.choice(STREETS)}, {purok}'
+        created_at = self.timestamp_between(
+            datetime.combine(self.history_start, time.min), datetime.combine(self.today, time.min)
+        )
+        category = self.pick(HOUSEHOLD_CATEGORIES)
+        surname = self.surname()
+
+        head_age = rng.randint(60, 85) if category == 'Senior Headed' else rng.randint(22, 75)
+        head_sex = 'Female' if category == 'Single Parent' and rng.random() < 0.8 else rng.choice(('Male', 'Male', 'Female'))
+        married = size > 1 and category != 'Single Parent' and rng.random() < 0.85
+        members = [self.person(next_resident_id, household_id, purok, address, head_sex, head_age, surname,
+                               created_at, civil_status='Married' if married else None)]
+        if married:
+            spouse_sex = 'Female' if head_sex == 'Male' else 'Male'
+            spouse_age = max(18, head_age + rng.randint(-6, 4))
+            members.append(self.person(next_resident_id + 1, household_id, purok, address, spouse_sex,
+                                       spouse_age, surname, created_at, civil_status='Married'))
+        mother_maiden = self.surname()
+        while len(members) < size:
+            resident_id = next_resident_id + len(members)
+            sex = rng.choice(('Male', 'Female'))
+            if rng.random() < 0.85 and head_age >= 20:
+                # Child of the head
+                age = max(0, head_age - rng.randint(18, 40))
+                members.append(self.person(resident_id, household_id, purok, address, sex, age, surname,
+                                           created_at, middle_name=mother_maiden))
+            else:
+                # Extended family: a parent, sibling or in-law of the head
+                age = rng.randint(15, 85)
+                members.append(self.person(resident_id, household_id, purok, address, sex, age, self.surname(),
+                                           created_at))
+
+        income = None
+        if rng.random() < 0.9:
+            # Log-normal monthly income centred around PHP 18k
+            income = round(min(500000, rng.lognormvariate(9.8, 0.75)), 2)
+        household = {
+            'id': household_id,
+            'address': address,
+            'purok': purok,
+            'created_at': created_at,
+            'category': category,
+            'monthly_income': income,
+            'toilet_type': self.pick(TOILET_TYPES),
+            'remarks': None,
+            'head_id': None,  # set after residents are inserted
+            'member_count': len(members),
+        }
+        return household, members
+
+    def blotter(self, blotter_id, reporter, respondent):
+        title, case_type, narrative = self.rng.choice(BLOTTER_CASES)
+        reported_at = self.timestamp_between(reporter['created_at'], datetime.combine(self.today, time(18)))
+        return {
+            'id': blotter_id,
+            'case_title': title,
+            'case_type': case_type,
+            'details': f"{narrative.format(amount=self.rng.randrange(1, 50) * 500)} "
+                       f"{respondent['first_name']} {respondent['last_name']} at {respondent['address']}.",
+            'status': self.pick(BLOTTER_STATUSES),
+            'location': reporter['purok'],
+            'respondent_name': f"{respondent['first_name']} {respondent['last_name']}",
+            'reported_at': reported_at,
+            'hearing_date': None,
+            'reported_by_id': reporter['id'],
+        }
+
+    def clearance(self, clearance_id, resident):
+        requested_at = self.timestamp_between(resident['created_at'], datetime.combine(self.today, time(17)))
+        status = self.pick(CLEARANCE_STATUSES)
+        approved_at = issued_at = None
+        if status in ('Approved', 'Issued'):
+            approved_at = requested_at + timedelta(minutes=self.rng.randint(5, 240))
+        if status == 'Issued':
+            issued_at = approved_at + timedelta(minutes=self.rng.randint(1, 120))
+        return {
+            'id': clearance_id,
+            'clearance_type': self.pick(CLEARANCE_TYPES),
+            'purpose': self.rng.choice(CLEARANCE_PURPOSES),
+            'status': status,
+            'requested_at': requested_at,
+            'approved_at': approved_at,
+            'issued_at': issued_at,
+            'resident_id': resident['id'],
+        }
+
+
+def _next_id(model):
+    return (db.session.execute(select(func.max(model.id))).scalar() or 0) + 1
+
+
+def _reset_sequences(models):
+    """Move Postgres id sequences past explicitly inserted ids."""
+    if db.session.get_bind().dialect.name != 'postgresql':
+        return
+    for model in models:
+        table = model.__tablename__
+        db.session.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), COALESCE((SELECT MAX(id) FROM {table}), 1))"
+        ))
+
+
+def _seed_officials(gen):
+    if db.session.execute(select(func.count()).select_from(Official)).scalar():
+        return db.session.execute(
+            select(Official.id).where(Official.position == 'Punong Barangay', Official.status == 'Active')
+        ).scalars().first()
+    term_start = date(gen.today.year - (gen.today.year - 2023) % 3, 11, 30)
+    if term_start > gen.today:
+        term_start = term_start.replace(year=term_start.year - 3)
+    rows = []
+    for position, count in ROSTER:
+        for _ in range(count):
+            sex = gen.rng.choice(('Male', 'Female'))
+            rows.append({
+                'first_name': gen.given_name(sex),
+                'last_name': gen.surname(),
+                'position': position,
+                'term_start': term_start,
+                'term_end': term_start.replace(year=term_start.year + 3) - timedelta(days=1),
+                'status': 'Active',
+            })
+    db.session.execute(Official.__table__.insert(), rows)
+    return db.session.execute(
+        select(Official.id).where(Official.position == 'Punong Barangay')
+    ).scalars().first()
+
+
+def _load_taken_keys(gen):
+    """Existing (first, last, birth_date) keys, so appended residents stay unique."""
+    result = db.session.execute(
+        select(Resident.first_name, Resident.last_name, Resident.birth_date)
+        .where(Resident.birth_date.is_not(None))
+        .execution_options(yield_per=10000)
+    )
+    for first, last, birth in result:
+        gen.taken.add(zlib.crc32(f'{first}|{last}|{birth.toordinal()}'.encode()))
+
+
+def seed_database(residents, seed=42, batch_size=5000, puroks=7,
+                  blotters_per_1000=20, clearances_per_1000=120, today=None, progress=None):
+    """Generate and insert about `residents` residents plus related records.
+
+    Commits once per batch. Returns a dict of inserted row counts. The same
+    arguments (including `today`) on an empty database produce identical data.
+    """
+    gen = Generator(seed, puroks, today or date.today())
+    presiding_official_id = _seed_officials(gen)
+    _load_taken_keys(gen)
+
+    household_id = _next_id(Household)
+    resident_id = _next_id(Resident)
+    blotter_id = _next_id(Blotter)
+    clearance_id = _next_id(Clearance)
+    counts = {'households': 0, 'residents': 0, 'blotters': 0, 'clearances': 0, 'hearings': 0}
+    hearing_slot = 0
+    households_table = Household.__table__
+    head_update = (
+        households_table.update()
+        .where(households_table.c.id == bindparam('hid'))
+        .values(head_id=bindparam('head'))
+    )
+
+    while counts['residents'] < residents:
+        households, members = [], []
+        while len(members) < batch_size and counts['residents'] + len(members) < residents:
+            household, people = gen.household(household_id, resident_id)
+            households.append(household)
+            members.extend(people)
+            household_id += 1
+            resident_id += len(people)
+
+        blotters, clearances, hearings = [], [], []
+        for _ in range(max(1, len(members) * blotters_per_1000 // 1000)):
+            blotter = gen.blotter(blotter_id, gen.rng.choice(members), gen.rng.choice(members))
+            if blotter['status'] == 'Open' and gen.rng.random() < 0.4:
+                # Open cases get an upcoming hearing; slots are handed out one per venue-hour
+                day_offset, hour = divmod(hearing_slot // len(HEARING_VENUES), 8)
+                starts_at = datetime.combine(gen.today + timedelta(days=day_offset), time(9 + hour))
+                hearings.append({
+                    'blotter_id': blotter_id,
+                    'official_id': presiding_official_id if hearing_slot % len(HEARING_VENUES) == 0 else None,
+                    'venue': HEARING_VENUES[hearing_slot % len(HEARING_VENUES)],
+                    'starts_at': starts_at,
+                    'ends_at': starts_at + timedelta(hours=1),
+                    'status': 'Scheduled',
+                    'created_at': blotter['reported_at'],
+                })
+                blotter['hearing_date'] = starts_at
+                hearing_slot += 1
+            blotters.append(blotter)
+            blotter_id += 1
+        for _ in range(len(members) * clearances_per_1000 // 1000):
+            clearances.append(gen.clearance(clearance_id, gen.rng.choice(members)))
+            clearance_id += 1
+
+        # Core inserts skip the counter events (app/counters.py); fill the counters in directly
+        by_id = {member['id']: member for member in members}
+        for blotter in blotters:
+            by_id[blotter['reported_by_id']]['blotter_count'] += 1
+        for clearance in clearances:
+            by_id[clearance['resident_id']]['clearance_count'] += 1
+
+        db.session.execute(Household.__table__.insert(), households)
+        db.session.execute(Resident.__table__.insert(), members)
+        db.session.execute(head_update, [
+            {'hid': household['id'], 'head': head_id} for household, head_id in _heads(households, members)
+        ])
+        if blotters:
+            db.session.execute(Blotter.__table__.insert(), blotters)
+        if hearings:
+            db.session.execute(Hearing.__table__.insert(), hearings)
+        if clearances:
+            db.session.execute(Clearance.__table__.insert(), clearances)
+        # Core inserts skip the directory events too
+        directory.refresh(db.session, [member['id'] for member in members])
+        db.session.commit()
+
+        counts['households'] += len(households)
+        counts['residents'] += len(members)
+        counts['blotters'] += len(blotters)
+        counts['clearances'] += len(clearances)
+        counts['hearings'] += len(hearings)
+        if progress:
+            progress(counts)
+
+    _reset_sequences((Household, Resident, Blotter, Clearance, Hearing, Official))
+    db.session.commit()
+    return counts
+
+
+def _heads(households, members):
+    """Pair each household with its head (the first member generated for it)."""
+    heads = {}
+    for member in members:
+        heads.setdefault(member['household_id'], member['id'])
+    return [(h, heads[h['id']]) for h in households]
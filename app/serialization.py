@@ -0,0 +1,101 @@
+"""JSON encoding for API responses.
+
+`init_app` installs the app's JSON provider, chosen by ``JSON_PROVIDER``:
+'orjson', 'stdlib', or 'auto' (orjson when it is installed). Both
+providers write dates and datetimes as ISO 8601 and Decimals (e.g.
+households.monthly_income) as numbers, compactly and without escaping
+non-ASCII text, so responses are byte for byte the same either way.
+orjson encodes several times faster and handles dates natively.
+
+List endpoints can skip model instances and hand-built dicts entirely:
+`rows_response` turns the rows of a column SELECT straight into a JSON
+array of objects keyed by column label.
+"""
+from datetime import date
+from decimal import Decimal
+
+from flask import current_app
+from flask.json.provider import DefaultJSONProvider, JSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional; the stdlib provider is used instead
+    orjson = None
+
+
+def _default(o):
+    if isinstance(o, Decimal):
+        return float(o)
+    if isinstance(o, date):  # datetime too; only reached by the stdlib encoder
+        return o.isoformat()
+    if hasattr(o, '__html__'):
+        return str(o.__html__())
+    raise TypeError(f'Object of type {type(o).__name__} is not JSON serializable')
+
+
+class StdlibJSONProvider(DefaultJSONProvider):
+    """Flask's provider with ISO dates, numeric Decimals and orjson's compact output."""
+
+    default = staticmethod(_default)
+    ensure_ascii = False
+    sort_keys = False
+
+    def dumps_bytes(self, obj):
+        return self.dumps(obj, separators=(',', ':')).encode('utf-8')
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.dumps_bytes(obj), mimetype='application/json')
+
+
+class OrjsonProvider(JSONProvider):
+    """JSON provider backed by orjson."""
+
+    option = orjson.OPT_NON_STR_KEYS if orjson else 0
+
+    def dumps_bytes(self, obj):
+        return orjson.dumps(obj, default=_default, option=self.option)
+
+    def dumps(self, obj, **kwargs):
+        return self.dumps_bytes(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.dumps_bytes(obj), mimetype='application/json')
+
+
+PROVIDERS = {'orjson': OrjsonProvider, 'stdlib': StdlibJSONProvider}
+
+
+def dumps(obj):
+    """Encode `obj` to JSON bytes with the current app's provider."""
+    return current_app.json.dumps_bytes(obj)
+
+
+def rows_json(rows, keys=None):
+    """JSON bytes for SELECT rows: an array of ``{label: value}`` objects.
+
+    `rows` is a Result (its column labels are used) or a list of rows with
+    `keys` given.
+    """
+    keys = list(rows.keys() if keys is None else keys)
+    return dumps([dict(zip(keys, row)) for row in rows])
+
+
+def rows_response(result, status=200):
+    return current_app.response_class(rows_json(result), status=status, mimetype='application/json')
+
+
+def init_app(app):
+    app.config.setdefault('JSON_PROVIDER', 'auto')
+    name = app.config['JSON_PROVIDER']
+    if name == 'auto':
+        name = 'orjson' if orjson is not None else 'stdlib'
+    if name not in PROVIDERS:
+        raise ValueError(f"JSON_PROVIDER must be 'auto', 'orjson' or 'stdlib', not {name!r}")
+    if name == 'orjson' and orjson is None:
+        raise RuntimeError("JSON_PROVIDER is 'orjson' but orjson is not installed")
+    app.json = PROVIDERS[name](app)
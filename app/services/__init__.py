@@ -0,0 +1 @@
+"""Domain services shared by the route blueprints and CLI commands."""
@@ -0,0 +1,125 @@
+"""Ranked full-text search over blotter cases.
+
+On PostgreSQL, `blotters.search_vector` holds the case title and
+respondent name (weight A), the narrative (B) and the location (C). A
+trigger keeps it current, and a GIN index makes matching cheap.
+Queries use web-search syntax (``"exact phrase"``, ``or``, ``-exclude``)
+and are ranked with ``ts_rank_cd``. Snippets are highlighted with
+``ts_headline``, computed only for the page of results returned.
+
+The 'simple' text search configuration is used throughout: narratives
+mix Filipino and English and the indexed fields are full of names, which
+an English stemmer would mangle. Matching is therefore on whole words.
+
+Other databases (SQLite in development) fall back to ILIKE matching of
+every word, newest first, with snippets cut in Python.
+"""
+import re
+from collections import namedtuple
+from datetime import timedelta
+
+from markupsafe import escape
+from sqlalchemy import and_, func, or_, select
+
+from app import db
+from app.models import Blotter
+
+SEARCH_CONFIG = 'simple'
+
+# Control characters mark matches inside ts_headline output so the snippet
+# can be HTML-escaped before they are turned into <mark> tags
+_START, _STOP = '\x02', '\x03'
+HEADLINE_OPTIONS = f'StartSel={_START}, StopSel={_STOP}, MaxWords=30, MinWords=12, MaxFragments=2, FragmentDelimiter=" … "'
+
+SNIPPET_RADIUS = 80
+
+SearchResult = namedtuple(
+    'SearchResult',
+    'id case_title case_type status reported_at respondent_name location rank snippet',
+)
+
+
+def _highlight(text):
+    return str(escape(text)).replace(_START, '<mark>').replace(_STOP, '</mark>')
+
+
+def _filters(status, case_type, date_from, date_to):
+    criteria = []
+    if status:
+        criteria.append(Blotter.status == status)
+    if case_type:
+        criteria.append(Blotter.case_type == case_type)
+    if date_from:
+        criteria.append(Blotter.reported_at >= date_from)
+    if date_to:
+        # Inclusive end date as a half-open range so the index on reported_at applies
+        criteria.append(Blotter.reported_at < date_to + timedelta(days=1))
+    return criteria
+
+
+_COLUMNS = (
+    Blotter.id, Blotter.case_title, Blotter.case_type, Blotter.status,
+    Blotter.reported_at, Blotter.respondent_name, Blotter.location,
+)
+
+
+def _search_postgres(q, criteria, limit, offset):
+    tsquery = func.websearch_to_tsquery(SEARCH_CONFIG, q)
+    rank = func.ts_rank_cd(Blotter.search_vector, tsquery)
+    page = (
+        select(Blotter.id, rank.label('rank'))
+        .where(Blotter.search_vector.op('@@')(tsquery), *criteria)
+        .order_by(rank.desc(), Blotter.reported_at.desc())
+        .limit(limit)
+        .offset(offset)
+        .subquery()
+    )
+    # ts_headline re-parses the narrative, so only run it for the rows on this page
+    snippet = func.ts_headline(SEARCH_CONFIG, func.coalesce(Blotter.details, ''), tsquery, HEADLINE_OPTIONS)
+    rows = db.session.execute(
+        select(*_COLUMNS, page.c.rank, snippet.label('snippet'))
+        .join(page, page.c.id == Blotter.id)
+        .order_by(page.c.rank.desc(), Blotter.reported_at.desc())
+    ).all()
+    return [SearchResult(*row[:-1], _highlight(row.snippet)) for row in rows]
+
+
+def _snippet(details, words):
+    """A window of `details` around the first matched word, with matches marked."""
+    details = details or ''
+    lowered = details.lower()
+    hits = [lowered.find(w.lower()) for w in words]
+    first = min((h for h in hits if h >= 0), default=0)
+    start = max(0, first - SNIPPET_RADIUS)
+    end = min(len(details), first + SNIPPET_RADIUS)
+    window = details[start:end]
+    pattern = re.compile('|'.join(re.escape(w) for w in words), re.IGNORECASE)
+    marked = pattern.sub(lambda m: f'{_START}{m.group(0)}{_STOP}', window)
+    return ('… ' if start else '') + _highlight(marked) + (' …' if end < len(details) else '')
+
+
+def _search_fallback(q, criteria, limit, offset):
+    words = [w for w in re.findall(r'\w+', q) if len(w) > 1] or [q]
+    searched = (Blotter.case_title, Blotter.respondent_name, Blotter.details, Blotter.location)
+    matches = [or_(*(col.ilike(f'%{w}%') for col in searched)) for w in words]
+    rows = db.session.execute(
+        select(*_COLUMNS, Blotter.details)
+        .where(and_(*matches), *criteria)
+        .order_by(Blotter.reported_at.desc())
+        .limit(limit)
+        .offset(offset)
+    ).all()
+    return [SearchResult(*row[:-1], None, _snippet(row.details, words)) for row in rows]
+
+
+def search(q, status=None, case_type=None, date_from=None, date_to=None, limit=20, offset=0):
+    """Blotter cases matching `q`, best match first.
+
+    `date_from`/`date_to` are inclusive dates on ``reported_at``. Each
+    result's `snippet` is HTML-escaped narrative text with matches wrapped
+    in ``<mark>``; `rank` is None on the fallback path.
+    """
+    criteria = _filters(status, case_type, date_from, date_to)
+    if db.engine.dialect.name == 'postgresql':
+        return _search_postgres(q, criteria, limit, offset)
+    return _search_fallback(q, criteria, limit, offset)
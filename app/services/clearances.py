@@ -0,0 +1,233 @@
+"""Clearance processing: the request queue, batch approval/issuing and
+printable documents.
+
+Batch actions change many clearances with a single UPDATE. Printable
+documents are rendered from `_clearance_document.html` and cached on disk
+per clearance, so reprinting (or printing a morning's batch twice) skips
+template rendering. A cached document is keyed by a fingerprint of
+everything printed on it and is replaced when any of that changes.
+Each document carries a QR code with a signed verification link (see
+app/verification.py).
+"""
+import glob
+import hashlib
+import os
+from datetime import datetime
+
+import segno
+from flask import current_app, render_template, url_for
+from sqlalchemy import func, select, update
+
+from app import db
+from app.audit import record_bulk
+from app.models import Clearance, Resident, clearance_reference_no
+from app.services import officials as roster_service
+from app.verification import verifier
+
+QUEUE_STATUSES = ('Pending', 'Approved')
+
+# action -> (statuses it applies to, resulting status, timestamp column set)
+TRANSITIONS = {
+    'approve': (('Pending',), 'Approved', 'approved_at'),
+    'issue': (('Pending', 'Approved'), 'Issued', 'issued_at'),
+    # Revoked clearances fail QR verification (app/verification.py)
+    'revoke': (('Issued',), 'Revoked', 'revoked_at'),
+}
+
+MAX_BATCH_SIZE = 500
+
+# Bump when _clearance_document.html changes so cached documents are re-rendered
+DOCUMENT_VERSION = 3
+
+
+def queue_rows(statuses=QUEUE_STATUSES, clearance_type=None, limit=200, offset=0):
+    """Clearances awaiting action, oldest request first, as plain rows."""
+    stmt = (
+        select(
+            Clearance.id,
+            Clearance.clearance_type,
+            Clearance.purpose,
+            Clearance.status,
+            Clearance.requested_at,
+            Clearance.approved_at,
+            Clearance.resident_id,
+            Resident.first_name,
+            Resident.last_name,
+        )
+        .join(Resident, Clearance.resident_id == Resident.id)
+        .where(Clearance.status.in_(statuses))
+        .order_by(Clearance.requested_at, Clearance.id)
+        .limit(limit)
+        .offset(offset)
+    )
+    if clearance_type:
+        stmt = stmt.where(Clearance.clearance_type == clearance_type)
+    return db.session.execute(stmt).all()
+
+
+def queue_stats(now=None):
+    """Pending/approved totals and clearances issued this month, in one query."""
+    now = now or datetime.utcnow()
+    month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    pending, approved, issued_month = db.session.execute(
+        select(
+            func.count().filter(Clearance.status == 'Pending'),
+            func.count().filter(Clearance.status == 'Approved'),
+            func.count().filter(Clearance.status == 'Issued', Clearance.issued_at >= month_start),
+        )
+    ).one()
+    return {'pending': pending, 'approved': approved, 'issued_month': issued_month}
+
+
+def batch_transition(ids, action, now=None):
+    """Apply `action` to every clearance in `ids` that is in a valid state.
+
+    Runs one UPDATE and commits. Returns ``(updated_ids, timestamp)``;
+    clearances in the wrong state (e.g. already issued) are left untouched.
+    """
+    if action not in TRANSITIONS:
+        raise ValueError(f'Unknown clearance action {action!r}')
+    if len(ids) > MAX_BATCH_SIZE:
+        raise ValueError(f'At most {MAX_BATCH_SIZE} clearances can be processed at once')
+
+    allowed_from, new_status, stamped = TRANSITIONS[action]
+    now = now or datetime.utcnow()
+    values = {'status': new_status, stamped: now}
+    if action == 'issue':
+        values['approved_at'] = func.coalesce(Clearance.approved_at, now)
+
+    criteria = (Clearance.id.in_(ids), Clearance.status.in_(allowed_from))
+    options = {'synchronize_session': False}
+    if db.engine.dialect.name == 'postgresql':
+        # A self-join in UPDATE ... FROM sees the row as it was before the
+        # update, so one statement also returns the old status for the audit log
+        before = Clearance.__table__.alias('before')
+        stmt = (
+            update(Clearance)
+            .where(*criteria, before.c.id == Clearance.id)
+            .values(**values)
+            .returning(Clearance.id, before.c.status)
+        )
+        updated = db.session.execute(stmt, execution_options=options).all()
+    else:
+        updated = db.session.execute(
+            select(Clearance.id, Clearance.status).where(*criteria).with_for_update()
+        ).all()
+        if updated:
+            db.session.execute(
+                update(Clearance).where(Clearance.id.in_([row.id for row in updated])).values(**values),
+                execution_options=options,
+            )
+    # A bulk UPDATE bypasses the ORM audit hooks
+    record_bulk(db.session, 'update', 'clearances', [
+        (row.id, {'status': [row.status, new_status], stamped: [None, now]}) for row in updated
+    ])
+    db.session.commit()
+    if action == 'revoke':
+        verifier.revoke(row.id for row in updated)
+    return sorted(row.id for row in updated), now
+
+
+# -- printable documents -----------------------------------------------------
+
+def _cache_dir():
+    directory = current_app.config.get('CLEARANCE_DOCUMENT_CACHE_DIR') or os.path.join(
+        current_app.instance_path, 'clearance_documents'
+    )
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+
+def _fingerprint(row, signatories, verify_url):
+    parts = (
+        DOCUMENT_VERSION,
+        verify_url,
+        row.clearance_type,
+        row.purpose,
+        row.issued_at.isoformat(),
+        row.resident_updated_at.isoformat() if row.resident_updated_at else '',
+        tuple(signatories),
+    )
+    return hashlib.sha1(repr(parts).encode()).hexdigest()[:16]
+
+
+def _read_cached(path):
+    try:
+        with open(path, encoding='utf-8') as fh:
+            return fh.read()
+    except FileNotFoundError:
+        return None
+
+
+def _write_cached(directory, clearance_id, path, html):
+    # Drop documents rendered from older data for this clearance
+    for stale in glob.glob(os.path.join(directory, f'{clearance_id}-*.html')):
+        if stale != path:
+            try:
+                os.remove(stale)
+            except FileNotFoundError:
+                pass
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as fh:
+        fh.write(html)
+    os.replace(tmp_path, path)
+
+
+def document_rows(ids):
+    """Issued clearances in `ids` with the resident fields printed on them."""
+    stmt = (
+        select(
+            Clearance.id,
+            Clearance.clearance_type,
+            Clearance.purpose,
+            Clearance.requested_at,
+            Clearance.issued_at,
+            Clearance.resident_id,
+            Resident.first_name,
+            Resident.middle_name,
+            Resident.last_name,
+            Resident.address,
+            Resident.civil_status,
+            Resident.birth_date,
+            Resident.updated_at.label('resident_updated_at'),
+        )
+        .join(Resident, Clearance.resident_id == Resident.id)
+        .where(Clearance.id.in_(ids), Clearance.status == 'Issued')
+        .order_by(Clearance.id)
+    )
+    return db.session.execute(stmt).all()
+
+
+def verification_token(row):
+    """Signed token for the QR code on an issued clearance's document."""
+    return verifier.sign(row.id, row.resident_id, row.clearance_type, row.issued_at.date())
+
+
+def render_documents(ids):
+    """Return ``(documents, missing_ids)`` for the given clearance ids.
+
+    `documents` is a list of ``(row, html)`` in id order. Ids that do not
+    exist or are not issued yet are returned in `missing_ids`.
+    """
+    rows = document_rows(ids)
+    directory = _cache_dir()
+    documents = []
+    for row in rows:
+        # Signed by the officials serving on the issue date (served from the roster cache)
+        signatories = roster_service.signatories(row.issued_at.date())
+        verify_url = url_for('verify.clearance', token=verification_token(row), _external=True)
+        path = os.path.join(directory, f'{row.id}-{_fingerprint(row, signatories, verify_url)}.html')
+        html = _read_cached(path)
+        if html is None:
+            html = render_template(
+                '_clearance_document.html',
+                clearance=row,
+                signatories=signatories,
+                reference_no=clearance_reference_no(row.id, row.requested_at),
+                verify_url=verify_url,
+                verify_qr=segno.make(verify_url, error='m').svg_inline(scale=2, border=0),
+            )
+            _write_cached(directory, row.id, path, html)
+        documents.append((row, html))
+    found = {row.id for row in rows}
+    return documents, [i for i in ids if i not in found]
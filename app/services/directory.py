@@ -0,0 +1,149 @@
+"""The resident directory: a read model for the resident listing.
+
+``resident_directory`` holds one narrow row per resident (name, birth
+date, purok, household, head flag, status). The listing pages it by name
+from a covering index and never loads `Resident` entities.
+
+Rows are refreshed incrementally. Flush events collect the ids of
+residents that were inserted, deleted or changed in a listed column,
+and of heads gained or lost by households. When the flush ends, those
+rows are deleted and re-inserted from a SELECT over residents and
+households, in the same transaction. Core bulk inserts bypass the
+events; code using them calls `refresh` with the new ids.
+``flask directory rebuild`` regenerates the whole table.
+"""
+from collections import namedtuple
+from datetime import date
+
+from flask_sqlalchemy.pagination import Pagination
+from sqlalchemy import delete, event, inspect, insert, select
+from sqlalchemy.orm import Session, scoped_session
+
+from app import db, queries
+from app.models import Household, Resident, ResidentDirectory
+from app.utils import age
+
+PAGE_SIZE = 15
+
+# Resident columns copied into the directory; changing any of them refreshes the row
+LISTED_COLUMNS = ('first_name', 'last_name', 'birth_date', 'purok', 'household_id', 'status')
+
+_CHUNK = 1000
+_PENDING = 'directory_pending'
+
+Entry = namedtuple('Entry', 'id first_name last_name age purok household_id is_head status')
+
+
+def _source():
+    is_head = select(Household.id).where(Household.head_id == Resident.id).exists()
+    return select(Resident.id, *(getattr(Resident, c) for c in LISTED_COLUMNS), is_head)
+
+
+_TARGET = ['resident_id', *LISTED_COLUMNS, 'is_head']
+
+
+def refresh(session, resident_ids):
+    """Re-copy the given residents into the directory (dropping deleted ones)."""
+    if isinstance(session, scoped_session):
+        session = session()
+    ids = sorted(set(resident_ids))
+    conn = session.connection()
+    for start in range(0, len(ids), _CHUNK):
+        chunk = ids[start:start + _CHUNK]
+        conn.execute(delete(ResidentDirectory).where(ResidentDirectory.resident_id.in_(chunk)))
+        conn.execute(insert(ResidentDirectory).from_select(_TARGET, _source().where(Resident.id.in_(chunk))))
+
+
+def rebuild(session):
+    """Regenerate the whole directory; returns the number of rows."""
+    session.execute(delete(ResidentDirectory))
+    session.execute(insert(ResidentDirectory).from_select(_TARGET, _source()))
+    return session.scalar(select(db.func.count()).select_from(ResidentDirectory))
+
+
+class _EntryPagination(Pagination):
+    """Pagination over the directory whose items are `Entry` tuples.
+
+    Both queries are cached statements from app/queries.py, filtered by
+    the ``q``, ``purok`` and ``status`` arguments.
+    """
+
+    def _filters(self):
+        return self._query_args['q'], self._query_args['purok'], self._query_args['status']
+
+    def _query_items(self):
+        today = date.today()
+        return [
+            Entry(r.resident_id, r.first_name, r.last_name, age(r.birth_date, today),
+                  r.purok, r.household_id, r.is_head, r.status)
+            for r in queries.directory_page(*self._filters(), limit=self.per_page, offset=self._query_offset)
+        ]
+
+    def _query_count(self):
+        return queries.directory_count(*self._filters())
+
+
+def listing(page=1, q='', purok=None, status=None, per_page=PAGE_SIZE):
+    """A page of directory entries ordered by name.
+
+    Returns a Flask-SQLAlchemy pagination whose `items` are `Entry` tuples.
+    """
+    return _EntryPagination(q=q, purok=purok, status=status, page=page, per_page=per_page, error_out=False)
+
+
+# -- maintenance events --------------------------------------------------------
+
+def _note(session, *resident_ids):
+    session.info.setdefault(_PENDING, set()).update(i for i in resident_ids if i is not None)
+
+
+def _resident_written(mapper, connection, target):
+    _note(inspect(target).session, target.id)
+
+
+def _resident_updated(mapper, connection, target):
+    state = inspect(target)
+    if any(state.attrs[c].history.has_changes() for c in LISTED_COLUMNS):
+        _note(state.session, target.id)
+
+
+def _household_head_changed(mapper, connection, target):
+    history = inspect(target).attrs.head_id.history
+    _note(inspect(target).session, *history.added, *history.deleted)
+
+
+def _household_deleted(mapper, connection, target):
+    _note(inspect(target).session, target.head_id)
+
+
+def _apply_pending(session, flush_context):
+    pending = session.info.pop(_PENDING, None)
+    if pending:
+        refresh(session, pending)
+
+
+def _drop_stale(session, flush_context, instances):
+    # Left over only if the previous flush failed midway
+    session.info.pop(_PENDING, None)
+
+
+_events_registered = False
+
+
+def _register_events():
+    global _events_registered
+    if _events_registered:
+        return
+    event.listen(Resident, 'after_insert', _resident_written)
+    event.listen(Resident, 'after_update', _resident_updated)
+    event.listen(Resident, 'after_delete', _resident_written)
+    event.listen(Household, 'after_insert', _household_head_changed)
+    event.listen(Household, 'after_update', _household_head_changed)
+    event.listen(Household, 'before_delete', _household_deleted)
+    event.listen(Session, 'before_flush', _drop_stale)
+    event.listen(Session, 'after_flush_postexec', _apply_pending)
+    _events_registered = True
+
+
+def init_app(app):
+    _register_events()
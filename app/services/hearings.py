@@ -0,0 +1,210 @@
+"""Hearing scheduling for blotter cases.
+
+Each hearing occupies the interval [starts_at, ends_at) for its presiding
+official and its venue. Hearings are capped at MAX_HEARING_DURATION, so any
+hearing overlapping [start, end) must start inside
+(start - MAX_HEARING_DURATION, end). That turns the overlap check into a
+bounded range scan on the (official_id, starts_at) and (lower(venue),
+starts_at) indexes instead of a scan over every blotter or hearing. Venues
+are compared case-insensitively.
+"""
+import zlib
+from collections import namedtuple
+from datetime import datetime, time, timedelta
+
+from sqlalchemy import and_, func, or_, select, text
+
+from app import db
+from app.models import Blotter, Hearing, Official
+
+MAX_HEARING_DURATION = timedelta(hours=4)
+ACTIVE_STATUSES = ('Scheduled',)
+
+Slot = namedtuple('Slot', 'starts_at ends_at')
+
+
+class SchedulingError(ValueError):
+    """The requested hearing slot is invalid or already taken."""
+
+    def __init__(self, message, conflicts=()):
+        super().__init__(message)
+        self.conflicts = list(conflicts)
+
+
+def _resource_clause(official_id=None, venue=None):
+    clauses = []
+    if official_id is not None:
+        clauses.append(Hearing.official_id == official_id)
+    if venue:
+        # Same case folding as the venue lock in _lock_resources
+        clauses.append(func.lower(Hearing.venue) == venue.lower())
+    return or_(*clauses) if clauses else None
+
+
+def _window_clause(start, end):
+    """Active hearings overlapping [start, end), bounded for index range scans."""
+    return and_(
+        Hearing.status.in_(ACTIVE_STATUSES),
+        Hearing.starts_at > start - MAX_HEARING_DURATION,
+        Hearing.starts_at < end,
+        Hearing.ends_at > start,
+    )
+
+
+def find_conflicts(start, end, official_id=None, venue=None, exclude_id=None):
+    """Active hearings sharing the official or venue and overlapping [start, end)."""
+    resource = _resource_clause(official_id, venue)
+    if resource is None:
+        return []
+    stmt = select(Hearing).where(resource, _window_clause(start, end)).order_by(Hearing.starts_at)
+    if exclude_id is not None:
+        stmt = stmt.where(Hearing.id != exclude_id)
+    return db.session.execute(stmt).scalars().all()
+
+
+def _lock_resources(official_id, venue):
+    """Serialize concurrent scheduling for the same official/venue (Postgres only)."""
+    if db.session.get_bind().dialect.name != 'postgresql':
+        return
+    keys = []
+    if official_id is not None:
+        keys.append(f'official:{official_id}')
+    if venue:
+        keys.append(f'venue:{venue.lower()}')
+    for key in sorted(keys):
+        db.session.execute(text('SELECT pg_advisory_xact_lock(:k)'), {'k': zlib.crc32(key.encode())})
+
+
+def _sync_hearing_date(blotter):
+    """Point blotter.hearing_date at its next active hearing, or else its last one."""
+    active = [h.starts_at for h in blotter.hearings if h.status in ACTIVE_STATUSES]
+    now = datetime.now()
+    upcoming = [starts_at for starts_at in active if starts_at >= now]
+    blotter.hearing_date = min(upcoming) if upcoming else max(active, default=None)
+
+
+def schedule(blotter, starts_at, ends_at, official_id=None, venue=None, notes=None):
+    """Create a hearing for `blotter` and commit. Raises SchedulingError on conflict."""
+    if ends_at <= starts_at:
+        raise SchedulingError('Hearing must end after it starts')
+    if ends_at - starts_at > MAX_HEARING_DURATION:
+        raise SchedulingError(f'Hearings may last at most {MAX_HEARING_DURATION.seconds // 3600} hours')
+    if official_id is None and not venue:
+        raise SchedulingError('A presiding official or a venue is required')
+    if official_id is not None and db.session.get(Official, official_id) is None:
+        raise SchedulingError('Selected official not found')
+
+    _lock_resources(official_id, venue)
+    conflicts = find_conflicts(starts_at, ends_at, official_id, venue)
+    if conflicts:
+        db.session.rollback()
+        raise SchedulingError('The official or venue already has a hearing at that time', conflicts)
+
+    hearing = Hearing(
+        blotter=blotter,
+        official_id=official_id,
+        venue=venue or None,
+        starts_at=starts_at,
+        ends_at=ends_at,
+        notes=notes or None,
+    )
+    db.session.add(hearing)
+    _sync_hearing_date(blotter)
+    db.session.commit()
+    return hearing
+
+
+def cancel(hearing):
+    hearing.status = 'Cancelled'
+    _sync_hearing_date(hearing.blotter)
+    db.session.commit()
+
+
+def calendar(start, end, official_id=None, venue=None, include_cancelled=False):
+    """Hearings starting in [start, end) with case and official names, in one query."""
+    stmt = (
+        select(
+            Hearing.id,
+            Hearing.blotter_id,
+            Hearing.starts_at,
+            Hearing.ends_at,
+            Hearing.venue,
+            Hearing.status,
+            Hearing.official_id,
+            Official.first_name.label('official_first_name'),
+            Official.last_name.label('official_last_name'),
+            Blotter.case_title,
+            Blotter.status.label('case_status'),
+        )
+        .join(Blotter, Hearing.blotter_id == Blotter.id)
+        .outerjoin(Official, Hearing.official_id == Official.id)
+        .where(Hearing.starts_at >= start, Hearing.starts_at < end)
+        .order_by(Hearing.starts_at, Hearing.id)
+    )
+    if not include_cancelled:
+        stmt = stmt.where(Hearing.status != 'Cancelled')
+    resource = _resource_clause(official_id, venue)
+    if resource is not None:
+        stmt = stmt.where(resource)
+    return db.session.execute(stmt).all()
+
+
+def free_slots(day, duration, official_id=None, venue=None,
+               opens=time(8, 0), closes=time(17, 0), step=timedelta(minutes=30), limit=10):
+    """Start times on `day` when both the official and the venue are free.
+
+    Loads the busy intervals for the day in one indexed query, merges them
+    and walks the gaps; candidate starts are aligned to `step`.
+    """
+    day_start = datetime.combine(day, opens)
+    day_end = datetime.combine(day, closes)
+    resource = _resource_clause(official_id, venue)
+    busy = []
+    if resource is not None:
+        busy = db.session.execute(
+            select(Hearing.starts_at, Hearing.ends_at)
+            .where(resource, _window_clause(day_start, day_end))
+            .order_by(Hearing.starts_at)
+        ).all()
+
+    slots = []
+    candidate = day_start
+    for busy_start, busy_end in busy + [(day_end, day_end)]:
+        while candidate + duration <= busy_start and len(slots) < limit:
+            slots.append(Slot(candidate, candidate + duration))
+            candidate += step
+        if len(slots) >= limit:
+            break
+        if busy_end > candidate:
+            # Resume at the first step boundary at or after the busy interval
+            steps = -(-(busy_end - day_start) // step)
+            candidate = day_start + steps * step
+    return slots
+
+
+def due_on(day):
+    """Number of cases with an active hearing on `day`."""
+    start = datetime.combine(day, time.min)
+    return db.session.execute(
+        select(func.count(func.distinct(Hearing.blotter_id))).where(
+            Hearing.status.in_(ACTIVE_STATUSES),
+            Hearing.starts_at >= start,
+            Hearing.starts_at < start + timedelta(days=1),
+        )
+    ).scalar_one()
+
+
+def timeline(blotter):
+    """Chronological events for a case: the report and each hearing."""
+    events = [{'type': 'reported', 'at': blotter.reported_at, 'status': blotter.status}]
+    for hearing in blotter.hearings:
+        events.append({
+            'type': 'hearing',
+            'at': hearing.starts_at,
+            'ends_at': hearing.ends_at,
+            'hearing_id': hearing.id,
+            'status': hearing.status,
+            'venue': hearing.venue,
+            'official': hearing.official.full_name if hearing.official else None,
+        })
+    return sorted(events, key=lambda e: e['at'])
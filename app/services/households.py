@@ -0,0 +1,71 @@
+"""Loading a household with its members for the detail page.
+
+`load_detail` returns the household, its head and every member in one
+SELECT: households joined to the residents that either belong to it or
+head it. Ages are worked out in Python, and each member's clearance and
+blotter totals come from the counter columns (app/counters.py), so the
+template touches no relationships and issues no further queries however
+large the household is.
+"""
+from collections import namedtuple
+from datetime import date
+
+from sqlalchemy import or_, select
+
+from app import db
+from app.models import Household, Resident
+from app.utils import age
+
+Member = namedtuple(
+    'Member',
+    'id full_name sex birth_date age civil_status occupation voters_status status '
+    'is_head in_household clearance_count blotter_count',
+)
+
+HouseholdDetail = namedtuple('HouseholdDetail', 'household head members')
+
+_MEMBER_COLUMNS = (
+    Resident.id, Resident.first_name, Resident.middle_name, Resident.last_name, Resident.sex,
+    Resident.birth_date, Resident.civil_status, Resident.occupation, Resident.voters_status,
+    Resident.status, Resident.household_id, Resident.clearance_count, Resident.blotter_count,
+)
+
+
+def load_detail(household_id, today=None):
+    """The household, its head and its members, or None if it does not exist.
+
+    Members are ordered head first, then oldest to youngest. The head is
+    included even if their own household_id points elsewhere
+    (`in_household` is then False).
+    """
+    today = today or date.today()
+    rows = db.session.execute(
+        select(Household, *_MEMBER_COLUMNS)
+        .outerjoin(Resident, or_(Resident.household_id == Household.id, Resident.id == Household.head_id))
+        .where(Household.id == household_id)
+    ).all()
+    if not rows:
+        return None
+
+    household = rows[0].Household
+    members = [
+        Member(
+            id=r.id,
+            full_name=' '.join(filter(None, (r.first_name, r.middle_name, r.last_name))),
+            sex=r.sex,
+            birth_date=r.birth_date,
+            age=age(r.birth_date, today),
+            civil_status=r.civil_status,
+            occupation=r.occupation,
+            voters_status=r.voters_status,
+            status=r.status,
+            is_head=r.id == household.head_id,
+            in_household=r.household_id == household.id,
+            clearance_count=r.clearance_count,
+            blotter_count=r.blotter_count,
+        )
+        for r in rows if r.id is not None
+    ]
+    members.sort(key=lambda m: (not m.is_head, m.birth_date or date.max, m.id))
+    head = members[0] if members and members[0].is_head else None
+    return HouseholdDetail(household, head, members)
@@ -0,0 +1,234 @@
+"""Voters' masterlists: the registered voters of a purok or precinct, in
+print order, as an HTML print view or a PDF.
+
+A masterlist covers active residents whose voters_status is
+'Registered' (`VOTER_CONDITION`), sorted by last, first and middle name
+and numbered, ROWS_PER_PAGE to a page. Rows are read with a server-side
+cursor and each format is produced page by page, so a list of thousands
+of voters is streamed to the client without being built in memory.
+
+Generated documents are cached on disk. The cache key is a fingerprint
+of the list (how many voters are on it, the sum of their ids and the
+latest `updated_at` among them), taken with one aggregate query over the
+list's partial index; any edit, registration, move or removal that
+affects the list changes it. Documents are dated, so the date is part of
+the fingerprint too. A document is written to its cache file as it
+streams out and only kept if it was sent in full.
+"""
+import glob
+import hashlib
+import os
+import time
+from collections import namedtuple
+from datetime import date
+from itertools import islice
+
+from flask import current_app
+from sqlalchemy import func, select
+
+from app import db, pdf
+from app.models import Resident
+
+REGISTERED = 'Registered'
+GROUPINGS = ('purok', 'precinct')
+FORMATS = {'html': 'text/html; charset=utf-8', 'pdf': 'application/pdf'}
+ROWS_PER_PAGE = 40
+
+# Bump when either layout changes so cached documents are regenerated
+DOCUMENT_VERSION = 1
+
+# Superseded documents younger than this may still be being sent, so are kept
+STALE_GRACE_SECONDS = 600
+
+Masterlist = namedtuple('Masterlist', 'grouping value voters fingerprint today')
+Voter = namedtuple('Voter', 'number id name sex birth_date address purok precinct')
+Page = namedtuple('Page', 'number total voters')
+
+_CURSOR_BATCH = 500
+
+
+def _criteria(grouping, value):
+    if grouping not in GROUPINGS:
+        raise ValueError(f'Masterlists are grouped by {" or ".join(GROUPINGS)}, not {grouping!r}')
+    return (
+        Resident.voters_status == REGISTERED,
+        Resident.status == 'Active',
+        getattr(Resident, grouping) == value,
+    )
+
+
+def groups(grouping):
+    """``[(value, voters)]`` for every purok or precinct with registered voters."""
+    column = getattr(Resident, grouping)
+    stmt = (
+        select(column, func.count())
+        .where(Resident.voters_status == REGISTERED, Resident.status == 'Active', column.isnot(None))
+        .group_by(column)
+        .order_by(column)
+    )
+    return [tuple(row) for row in db.session.execute(stmt)]
+
+
+def prepare(grouping, value, today=None):
+    """The masterlist for a purok or precinct as of `today`: voter count and fingerprint."""
+    today = today or date.today()
+    voters, id_sum, last_updated = db.session.execute(
+        select(func.count(), func.sum(Resident.id), func.max(Resident.updated_at)).where(*_criteria(grouping, value))
+    ).one()
+    parts = (DOCUMENT_VERSION, ROWS_PER_PAGE, grouping, value, voters, id_sum,
+             last_updated.isoformat() if last_updated else '', today.isoformat())
+    return Masterlist(grouping, value, voters, hashlib.sha1(repr(parts).encode()).hexdigest()[:16], today)
+
+
+def page_count(masterlist):
+    return max(1, -(-masterlist.voters // ROWS_PER_PAGE))
+
+
+def voters(masterlist):
+    """Yield the list's `Voter` rows in print order, numbered from 1."""
+    stmt = (
+        select(Resident.id, Resident.first_name, Resident.middle_name, Resident.last_name, Resident.sex,
+               Resident.birth_date, Resident.address, Resident.purok, Resident.precinct)
+        .where(*_criteria(masterlist.grouping, masterlist.value))
+        .order_by(Resident.last_name, Resident.first_name, Resident.middle_name, Resident.id)
+        .execution_options(yield_per=_CURSOR_BATCH)
+    )
+    for number, r in enumerate(db.session.execute(stmt), 1):
+        name = f'{r.last_name}, {r.first_name}' + (f' {r.middle_name}' if r.middle_name else '')
+        yield Voter(number, r.id, name, r.sex, r.birth_date, r.address, r.purok, r.precinct)
+
+
+def pages(masterlist):
+    """Yield `Page`s of at most ROWS_PER_PAGE voters; always at least one."""
+    total = page_count(masterlist)
+    rows = voters(masterlist)
+    number = 0
+    while True:
+        chunk = list(islice(rows, ROWS_PER_PAGE))
+        if not chunk and number:
+            return
+        number += 1
+        yield Page(number, max(total, number), chunk)
+        if len(chunk) < ROWS_PER_PAGE:
+            return
+
+
+def label(grouping, value):
+    """How a list is named: purok names stand alone ('Purok 3', 'Sampaguita')."""
+    return value if grouping == 'purok' else f'Precinct {value}'
+
+
+def title(masterlist):
+    return f"Voters' Masterlist - {label(masterlist.grouping, masterlist.value)}"
+
+
+# -- output formats -----------------------------------------------------------
+
+def _html(masterlist):
+    template = current_app.jinja_env.get_template('masterlist_print.html')
+    stream = template.stream(
+        masterlist=masterlist,
+        title=title(masterlist),
+        heading=label(masterlist.grouping, masterlist.value),
+        pages=pages(masterlist),
+        today=masterlist.today,
+    )
+    # Hand the output on in page-sized pieces rather than per template fragment
+    stream.enable_buffering(ROWS_PER_PAGE * 8)
+    for text in stream:
+        yield text.encode('utf-8')
+
+
+# PDF layout, in points from the top-left of an A4 page
+_LEFT, _RIGHT = 36, 559
+_COLUMNS = (  # heading, x, max characters
+    ('No.', 36, 5), ('Name', 66, 42), ('Sex', 284, 6), ('Birth Date', 322, 10),
+    ('Address', 378, 30), ('Precinct', 522, 8),
+)
+_FIRST_ROW, _ROW_HEIGHT = 122, 17
+
+
+def _clip(text, width):
+    text = '' if text is None else str(text)
+    return text if len(text) <= width else text[:width - 1] + '...'
+
+
+def _pdf_page(masterlist, page, heading):
+    out = pdf.Page()
+    out.text(_LEFT, 48, "VOTERS' MASTERLIST", size=14, bold=True)
+    out.text(_LEFT, 66, heading, size=11)
+    out.text(_LEFT, 82, f'{masterlist.voters:,} registered voters - as of {masterlist.today:%B %d, %Y}', size=9)
+    out.text(480, 48, f'Page {page.number} of {page.total}', size=9)
+    for column, x, _ in _COLUMNS:
+        out.text(x, _FIRST_ROW - 16, column, bold=True)
+    out.line(_LEFT, _FIRST_ROW - 11, _RIGHT, _FIRST_ROW - 11)
+    for i, voter in enumerate(page.voters):
+        y = _FIRST_ROW + 4 + i * _ROW_HEIGHT
+        birth_date = voter.birth_date.strftime('%Y-%m-%d') if voter.birth_date else ''
+        values = (voter.number, voter.name, voter.sex, birth_date, voter.address, voter.precinct)
+        for (_, x, width), value in zip(_COLUMNS, values):
+            out.text(x, y, _clip(value, width))
+    if not page.voters:
+        out.text(_LEFT, _FIRST_ROW + 4, 'No registered voters.')
+    out.line(_LEFT, 806, _RIGHT, 806)
+    out.text(_LEFT, 818, 'Certified correct: ______________________________', size=8)
+    return out
+
+
+def _pdf(masterlist):
+    heading = label(masterlist.grouping, masterlist.value)
+    return pdf.render((_pdf_page(masterlist, page, heading) for page in pages(masterlist)), title(masterlist))
+
+
+_RENDERERS = {'html': _html, 'pdf': _pdf}
+
+
+# -- cache --------------------------------------------------------------------
+
+def _cache_dir():
+    directory = current_app.config.get('MASTERLIST_CACHE_DIR') or os.path.join(current_app.instance_path, 'masterlists')
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+
+def _cache_prefix(masterlist, fmt):
+    # Purok and precinct names are free text, so files are named by a hash of them
+    value_key = hashlib.sha1(masterlist.value.encode()).hexdigest()[:10]
+    return os.path.join(_cache_dir(), f'{masterlist.grouping}-{value_key}-{fmt}-')
+
+
+def cached_path(masterlist, fmt):
+    """Path of the cached document for this exact list, or None."""
+    path = f'{_cache_prefix(masterlist, fmt)}{masterlist.fingerprint}.{fmt}'
+    return path if os.path.exists(path) else None
+
+
+def generate(masterlist, fmt):
+    """Yield the document as byte chunks, caching it once fully sent.
+
+    Must run inside an app context (wrap with `stream_with_context` when
+    returned from a view).
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f'Unknown masterlist format {fmt!r}')
+    prefix = _cache_prefix(masterlist, fmt)
+    path = f'{prefix}{masterlist.fingerprint}.{fmt}'
+    tmp_path = f'{path}.{os.getpid()}.{id(masterlist)}.tmp'
+    try:
+        with open(tmp_path, 'wb') as fh:
+            for chunk in _RENDERERS[fmt](masterlist):
+                fh.write(chunk)
+                yield chunk
+        # Documents generated from older data for this list are no longer served
+        cutoff = time.time() - STALE_GRACE_SECONDS
+        for stale in glob.glob(f'{glob.escape(prefix)}*.{fmt}'):
+            try:
+                if stale != path and os.path.getmtime(stale) < cutoff:
+                    os.remove(stale)
+            except FileNotFoundError:
+                pass
+        os.replace(tmp_path, path)
+    finally:
+        # Left behind when the client disconnected or rendering failed
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
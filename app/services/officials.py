@@ -0,0 +1,135 @@
+"""The active roster of barangay officials, cached between term boundaries.
+
+The roster changes only on a term start or end date, or when an official
+is added, edited or removed. Each cache entry covers the date window
+[valid_from, valid_until) between two boundaries. A lookup for any date
+in that window is served from memory, so clearances and reports rendered
+on the same day share one query.
+
+Entries are stamped with the version of the ``officials`` namespace in
+the app cache (app/cache.py), which every commit writing to `officials`
+bumps. A lookup checks that version first, so with a shared cache
+backend a roster change made in one worker is seen by all of them.
+"""
+import threading
+from bisect import bisect_right
+from collections import OrderedDict, namedtuple
+from datetime import date, timedelta
+
+from sqlalchemy import select
+
+from app import db
+from app.cache import cache
+from app.models import Official
+
+Signatory = namedtuple('Signatory', 'id name position term_start term_end')
+
+# Positions printed on documents, in signature-block order
+SIGNATORY_POSITIONS = ('Punong Barangay', 'Barangay Secretary', 'Barangay Treasurer')
+
+# Position order on the roster; anything else sorts after these
+POSITION_ORDER = SIGNATORY_POSITIONS + ('Barangay Kagawad', 'SK Chairperson')
+
+
+def _position_rank(position):
+    try:
+        return POSITION_ORDER.index(position)
+    except ValueError:
+        return len(POSITION_ORDER)
+
+
+def _serves_on(official, day):
+    return ((official.term_start is None or official.term_start <= day)
+            and (official.term_end is None or official.term_end >= day))
+
+
+class RosterCache:
+    """Rosters keyed by the window of dates over which they are unchanged.
+
+    Windows are kept for one version of the ``officials`` namespace; a
+    lookup or store under a newer version discards them.
+    """
+
+    def __init__(self, max_windows=16):
+        self.max_windows = max_windows
+        self._windows = OrderedDict()  # valid_from -> (valid_until, roster)
+        self._version = None
+        self._lock = threading.Lock()
+
+    def _check_version(self, version):
+        if version != self._version:
+            self._windows.clear()
+            self._version = version
+
+    def get(self, day, version):
+        if version is None:
+            return None
+        with self._lock:
+            self._check_version(version)
+            for valid_from, (valid_until, roster) in self._windows.items():
+                if valid_from <= day < valid_until:
+                    self._windows.move_to_end(valid_from)
+                    return roster
+        return None
+
+    def put(self, valid_from, valid_until, roster, version):
+        if version is None:
+            return
+        with self._lock:
+            self._check_version(version)
+            self._windows[valid_from] = (valid_until, roster)
+            self._windows.move_to_end(valid_from)
+            while len(self._windows) > self.max_windows:
+                self._windows.popitem(last=False)
+
+
+roster_cache = RosterCache()
+
+
+def _load_window(day):
+    """Query active officials and return ``(valid_from, valid_until, roster)`` for `day`."""
+    officials = db.session.execute(
+        select(
+            Official.id, Official.first_name, Official.last_name,
+            Official.position, Official.term_start, Official.term_end,
+        ).where(Official.status == 'Active')
+    ).all()
+
+    # Dates on which someone joins or leaves the roster
+    boundaries = sorted(
+        {o.term_start for o in officials if o.term_start}
+        | {o.term_end + timedelta(days=1) for o in officials if o.term_end}
+    )
+    i = bisect_right(boundaries, day)
+    valid_from = boundaries[i - 1] if i else date.min
+    valid_until = boundaries[i] if i < len(boundaries) else date.max
+
+    roster = tuple(sorted(
+        (
+            Signatory(o.id, f'{o.first_name} {o.last_name}', o.position, o.term_start, o.term_end)
+            for o in officials if _serves_on(o, day)
+        ),
+        key=lambda s: (_position_rank(s.position), s.name),
+    ))
+    return valid_from, valid_until, roster
+
+
+def active_roster(day=None):
+    """Officials serving on `day` (default today), ordered by position."""
+    day = day or date.today()
+    # Read before loading: a change committed meanwhile leaves this entry stale-stamped
+    version = cache.version(Official.__tablename__)
+    roster = roster_cache.get(day, version)
+    if roster is None:
+        valid_from, valid_until, roster = _load_window(day)
+        roster_cache.put(valid_from, valid_until, roster, version)
+    return roster
+
+
+def signatories(day=None):
+    """The document signatories serving on `day`, in signature-block order."""
+    by_position = {}
+    for official in active_roster(day):
+        by_position.setdefault(official.position, official)
+    return [by_position[p] for p in SIGNATORY_POSITIONS if p in by_position]
+
@@ -0,0 +1,281 @@
+"""Creating records from the "New Record" form fields.
+
+Each `parse_*` function validates one record's form fields (the camelCase
+names used by the dashboard modal) and returns the column values to
+insert, or raises `RecordError`. They do no database work, so a batch can
+be validated up front and its lookups (duplicate residents, referenced
+residents) done with one query per kind instead of one per record.
+
+`create_batch` validates a list of mixed records and inserts them with one
+multi-row INSERT per record type, all in one transaction (SQLite cannot
+return ids in order from a multi-row INSERT, so there SQLAlchemy runs it
+row by row inside the same transaction). With
+``partial=True`` valid records are saved individually in savepoints and
+invalid ones are reported without failing the rest.
+"""
+from datetime import datetime
+
+from sqlalchemy import exc, func, insert, select
+
+from app import db
+from app.audit import record_bulk
+from app.counters import count_inserted
+from app.services import directory
+from app.models import Blotter, Clearance, Household, Resident
+
+MAX_BATCH_SIZE = 500
+
+DUPLICATE_RESIDENT = 'A resident with the same name and birth date already exists.'
+
+
+class RecordError(ValueError):
+    """A record that cannot be created; `status` is the HTTP status to report."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def _text(form, name):
+    # JSON bodies may carry numbers (e.g. "residentId": 5) where forms send strings
+    value = form.get(name)
+    return '' if value is None else str(value).strip()
+
+
+def parse_resident(form):
+    first_name = _text(form, 'firstName')
+    last_name = _text(form, 'lastName')
+    address = _text(form, 'address')
+    if not first_name or not last_name or not address:
+        raise RecordError('First name, last name, and address are required')
+
+    birth_date = None
+    if form.get('birthDate'):
+        try:
+            birth_date = datetime.strptime(form['birthDate'], '%Y-%m-%d').date()
+        except (TypeError, ValueError):
+            raise RecordError('Invalid birth date format') from None
+
+    return {
+        'first_name': first_name,
+        'middle_name': _text(form, 'middleName'),
+        'last_name': last_name,
+        'alias': _text(form, 'alias'),
+        'place_of_birth': _text(form, 'placeOfBirth'),
+        'birth_date': birth_date,
+        'civil_status': _text(form, 'civilStatus'),
+        'purok': _text(form, 'purok'),
+        'voters_status': _text(form, 'votersStatus'),
+        'precinct': _text(form, 'precinct') or None,
+        'identified_as': _text(form, 'identifiedAs'),
+        'email': _text(form, 'email'),
+        'occupation': _text(form, 'occupation'),
+        'citizenship': _text(form, 'citizenship'),
+        'sex': _text(form, 'sex'),
+        'address': address,
+        'contact_number': _text(form, 'contactNumber'),
+        'status': 'Active',
+    }
+
+
+def parse_household(form):
+    head_id = _text(form, 'headId')
+    address = _text(form, 'address')
+    if not head_id or not address:
+        raise RecordError('Head of Family and Address are required')
+    try:
+        head_id = int(head_id)
+    except ValueError:
+        raise RecordError('Selected Head of Family is not a valid resident') from None
+
+    monthly_income = None
+    if _text(form, 'monthlyIncome'):
+        try:
+            monthly_income = float(_text(form, 'monthlyIncome'))
+        except ValueError:
+            raise RecordError('Invalid monthly income format') from None
+
+    return {
+        'head_id': head_id,
+        'address': address,
+        'purok': _text(form, 'purok') or None,
+        'category': _text(form, 'category') or None,
+        'monthly_income': monthly_income,
+        'toilet_type': _text(form, 'toiletType') or None,
+        'remarks': _text(form, 'remarks') or None,
+    }
+
+
+def parse_blotter(form):
+    case_title = _text(form, 'caseTitle')
+    details = _text(form, 'details')
+    if not case_title or not details:
+        raise RecordError('Case title and details are required')
+    return {
+        'case_title': case_title,
+        'case_type': _text(form, 'caseType') or None,
+        'details': details,
+        'location': _text(form, 'location') or None,
+        'respondent_name': _text(form, 'respondentName') or None,
+        'status': 'Open',
+    }
+
+
+def parse_clearance(form):
+    clearance_type = _text(form, 'clearanceType')
+    purpose = _text(form, 'purpose')
+    resident_id = _text(form, 'residentId')
+    if not all([clearance_type, purpose, resident_id]):
+        raise RecordError('Clearance type, purpose, and resident are required')
+    try:
+        resident_id = int(resident_id)
+    except ValueError:
+        raise RecordError('Selected resident not found') from None
+    return {
+        'clearance_type': clearance_type,
+        'purpose': purpose,
+        'resident_id': resident_id,
+        'status': 'Pending',
+    }
+
+
+# record type -> (model, parser, message for a missing referenced resident, referencing column)
+RECORD_TYPES = {
+    'resident': (Resident, parse_resident, None, None),
+    'household': (Household, parse_household, 'Selected Head of Family is not a valid resident', 'head_id'),
+    'blotter': (Blotter, parse_blotter, None, None),
+    'clearance': (Clearance, parse_clearance, 'Selected resident not found', 'resident_id'),
+}
+
+
+def _resident_key(values):
+    return values['first_name'].lower(), values['last_name'].lower(), values['birth_date']
+
+
+def _existing_resident_keys(resident_values):
+    """(first, last, birth date) keys, lowercased, of residents already on file."""
+    if not resident_values:
+        return set()
+    rows = db.session.execute(
+        select(Resident.first_name, Resident.last_name, Resident.birth_date).where(
+            func.lower(Resident.first_name).in_({v['first_name'].lower() for v in resident_values}),
+            func.lower(Resident.last_name).in_({v['last_name'].lower() for v in resident_values}),
+        )
+    ).all()
+    return {(r.first_name.lower(), r.last_name.lower(), r.birth_date) for r in rows}
+
+
+def _existing_resident_ids(ids):
+    if not ids:
+        return set()
+    return set(db.session.scalars(select(Resident.id).where(Resident.id.in_(ids))))
+
+
+def validate_batch(records):
+    """Parse and check every record.
+
+    Returns a list of ``(record_type, values, error)``, one per record, in
+    order; exactly one of `values` and `error` is set. Runs two queries
+    however many records there are.
+    """
+    parsed = []
+    for record in records:
+        record_type = record.get('recordType') if isinstance(record, dict) else None
+        if record_type not in RECORD_TYPES:
+            parsed.append((record_type, None, 'Invalid record type'))
+            continue
+        try:
+            parsed.append((record_type, RECORD_TYPES[record_type][1](record), None))
+        except RecordError as e:
+            parsed.append((record_type, None, str(e)))
+
+    new_residents = [values for record_type, values, _ in parsed if record_type == 'resident' and values]
+    taken = _existing_resident_keys(new_residents)
+    referenced = {
+        values[RECORD_TYPES[record_type][3]]
+        for record_type, values, _ in parsed if values and RECORD_TYPES[record_type][3]
+    }
+    known_ids = _existing_resident_ids(referenced)
+
+    checked = []
+    for record_type, values, error in parsed:
+        if values is not None:
+            _, _, missing_message, reference = RECORD_TYPES[record_type]
+            if record_type == 'resident':
+                key = _resident_key(values)
+                if key in taken:
+                    values, error = None, DUPLICATE_RESIDENT
+                else:
+                    taken.add(key)  # also rejects a repeat later in the same batch
+            elif reference and values[reference] not in known_ids:
+                values, error = None, missing_message
+        checked.append((record_type, values, error))
+    return checked
+
+
+def _insert_many(model, rows):
+    """Insert `rows` with one statement and return their ids in order."""
+    if db.engine.dialect.insert_executemany_returning_sort_by_parameter_order:
+        stmt = insert(model).returning(model.id, sort_by_parameter_order=True)
+        ids = list(db.session.scalars(stmt, rows))
+        # Core inserts bypass the ORM audit and counter hooks
+        record_bulk(db.session, 'insert', model.__tablename__, zip(ids, rows))
+        count_inserted(db.session, model, rows)
+        if model is Resident:
+            directory.refresh(db.session, ids)
+        elif model is Household:
+            directory.refresh(db.session, [row['head_id'] for row in rows])
+        return ids
+    objects = [model(**row) for row in rows]
+    db.session.add_all(objects)
+    db.session.flush()
+    return [obj.id for obj in objects]
+
+
+def create_batch(records, partial=False):
+    """Validate and create `records` (dicts of form fields incl. ``recordType``).
+
+    Returns ``(created, results)`` where `results` holds one
+    ``{index, recordType, success, id | error}`` dict per record. Without
+    `partial` nothing is written unless every record is valid.
+    """
+    if len(records) > MAX_BATCH_SIZE:
+        raise RecordError(f'At most {MAX_BATCH_SIZE} records can be created at once')
+
+    checked = validate_batch(records)
+    results = [
+        {'index': i, 'recordType': record_type, 'success': values is not None,
+         **({'error': error} if error else {})}
+        for i, (record_type, values, error) in enumerate(checked)
+    ]
+    if not partial and any(values is None for _, values, _ in checked):
+        return 0, results
+
+    created = 0
+    if partial:
+        for result, (record_type, values, _) in zip(results, checked):
+            if values is None:
+                continue
+            try:
+                with db.session.begin_nested():
+                    result['id'] = _insert_many(RECORD_TYPES[record_type][0], [values])[0]
+                created += 1
+            except exc.IntegrityError:
+                result.update(success=False, error='Conflicts with an existing record')
+    else:
+        # Residents first: households and clearances may point at them
+        for record_type, (model, *_) in RECORD_TYPES.items():
+            indexes = [i for i, (t, _, _) in enumerate(checked) if t == record_type]
+            if not indexes:
+                continue
+            try:
+                ids = _insert_many(model, [checked[i][1] for i in indexes])
+            except exc.IntegrityError:
+                db.session.rollback()
+                # e.g. the same resident added by someone else meanwhile
+                raise RecordError('A record conflicts with existing data; nothing was saved', status=409)
+            for i, record_id in zip(indexes, ids):
+                results[i]['id'] = record_id
+            created += len(ids)
+    db.session.commit()
+    return created, results
@@ -0,0 +1,354 @@
+"""Delta sync for offline clients (census tablets).
+
+Clients pull change sets since an opaque cursor and push batched edits.
+
+Pull: each synced table is read in ``(updated_at, id)`` order after the
+client's position in that table, so a reconnecting device downloads only
+what changed. Rows are returned compactly as a column list plus value
+arrays. Deletes are reported from `sync_tombstones`, which a flush hook
+fills whenever a synced record is deleted through the ORM.
+
+A row is only handed out once its `updated_at` is older than
+``SYNC_SETTLE_SECONDS``. `updated_at` is set when a row is flushed, not
+when it commits, so a slow transaction can commit a timestamp earlier
+than rows other clients have already seen; holding back the newest
+seconds keeps the cursor from skipping past it.
+
+Push: each item is applied in its own savepoint, so one bad item does not
+reject the batch. Updates and deletes carry the `updated_at` the client
+last saw; when the server copy has changed since, the item is reported
+as a conflict together with the current server row and is not applied.
+"""
+import base64
+import binascii
+import json
+from collections import namedtuple
+from datetime import date, datetime, timedelta
+from decimal import Decimal, InvalidOperation
+
+from flask import current_app
+from sqlalchemy import and_, delete, event, insert, or_, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app import db
+from app.models import Blotter, Clearance, Household, Resident, SyncTombstone
+
+SyncEntity = namedtuple('SyncEntity', 'model fields editable')
+
+ENTITIES = {
+    'households': SyncEntity(
+        Household,
+        fields=('id', 'address', 'purok', 'category', 'monthly_income', 'toilet_type', 'remarks',
+                'head_id', 'updated_at'),
+        editable=('address', 'purok', 'category', 'monthly_income', 'toilet_type', 'remarks', 'head_id'),
+    ),
+    'residents': SyncEntity(
+        Resident,
+        fields=('id', 'first_name', 'middle_name', 'last_name', 'alias', 'place_of_birth', 'birth_date',
+                'civil_status', 'purok', 'voters_status', 'precinct', 'identified_as', 'email', 'occupation',
+                'citizenship', 'sex', 'address', 'contact_number', 'status', 'household_id', 'updated_at'),
+        editable=('first_name', 'middle_name', 'last_name', 'alias', 'place_of_birth', 'birth_date',
+                  'civil_status', 'purok', 'voters_status', 'precinct', 'identified_as', 'email', 'occupation',
+                  'citizenship', 'sex', 'address', 'contact_number', 'status', 'household_id'),
+    ),
+    'blotters': SyncEntity(
+        Blotter,
+        fields=('id', 'case_title', 'case_type', 'details', 'status', 'location', 'respondent_name',
+                'reported_at', 'hearing_date', 'reported_by_id', 'updated_at'),
+        # hearing_date mirrors the hearings table and is not edited directly
+        editable=('case_title', 'case_type', 'details', 'status', 'location', 'respondent_name',
+                  'reported_at', 'reported_by_id'),
+    ),
+    'clearances': SyncEntity(
+        Clearance,
+        fields=('id', 'clearance_type', 'purpose', 'status', 'requested_at', 'approved_at', 'issued_at',
+                'revoked_at', 'resident_id', 'updated_at'),
+        # Status changes go through the clearance queue
+        editable=('clearance_type', 'purpose', 'resident_id'),
+    ),
+}
+
+TOMBSTONES = '_deleted'
+CURSOR_VERSION = 1
+MAX_PUSH_ITEMS = 500
+
+# op -> permission required to push it
+OP_PERMISSIONS = {'create': 'records.create', 'update': 'records.edit', 'delete': 'records.delete'}
+
+
+class SyncError(ValueError):
+    """A malformed sync request."""
+
+
+# -- cursors -----------------------------------------------------------------
+
+def encode_cursor(positions):
+    payload = {'v': CURSOR_VERSION}
+    payload.update({name: [ts.isoformat(), record_id] for name, (ts, record_id) in positions.items()})
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(',', ':')).encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Return ``{table: (updated_at, id)}`` for a cursor string (empty for a first sync)."""
+    if not token:
+        return {}
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+        version = payload.pop('v', None)
+        positions = {
+            name: (datetime.fromisoformat(ts), int(record_id))
+            for name, (ts, record_id) in payload.items()
+            if name in ENTITIES or name == TOMBSTONES
+        }
+    except (binascii.Error, UnicodeDecodeError, AttributeError, TypeError, ValueError) as e:
+        raise SyncError('Invalid sync cursor') from e
+    if version != CURSOR_VERSION:
+        raise SyncError('Cursor is from an incompatible version; start a full sync')
+    return positions
+
+
+def _after(columns, position):
+    """Keyset predicate: rows strictly after `position` in (timestamp, id) order."""
+    ts_col, id_col = columns
+    ts, record_id = position
+    return or_(ts_col > ts, and_(ts_col == ts, id_col > record_id))
+
+
+# -- pull --------------------------------------------------------------------
+
+def _jsonable(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def _row_values(entity, obj):
+    return [_jsonable(getattr(obj, field)) for field in entity.fields]
+
+
+def pull(token=None, limit=None, now=None):
+    """Changes after the position in `token`, at most `limit` rows per table.
+
+    Returns a dict with ``changes`` (per table: ``columns`` and ``rows``),
+    ``deleted`` (per table: ids), the next ``cursor`` and ``more`` when a
+    table had more rows than `limit`. ``reset`` is set instead when the
+    cursor predates the tombstone retention window; the client must then
+    discard its copy and sync from scratch.
+    """
+    config = current_app.config
+    limit = min(limit or config['SYNC_PAGE_SIZE'], config['SYNC_MAX_PAGE_SIZE'])
+    now = now or datetime.utcnow()
+    horizon = now - timedelta(seconds=config['SYNC_SETTLE_SECONDS'])
+    positions = decode_cursor(token)
+
+    retained_from = now - timedelta(days=config['SYNC_TOMBSTONE_RETENTION_DAYS'])
+    if TOMBSTONES in positions and positions[TOMBSTONES][0] < retained_from:
+        return {'reset': True}
+
+    changes, more = {}, False
+    for name, entity in ENTITIES.items():
+        model = entity.model
+        stmt = (
+            select(*(getattr(model, f) for f in entity.fields))
+            .where(model.updated_at <= horizon)
+            .order_by(model.updated_at, model.id)
+            .limit(limit + 1)
+        )
+        if name in positions:
+            stmt = stmt.where(_after((model.updated_at, model.id), positions[name]))
+        rows = db.session.execute(stmt).all()
+        if len(rows) > limit:
+            rows, more = rows[:limit], True
+        if rows:
+            positions[name] = (rows[-1].updated_at, rows[-1].id)
+            changes[name] = {'columns': list(entity.fields), 'rows': [[_jsonable(v) for v in r] for r in rows]}
+
+    deleted = {}
+    if TOMBSTONES not in positions:
+        # First sync: everything deleted so far is already absent from the pull
+        positions[TOMBSTONES] = (horizon, 0)
+    else:
+        stmt = (
+            select(SyncTombstone.id, SyncTombstone.entity, SyncTombstone.record_id, SyncTombstone.deleted_at)
+            .where(SyncTombstone.deleted_at <= horizon, _after((SyncTombstone.deleted_at, SyncTombstone.id),
+                                                                 positions[TOMBSTONES]))
+            .order_by(SyncTombstone.deleted_at, SyncTombstone.id)
+            .limit(limit + 1)
+        )
+        tombstones = db.session.execute(stmt).all()
+        truncated = len(tombstones) > limit
+        for t in tombstones[:limit]:
+            deleted.setdefault(t.entity, []).append(t.record_id)
+        if truncated:
+            more = True
+            positions[TOMBSTONES] = (tombstones[limit - 1].deleted_at, tombstones[limit - 1].id)
+        else:
+            # Everything up to the horizon has been seen; moving the cursor
+            # there keeps it inside the retention window on quiet systems
+            last = (tombstones[-1].deleted_at, tombstones[-1].id) if tombstones else positions[TOMBSTONES]
+            positions[TOMBSTONES] = max(last, (horizon, 0))
+
+    return {
+        'changes': changes,
+        'deleted': deleted,
+        'cursor': encode_cursor(positions),
+        'more': more,
+        'reset': False,
+    }
+
+
+# -- push --------------------------------------------------------------------
+
+def _coerce(column, value):
+    """Convert a JSON value to the Python type of `column`; raises ValueError."""
+    if value is None or value == '':
+        if not column.nullable:
+            raise ValueError(f'{column.name} is required')
+        return None
+    python_type = column.type.python_type
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is date:
+        return date.fromisoformat(value)
+    if python_type is Decimal:
+        try:
+            return Decimal(str(value))
+        except InvalidOperation:
+            raise ValueError(f'{column.name} must be a number') from None
+    if python_type is int:
+        return int(value)
+    value = str(value).strip()
+    length = getattr(column.type, 'length', None)
+    if length and len(value) > length:
+        raise ValueError(f'{column.name} is longer than {length} characters')
+    return value
+
+
+def _apply_fields(entity, obj, fields):
+    table = entity.model.__table__
+    unknown = set(fields) - set(entity.editable)
+    if unknown:
+        raise ValueError(f'Fields not editable: {", ".join(sorted(unknown))}')
+    for field, value in fields.items():
+        setattr(obj, field, _coerce(table.c[field], value))
+
+
+def _load_targets(items):
+    """Fetch every record updated or deleted by `items`, one query per table."""
+    wanted = {}
+    for item in items:
+        if item.get('op') in ('update', 'delete') and item.get('entity') in ENTITIES:
+            try:
+                wanted.setdefault(item['entity'], set()).add(int(item['id']))
+            except (KeyError, TypeError, ValueError):
+                continue
+    targets = {}
+    for name, ids in wanted.items():
+        model = ENTITIES[name].model
+        for obj in db.session.scalars(select(model).where(model.id.in_(ids)).with_for_update()):
+            targets[name, obj.id] = obj
+    return targets
+
+
+def _push_item(item, targets, can):
+    op, name = item.get('op'), item.get('entity')
+    if op not in OP_PERMISSIONS:
+        raise ValueError('op must be create, update or delete')
+    if name not in ENTITIES:
+        raise ValueError(f'Unknown entity {name!r}')
+    if not can(OP_PERMISSIONS[op]):
+        return {'status': 'forbidden'}
+    entity = ENTITIES[name]
+    fields = item.get('fields') or {}
+    if not isinstance(fields, dict):
+        raise ValueError('fields must be an object')
+
+    if op == 'create':
+        table = entity.model.__table__
+        missing = [f for f in entity.editable
+                   if f not in fields and not table.c[f].nullable and table.c[f].default is None]
+        if missing:
+            raise ValueError(f'Required: {", ".join(missing)}')
+        obj = entity.model()
+        _apply_fields(entity, obj, fields)
+        db.session.add(obj)
+        db.session.flush()
+        return {'status': 'applied', 'id': obj.id, 'updated_at': obj.updated_at.isoformat()}
+
+    obj = targets.get((name, int(item.get('id') or 0)))
+    if obj is None:
+        return {'status': 'not_found'}
+    if not item.get('base_updated_at'):
+        raise ValueError('base_updated_at is required')
+    if obj.updated_at != datetime.fromisoformat(item['base_updated_at']):
+        return {'status': 'conflict', 'current': dict(zip(entity.fields, _row_values(entity, obj)))}
+
+    if op == 'delete':
+        db.session.delete(obj)
+        db.session.flush()
+        return {'status': 'applied'}
+    _apply_fields(entity, obj, fields)
+    db.session.flush()
+    return {'status': 'applied', 'updated_at': obj.updated_at.isoformat()}
+
+
+def push(items, can):
+    """Apply a batch of client edits and commit once.
+
+    Each item is ``{op, entity, id?, base_updated_at?, fields?, ref?}``;
+    `can` is a permission check such as ``current_user.can``. Returns one
+    result per item, in order, echoing the client's `ref`. Status is
+    ``applied``, ``conflict``, ``not_found``, ``forbidden`` or ``error``.
+    """
+    if not isinstance(items, list):
+        raise SyncError('changes must be a list')
+    if len(items) > MAX_PUSH_ITEMS:
+        raise SyncError(f'At most {MAX_PUSH_ITEMS} changes can be pushed at once')
+
+    targets = _load_targets([item for item in items if isinstance(item, dict)])
+    results = []
+    for item in items:
+        ref = item.get('ref') if isinstance(item, dict) else None
+        savepoint = db.session.begin_nested()
+        try:
+            if not isinstance(item, dict):
+                raise ValueError('Each change must be an object')
+            result = _push_item(item, targets, can)
+            savepoint.commit()
+        except (ValueError, TypeError, IntegrityError) as e:
+            savepoint.rollback()
+            message = 'Conflicts with existing data' if isinstance(e, IntegrityError) else str(e)
+            result = {'status': 'error', 'error': message}
+        result['ref'] = ref
+        results.append(result)
+    db.session.commit()
+    return results
+
+
+# -- tombstones --------------------------------------------------------------
+
+_TABLES = {entity.model: name for name, entity in ENTITIES.items()}
+
+
+def _record_tombstones(session, flush_context):
+    rows = [
+        {'entity': _TABLES[type(obj)], 'record_id': obj.id, 'deleted_at': datetime.utcnow()}
+        for obj in session.deleted if type(obj) in _TABLES
+    ]
+    if rows:
+        session.connection().execute(insert(SyncTombstone), rows)
+
+
+def prune_tombstones(now=None):
+    """Delete tombstones older than the retention window. Returns the number removed."""
+    now = now or datetime.utcnow()
+    cutoff = now - timedelta(days=current_app.config['SYNC_TOMBSTONE_RETENTION_DAYS'])
+    result = db.session.execute(delete(SyncTombstone).where(SyncTombstone.deleted_at < cutoff))
+    db.session.commit()
+    return result.rowcount
+
+
+event.listen(Session, 'after_flush', _record_tombstones)
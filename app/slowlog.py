@@ -0,0 +1,324 @@
+"""Slow-query log with automatic query plans.
+
+Engine cursor events time every statement. One that takes longer than
+``SLOW_QUERY_THRESHOLD_MS`` is recorded with its parameters, the route
+and user that ran it, and its query plan:
+
+- PostgreSQL: ``EXPLAIN (ANALYZE, BUFFERS)``. ANALYZE executes the
+  statement again, so it is only done for SELECTs, inside a transaction
+  that is rolled back, under ``SLOW_QUERY_EXPLAIN_TIMEOUT_MS``. SELECTs
+  that take locks (``FOR UPDATE``/``FOR SHARE``, advisory locks) get a
+  plain ``EXPLAIN``: running them again would queue behind the very
+  transaction that was slow.
+- SQLite: ``EXPLAIN QUERY PLAN``.
+
+Recording happens on a background thread, with the plan taken on a
+separate pooled connection, so the slow request is not made slower.
+Each fingerprint is explained at most once per
+``SLOW_QUERY_EXPLAIN_INTERVAL`` seconds in each worker. When the queue
+is full, samples are dropped.
+
+Statements are grouped by fingerprint: the SQL with whitespace
+collapsed, literals and parameters replaced by ``?`` and IN lists by
+``(...)``. ``slow_queries`` keeps the totals per fingerprint;
+``slow_query_samples`` keeps each execution. Parameters are redacted
+before they are stored: numbers are kept, text keeps only its LIKE
+wildcards (``'%santos%'`` becomes ``'%?%'``, which still shows a
+leading-wildcard scan), and dates and anything else are masked. The
+query string of the URL is not stored either.
+
+``flask slowlog report`` lists the worst fingerprints, ``flask slowlog
+show`` a fingerprint's latest sample and plan, and ``flask slowlog
+prune`` deletes old samples.
+"""
+import hashlib
+import logging
+import os
+import queue
+import re
+import threading
+import time
+from contextvars import ContextVar
+from datetime import datetime
+from decimal import Decimal
+
+from flask import g, has_request_context, request
+from sqlalchemy import case, delete, event, insert, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+
+logger = logging.getLogger(__name__)
+
+_STARTED = 'slowlog_started'
+
+# Set in the writer thread so its own statements are not timed
+_internal = ContextVar('slowlog_internal', default=False)
+
+_events_registered = False
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_PARAM = re.compile(r"%\(\w+\)s|%s|\?|(?<![:\w]):\w+")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+_SPACE = re.compile(r"\s+")
+_NOT_WILDCARD = re.compile(r"[^%_]+")
+_READ_ONLY = re.compile(r"^\s*(SELECT|WITH)\b", re.IGNORECASE)
+_WRITES = re.compile(r"\b(INSERT|UPDATE|DELETE|MERGE)\b", re.IGNORECASE)
+_LOCKS = re.compile(r"\bFOR\s+(NO\s+KEY\s+)?(UPDATE|SHARE|KEY\s+SHARE)\b|\bpg_(try_)?advisory_", re.IGNORECASE)
+
+MAX_STATEMENT_LENGTH = 20000
+
+
+def normalize(statement):
+    """`statement` with literals, parameters and IN lists made generic."""
+    text = _STRING.sub('?', statement)
+    text = _PARAM.sub('?', text)
+    text = _NUMBER.sub('?', text)
+    text = _IN_LIST.sub('IN (...)', text)
+    return _SPACE.sub(' ', text).strip()
+
+
+def fingerprint(statement):
+    """(normalized statement, its SHA-1 hex digest)."""
+    normalized = normalize(statement)
+    return normalized, hashlib.sha1(normalized.encode()).hexdigest()
+
+
+def redact(value):
+    """A JSON-safe copy of statement parameters with personal data masked."""
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, str):
+        return _NOT_WILDCARD.sub('?', value)
+    if isinstance(value, dict):
+        return {str(k): redact(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [redact(v) for v in value]
+    return f'<{type(value).__name__}>'
+
+
+def _caller():
+    """(endpoint, method, path, user id) of the current request, if any."""
+    if not has_request_context():
+        return None, None, None, None
+    # Only a user Flask-Login has already loaded: loading one here would run a query
+    user = g.get('_login_user')
+    return request.endpoint, request.method, request.path[:255], getattr(user, 'id', None)
+
+
+class SlowQueryLog:
+    """Flask extension recording statements slower than a threshold."""
+
+    def __init__(self, app=None):
+        self.app = None
+        self.enabled = False
+        self.threshold = 0.2
+        self._queue = queue.Queue()
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._explained = {}  # fingerprint -> monotonic time of the last plan
+        self.dropped = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('SLOW_QUERY_LOG_ENABLED', True)
+        app.config.setdefault('SLOW_QUERY_THRESHOLD_MS', 200)
+        app.config.setdefault('SLOW_QUERY_EXPLAIN', True)
+        app.config.setdefault('SLOW_QUERY_EXPLAIN_INTERVAL', 3600)
+        app.config.setdefault('SLOW_QUERY_EXPLAIN_TIMEOUT_MS', 10000)
+        app.config.setdefault('SLOW_QUERY_MAX_QUEUE', 1000)
+        app.config.setdefault('SLOW_QUERY_RETENTION_DAYS', 30)
+        self.app = app
+        self.enabled = app.config['SLOW_QUERY_LOG_ENABLED']
+        self.threshold = app.config['SLOW_QUERY_THRESHOLD_MS'] / 1000
+        self._queue = queue.Queue(app.config['SLOW_QUERY_MAX_QUEUE'])
+        app.extensions['slowlog'] = self
+        if self.enabled:
+            _register_events()
+
+    def submit(self, statement, parameters, executemany, duration):
+        endpoint, method, path, user_id = _caller()
+        sample = {
+            'statement': statement,
+            'parameters': parameters,  # unredacted: only used for EXPLAIN, never stored
+            'executemany': executemany,
+            'duration_ms': round(duration * 1000, 3),
+            'occurred_at': datetime.utcnow(),
+            'endpoint': endpoint,
+            'method': method,
+            'path': path,
+            'user_id': user_id,
+        }
+        try:
+            self._queue.put_nowait(sample)
+        except queue.Full:
+            self.dropped += 1
+            if self.dropped % 100 == 1:
+                logger.warning('Slow-query queue is full; %d samples dropped so far', self.dropped)
+            return
+        self._ensure_thread()
+
+    def flush(self):
+        """Wait until every queued sample has been written."""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.join()
+
+    def _ensure_thread(self):
+        # Threads do not survive fork(); a forked worker starts its own
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive() or self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name='slow-query-log', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        _internal.set(True)
+        while True:
+            sample = self._queue.get()
+            try:
+                with self.app.app_context():
+                    self._record(sample)
+            except Exception:
+                logger.exception('Recording a slow query failed')
+            finally:
+                self._queue.task_done()
+
+    def _record(self, sample):
+        normalized, digest = fingerprint(sample['statement'])
+        plan = self._plan(digest, sample)
+        row = {
+            'fingerprint': digest,
+            'occurred_at': sample['occurred_at'],
+            'duration_ms': sample['duration_ms'],
+            'statement': sample['statement'][:MAX_STATEMENT_LENGTH],
+            'params': redact(sample['parameters'][:1] if sample['executemany'] else sample['parameters']),
+            'endpoint': sample['endpoint'],
+            'method': sample['method'],
+            'path': sample['path'],
+            'user_id': sample['user_id'],
+            'plan': plan,
+        }
+        from .models import SlowQuery, SlowQuerySample
+
+        duration, now = sample['duration_ms'], sample['occurred_at']
+        for attempt in range(2):
+            try:
+                with db.engine.begin() as conn:
+                    conn.execute(insert(SlowQuerySample.__table__), row)
+                    updated = conn.execute(
+                        update(SlowQuery.__table__)
+                        .where(SlowQuery.fingerprint == digest)
+                        .values(
+                            calls=SlowQuery.calls + 1,
+                            total_ms=SlowQuery.total_ms + duration,
+                            max_ms=case((SlowQuery.max_ms < duration, duration), else_=SlowQuery.max_ms),
+                            last_seen=now,
+                        )
+                    ).rowcount
+                    if not updated:
+                        conn.execute(insert(SlowQuery.__table__), {
+                            'fingerprint': digest, 'statement': normalized[:MAX_STATEMENT_LENGTH],
+                            'calls': 1, 'total_ms': duration, 'max_ms': duration,
+                            'first_seen': now, 'last_seen': now,
+                        })
+                return
+            except IntegrityError:
+                # Another worker inserted the same fingerprint first; update it instead
+                if attempt:
+                    raise
+
+    # -- query plans ---------------------------------------------------------
+
+    def _plan(self, digest, sample):
+        config = self.app.config
+        if not config['SLOW_QUERY_EXPLAIN'] or sample['executemany']:
+            return None
+        statement = sample['statement']
+        if not _READ_ONLY.match(statement) or _WRITES.search(_LOCKS.sub('', statement)):
+            return None
+        last = self._explained.get(digest)
+        if last is not None and time.monotonic() - last < config['SLOW_QUERY_EXPLAIN_INTERVAL']:
+            return None
+        self._explained[digest] = time.monotonic()
+
+        parameters = sample['parameters'] or None
+        try:
+            # Closing the connection rolls back whatever EXPLAIN ANALYZE did
+            with db.engine.connect() as conn:
+                dialect = conn.dialect.name
+                if dialect == 'postgresql':
+                    conn.exec_driver_sql(f"SET LOCAL statement_timeout = {int(config['SLOW_QUERY_EXPLAIN_TIMEOUT_MS'])}")
+                    options = '' if _LOCKS.search(statement) else ' (ANALYZE, BUFFERS)'
+                    rows = conn.exec_driver_sql(f'EXPLAIN{options} {statement}', parameters)
+                    return '\n'.join(row[0] for row in rows)
+                if dialect == 'sqlite':
+                    rows = conn.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters)
+                    return _sqlite_plan(rows)
+                return None
+        except Exception as exc:
+            logger.warning('Could not explain slow query %s: %s', digest[:12], exc)
+            return None
+
+
+def _sqlite_plan(rows):
+    """EXPLAIN QUERY PLAN rows (id, parent, notused, detail) as an indented tree."""
+    depth = {0: -1}
+    lines = []
+    for node_id, parent, _, detail in rows:
+        depth[node_id] = depth.get(parent, -1) + 1
+        lines.append('  ' * depth[node_id] + detail)
+    return '\n'.join(lines)
+
+
+slowlog = SlowQueryLog()
+
+
+# -- timing ------------------------------------------------------------------
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault(_STARTED, []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get(_STARTED)
+    if not starts:
+        return
+    duration = time.perf_counter() - starts.pop()
+    if duration >= slowlog.threshold and slowlog.enabled and not _internal.get():
+        slowlog.submit(statement, parameters, executemany, duration)
+
+
+def _discard_on_error(context):
+    # A failed statement never reaches after_cursor_execute
+    starts = context.connection.info.get(_STARTED) if context.connection is not None else None
+    if starts:
+        starts.pop()
+
+
+def _register_events():
+    global _events_registered
+    if _events_registered:
+        return
+    event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+    event.listen(Engine, 'handle_error', _discard_on_error)
+    _events_registered = True
+
+
+# -- maintenance -------------------------------------------------------------
+
+def prune(session, before):
+    """Delete samples recorded before `before`, and totals last seen before it."""
+    from .models import SlowQuery, SlowQuerySample
+
+    samples = session.execute(delete(SlowQuerySample).where(SlowQuerySample.occurred_at < before)).rowcount
+    session.execute(delete(SlowQuery).where(SlowQuery.last_seen < before))
+    return samples
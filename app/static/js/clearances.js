@@ -0,0 +1,56 @@
+// Clearance queue - batch selection, approve/issue (issuing opens the print view)
+const selectAll = document.getElementById('selectAll');
+const selectedCount = document.getElementById('selectedCount');
+const batchButtons = document.querySelectorAll('[data-batch-action]');
+
+function selectedIds() {
+    return Array.from(document.querySelectorAll('.row-select:checked')).map(cb => Number(cb.value));
+}
+
+function updateSelection() {
+    const count = selectedIds().length;
+    selectedCount.textContent = `${count} selected`;
+    batchButtons.forEach(btn => { btn.disabled = count === 0; });
+}
+
+if (selectAll) {
+    selectAll.addEventListener('change', () => {
+        document.querySelectorAll('.row-select').forEach(cb => { cb.checked = selectAll.checked; });
+        updateSelection();
+    });
+}
+
+document.querySelectorAll('.row-select').forEach(cb => cb.addEventListener('change', updateSelection));
+
+async function runBatch(action) {
+    const ids = selectedIds();
+    if (ids.length === 0) return;
+
+    batchButtons.forEach(btn => { btn.disabled = true; });
+    try {
+        const response = await fetch('/api/clearances/batch', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ action, ids })
+        });
+        const result = await response.json();
+        if (!response.ok) {
+            alert(result.error || 'Failed to update clearances');
+            return;
+        }
+        if (result.skipped.length) {
+            alert(`${result.updated.length} updated, ${result.skipped.length} skipped (already processed).`);
+        }
+        if (action === 'issue' && result.updated.length) {
+            window.open(`/clearances/print?ids=${result.updated.join(',')}`, '_blank');
+        }
+        window.location.reload();
+    } catch (error) {
+        console.error('Batch update failed:', error);
+        alert('An unexpected error occurred. Please try again.');
+    } finally {
+        updateSelection();
+    }
+}
+
+batchButtons.forEach(btn => btn.addEventListener('click', () => runBatch(btn.dataset.batchAction)));
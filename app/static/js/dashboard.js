@@ -288,6 +288,7 @@ class DashboardManager {
         }
     }
 
+    // Blotter snippets arrive HTML-escaped from the server, with matches in <mark>
     displaySearchResults(results) {
         const container = document.getElementById('searchResults');
         if (!container) return;
@@ -324,6 +325,7 @@ class DashboardManager {
                 <div class="info">
                     <div class="title">${title}</div>
                     <div class="sub">${sub}</div>
+                    ${item.snippet ? `<div class="snippet">${item.snippet}</div>` : ''}
                 </div>
                 <span class="type-badge ${typeClass}">${item.type}</span>
             `;
@@ -415,13 +417,15 @@ class DashboardManager {
             modal.style.display = 'block';
             this.bindFormEvents();
             
-            // Show a loading state for the select dropdown
+            // Record types are rendered into the page; fetch them only if missing
             const recordTypeSelect = document.getElementById('recordType');
-            recordTypeSelect.innerHTML = '<option>Loading types...</option>';
-            recordTypeSelect.disabled = true;
+            if (recordTypeSelect.options.length <= 1) {
+                recordTypeSelect.innerHTML = '<option>Loading types...</option>';
+                recordTypeSelect.disabled = true;
 
-            await this.loadRecordTypes(); // Await the loading
-            recordTypeSelect.disabled = false;
+                await this.loadRecordTypes(); // Await the loading
+                recordTypeSelect.disabled = false;
+            }
 
             if (recordType) {
                 recordTypeSelect.value = recordType;
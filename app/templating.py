@@ -0,0 +1,76 @@
+"""Jinja bytecode cache and cached template fragments.
+
+Compiled templates are written to ``JINJA_BYTECODE_CACHE_DIR`` (default
+``instance/jinja_bytecode``), so a fresh worker loads them instead of
+parsing and compiling every template again. Entries are keyed by
+template name and a checksum of its source, so an edited template is
+recompiled.
+
+The ``{% cache %}`` tag keeps the rendered HTML of a block in the app
+cache (app/cache.py)::
+
+    {% cache 'dashboard-stats', 60, 'residents', 'households' %}
+      ...
+    {% endcache %}
+
+The arguments are a key, a TTL in seconds (None for
+``TEMPLATE_FRAGMENT_TTL``, 0 to bypass the cache), and the tables the
+fragment is drawn from. A commit that writes to any of those tables
+invalidates the fragment, in every worker sharing the cache backend.
+"""
+import os
+
+from jinja2 import FileSystemBytecodeCache, nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+
+from app.cache import cache
+
+
+class FragmentCacheExtension(Extension):
+    """The ``{% cache key[, ttl[, table, ...]] %}...{% endcache %}`` tag."""
+
+    tags = {'cache'}
+
+    def __init__(self, environment):
+        super().__init__(environment)
+        environment.extend(fragment_cache_enabled=True, fragment_cache_ttl=60)
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        key = parser.parse_expression()
+        ttl = nodes.Const(None)
+        tables = []
+        if parser.stream.skip_if('comma'):
+            ttl = parser.parse_expression()
+            while parser.stream.skip_if('comma'):
+                tables.append(parser.parse_expression())
+        body = parser.parse_statements(('name:endcache',), drop_needle=True)
+        return nodes.CallBlock(
+            self.call_method('_cached', [key, ttl, nodes.List(tables)]), [], [], body,
+        ).set_lineno(lineno)
+
+    def _cached(self, key, ttl, tables, caller):
+        env = self.environment
+        ttl = env.fragment_cache_ttl if ttl is None else ttl
+        if not env.fragment_cache_enabled or ttl <= 0:
+            return caller()
+        return Markup(cache.get_or_set(f'fragment:{key}', lambda: str(caller()), ttl, namespaces=tables))
+
+
+def init_app(app):
+    app.config.setdefault('JINJA_BYTECODE_CACHE', True)
+    app.config.setdefault('JINJA_BYTECODE_CACHE_DIR', None)
+    app.config.setdefault('TEMPLATE_FRAGMENT_CACHE', True)
+    app.config.setdefault('TEMPLATE_FRAGMENT_TTL', 60)
+
+    # jinja_options are read when app.jinja_env is first created
+    options = dict(app.jinja_options)
+    options['extensions'] = [*options.get('extensions', ()), FragmentCacheExtension]
+    if app.config['JINJA_BYTECODE_CACHE']:
+        directory = app.config['JINJA_BYTECODE_CACHE_DIR'] or os.path.join(app.instance_path, 'jinja_bytecode')
+        os.makedirs(directory, exist_ok=True)
+        options['bytecode_cache'] = FileSystemBytecodeCache(directory)
+    app.jinja_options = options
+    app.jinja_env.fragment_cache_enabled = app.config['TEMPLATE_FRAGMENT_CACHE']
+    app.jinja_env.fragment_cache_ttl = app.config['TEMPLATE_FRAGMENT_TTL']
@@ -0,0 +1,5 @@
+def age(birth_date, today):
+    """Age in whole years on `today`, or None when the birth date is unknown."""
+    if birth_date is None:
+        return None
+    return today.year - birth_date.year - ((today.month, today.day) < (birth_date.month, birth_date.day))
@@ -0,0 +1,162 @@
+"""Signed verification tokens for issued clearances.
+
+A printed clearance carries a QR code linking to ``/verify/<token>``. The
+token holds the clearance id, resident id, clearance type and issue date,
+and is signed with HMAC-SHA256 (truncated to 96 bits). Anyone scanning
+it can be told whether the document is genuine without a database
+lookup. The signature proves the fields, and the only server-side state
+consulted is the set of revoked clearance ids.
+
+That set is small (revoked clearances, plus deleted ones still in the
+sync tombstones), so each process keeps it in memory. It is loaded on
+the first verification and then reloaded by a background thread every
+``CLEARANCE_REVOCATION_REFRESH`` seconds. Revocations made in the same
+process apply immediately; other workers pick them up on their next
+reload.
+
+The signing key is ``CLEARANCE_SIGNING_KEY``, or is derived from
+SECRET_KEY when that is unset. Changing it invalidates every QR code
+already printed.
+"""
+import base64
+import binascii
+import hashlib
+import hmac
+import logging
+import os
+import struct
+import threading
+import time
+from collections import namedtuple
+from datetime import date, timedelta
+
+from sqlalchemy import select, union
+
+from app import db
+from app.models import Clearance, SyncTombstone
+
+logger = logging.getLogger(__name__)
+
+TOKEN_VERSION = 1
+SIGNATURE_BYTES = 12
+
+# version, clearance id, resident id, issue date as days since EPOCH
+_HEADER = struct.Struct('>BIIH')
+EPOCH = date(2000, 1, 1)
+
+Claims = namedtuple('Claims', 'clearance_id resident_id clearance_type issued_on')
+
+
+def _b64encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode('ascii')
+
+
+def _b64decode(text):
+    return base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+
+
+class ClearanceVerifier:
+    """Signs and checks tokens and holds the revocation set for one app."""
+
+    def __init__(self, app=None):
+        self.app = None
+        self._key = None
+        self._revoked = None
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('CLEARANCE_SIGNING_KEY', None)
+        app.config.setdefault('CLEARANCE_REVOCATION_REFRESH', 60)
+        key = app.config['CLEARANCE_SIGNING_KEY']
+        if key:
+            self._key = key.encode() if isinstance(key, str) else key
+        else:
+            self._key = hmac.new(app.config['SECRET_KEY'].encode(), b'clearance-verification', hashlib.sha256).digest()
+        self.app = app
+        self._revoked = None
+        app.extensions['clearance_verifier'] = self
+
+    # -- tokens ---------------------------------------------------------------
+
+    def _signature(self, payload):
+        return hmac.new(self._key, payload, hashlib.sha256).digest()[:SIGNATURE_BYTES]
+
+    def sign(self, clearance_id, resident_id, clearance_type, issued_on):
+        """Compact URL-safe token for an issued clearance."""
+        payload = _HEADER.pack(
+            TOKEN_VERSION, clearance_id, resident_id, (issued_on - EPOCH).days,
+        ) + clearance_type.encode('utf-8')
+        return _b64encode(payload + self._signature(payload))
+
+    def verify(self, token):
+        """The token's `Claims` if its signature is valid, otherwise None."""
+        try:
+            raw = _b64decode(token)
+        except (binascii.Error, ValueError):
+            return None
+        if len(raw) < _HEADER.size + SIGNATURE_BYTES:
+            return None
+        payload, signature = raw[:-SIGNATURE_BYTES], raw[-SIGNATURE_BYTES:]
+        if not hmac.compare_digest(signature, self._signature(payload)):
+            return None
+        version, clearance_id, resident_id, days = _HEADER.unpack_from(payload)
+        if version != TOKEN_VERSION:
+            return None
+        try:
+            clearance_type = payload[_HEADER.size:].decode('utf-8')
+        except UnicodeDecodeError:
+            return None
+        return Claims(clearance_id, resident_id, clearance_type, EPOCH + timedelta(days=days))
+
+    # -- revocations ----------------------------------------------------------
+
+    def is_revoked(self, clearance_id):
+        if self._revoked is None or self._pid != os.getpid():
+            self._load()
+        self._ensure_thread()
+        return clearance_id in self._revoked
+
+    def revoke(self, clearance_ids):
+        """Mark clearances revoked in this process (after committing the change)."""
+        if self._revoked is not None:
+            with self._lock:
+                self._revoked = self._revoked | frozenset(clearance_ids)
+
+    def _load(self):
+        stmt = union(
+            select(Clearance.id).where(Clearance.status == 'Revoked'),
+            select(SyncTombstone.record_id).where(SyncTombstone.entity == 'clearances'),
+        )
+        with self.app.app_context():
+            try:
+                revoked = frozenset(db.session.scalars(stmt))
+            finally:
+                db.session.remove()
+        with self._lock:
+            self._revoked = revoked
+            self._pid = os.getpid()
+
+    def _ensure_thread(self):
+        # Threads do not survive fork(); a forked worker starts its own
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive() or self._pid != os.getpid():
+                self._thread = threading.Thread(target=self._run, name='revocation-refresh', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.app.config['CLEARANCE_REVOCATION_REFRESH'])
+            try:
+                self._load()
+            except Exception:
+                # Keep serving the last good set
+                logger.exception('Reloading clearance revocations failed')
+
+
+verifier = ClearanceVerifier()
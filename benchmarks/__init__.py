@@ -0,0 +1 @@
+"""Standalone benchmarks. Run from the repository root with ``python -m benchmarks.<name>``."""
@@ -0,0 +1,93 @@
+"""Cost of the app cache (`app.cache`) per backend.
+
+For each backend measures a namespaced cache hit, a namespace
+invalidation, and `/api/search` and `/dashboard` end to end (served from
+the cache between writes). The Redis backend is included when
+``BENCH_REDIS_URL`` is set. Before measuring, `check_invalidation` makes
+sure a commit still invalidates after a rolled-back savepoint (it adds
+and then deletes one household).
+
+    python -m benchmarks.bench_cache [--scale 10000] [--iterations 200] [--reuse]
+"""
+import argparse
+import os
+import tempfile
+
+from .common import create_bench_app, login, summarize, time_calls
+from .suite import prepare
+
+ENDPOINTS = ('/api/search?q=santos', '/dashboard')
+NAMESPACES = ('residents', 'blotters')
+
+
+def _backends():
+    backends = {
+        'memory': {'CACHE_BACKEND': 'memory'},
+        'sqlite': {'CACHE_BACKEND': 'sqlite',
+                   'CACHE_URL': os.path.join(tempfile.gettempdir(), 'brms_bench_cache.sqlite3')},
+    }
+    if os.environ.get('BENCH_REDIS_URL'):
+        backends['redis'] = {'CACHE_BACKEND': 'redis', 'CACHE_URL': os.environ['BENCH_REDIS_URL']}
+    return backends
+
+
+def check_invalidation(app):
+    """Fail unless changes flushed before a rolled-back savepoint invalidate on commit."""
+    from app import db
+    from app.cache import cache
+    from app.models import Household
+
+    with app.app_context():
+        before = cache.version('households')
+        household = Household(address='Cache check')
+        db.session.add(household)
+        db.session.flush()
+        db.session.begin_nested().rollback()
+        assert cache.version('households') == before, 'invalidated before the commit'
+        db.session.commit()
+        assert cache.version('households') > before, 'savepoint rollback discarded the invalidation'
+        db.session.delete(household)
+        db.session.commit()
+
+
+def measure(scale, iterations, reuse):
+    from app.cache import cache
+
+    url = prepare(scale, reuse=reuse).config['SQLALCHEMY_DATABASE_URI']
+    results = {}
+    for name, config in _backends().items():
+        app = create_bench_app(SQLALCHEMY_DATABASE_URI=url, **config)
+        cache.clear()
+        check_invalidation(app)
+        value = {'residents': [{'id': i, 'name': f'Resident {i}'} for i in range(5)]}
+        cache.set('bench', value, namespaces=NAMESPACES)
+        client = app.test_client()
+        login(client)
+        results[name] = {
+            'hit': summarize(time_calls(lambda: cache.get('bench', namespaces=NAMESPACES), iterations)),
+            'invalidate': summarize(time_calls(lambda: cache.invalidate('bench'), iterations)),
+            **{
+                endpoint: summarize(time_calls(lambda: client.get(endpoint), iterations, warmup=3))
+                for endpoint in ENDPOINTS
+            },
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scale', type=int, default=10000, help='Residents to seed.')
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--reuse', action='store_true', help='Reuse an already seeded SQLite database.')
+    args = parser.parse_args()
+
+    results = measure(args.scale, args.iterations, args.reuse)
+    names = list(results)
+    print(f'\n{args.scale:,} residents, p50 ms')
+    print(f'{"":>24} ' + ' '.join(f'{n:>10}' for n in names))
+    for row in ('hit', 'invalidate', *ENDPOINTS):
+        print(f'{row:>24} ' + ' '.join(f'{results[n][row]["p50_ms"]:10.3f}' for n in names))
+
+
+if __name__ == '__main__':
+    main()
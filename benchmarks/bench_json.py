@@ -0,0 +1,94 @@
+"""JSON serialization cost of `/api/residents` and `/api/dashboard-stats`.
+
+Seeds (or reuses, with ``--reuse``) the suite's database at each scale,
+then for the stdlib and orjson providers (`app.serialization`) measures:
+
+- encode: turning the active-resident rows into a response body, the old
+  way (one dict per row, then ``jsonify``) and with `rows_json`;
+- both endpoints end to end through the test client.
+
+    python -m benchmarks.bench_json [--scale 10000 --scale 50000] [--iterations 20] [--reuse]
+"""
+import argparse
+
+from sqlalchemy import select
+
+from app import db
+
+from .common import create_bench_app, login, summarize, time_calls
+from .suite import prepare
+
+PROVIDERS = ('stdlib', 'orjson')
+ENDPOINTS = ('/api/residents', '/api/dashboard-stats')
+
+
+def _encode_samples(app, iterations):
+    from flask import jsonify
+
+    from app.models import Resident
+    from app.serialization import rows_json
+
+    stmt = (
+        select(Resident.id, Resident.first_name, Resident.last_name, Resident.address)
+        .where(Resident.status == 'Active')
+        .order_by(Resident.last_name, Resident.first_name)
+    )
+    with app.app_context():
+        result = db.session.execute(stmt)
+        keys, rows = list(result.keys()), result.all()
+
+        def per_row_dicts():
+            return jsonify([
+                {'id': r.id, 'first_name': r.first_name, 'last_name': r.last_name, 'address': r.address}
+                for r in rows
+            ]).get_data()
+
+        def direct():
+            return rows_json(rows, keys)
+
+        size = len(direct())
+        return len(rows), size, {
+            'dicts+jsonify': summarize(time_calls(per_row_dicts, iterations, warmup=2)),
+            'rows_json': summarize(time_calls(direct, iterations, warmup=2)),
+        }
+
+
+def measure(scale, iterations, reuse):
+    seeded = prepare(scale, reuse=reuse)
+    url = seeded.config['SQLALCHEMY_DATABASE_URI']
+    results = {}
+    for provider in PROVIDERS:
+        app = create_bench_app(SQLALCHEMY_DATABASE_URI=url, JSON_PROVIDER=provider)
+        rows, size, encode = _encode_samples(app, iterations)
+        client = app.test_client()
+        login(client)
+        endpoints = {
+            endpoint: summarize(time_calls(lambda: client.get(endpoint), iterations, warmup=2))
+            for endpoint in ENDPOINTS
+        }
+        results[provider] = {'rows': rows, 'bytes': size, 'encode': encode, 'endpoints': endpoints}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scale', type=int, action='append', help='Residents to seed (repeatable).')
+    parser.add_argument('--iterations', type=int, default=20)
+    parser.add_argument('--reuse', action='store_true', help='Reuse an already seeded SQLite database.')
+    args = parser.parse_args()
+
+    for scale in args.scale or (10000, 50000):
+        results = measure(scale, args.iterations, args.reuse)
+        first = results[PROVIDERS[0]]
+        print(f'\n{scale:,} residents: {first["rows"]:,} active rows, {first["bytes"] / 1024:,.0f} KiB of JSON')
+        print(f'{"":>24} ' + ' '.join(f'{p + " ms":>12}' for p in PROVIDERS))
+        for name in first['encode']:
+            print(f'{"encode " + name:>24} ' + ' '.join(
+                f'{results[p]["encode"][name]["p50_ms"]:12.2f}' for p in PROVIDERS))
+        for endpoint in ENDPOINTS:
+            print(f'{endpoint:>24} ' + ' '.join(
+                f'{results[p]["endpoints"][endpoint]["p50_ms"]:12.2f}' for p in PROVIDERS))
+
+
+if __name__ == '__main__':
+    main()
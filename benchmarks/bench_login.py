@@ -0,0 +1,69 @@
+"""Login throughput while the login form is under a password-guessing attack.
+
+An attacker sends wrong passwords for one account from one IP while a
+legitimate user logs in from another IP every tenth request. Reported per
+configuration: attack requests/second, CPU milliseconds burned per attack
+request, and the legitimate user's login latency.
+
+    python -m benchmarks.bench_login [--attempts 300] [--hash-method scrypt:32768:8:1]
+"""
+import argparse
+import time
+
+from .common import BENCH_PASSWORD, create_bench_app, create_user, reset_schema, summarize
+
+ATTACKER_IP = '203.0.113.7'
+LEGIT_IP = '198.51.100.20'
+
+
+def run(attempts, **config):
+    app = create_bench_app(**config)
+    reset_schema(app)
+    create_user(app, 'bench-admin')
+    create_user(app, 'clerk', role='user')
+    attacker = app.test_client()
+
+    legit_samples = []
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    legit_cpu = 0.0
+    for i in range(attempts):
+        attacker.post('/', data={'username': 'bench-admin', 'password': f'guess-{i}'},
+                      environ_base={'REMOTE_ADDR': ATTACKER_IP})
+        if i % 10 == 0:
+            client = app.test_client()
+            start, cpu = time.perf_counter(), time.process_time()
+            response = client.post('/', data={'username': 'clerk', 'password': BENCH_PASSWORD},
+                                   environ_base={'REMOTE_ADDR': LEGIT_IP})
+            legit_samples.append(time.perf_counter() - start)
+            legit_cpu += time.process_time() - cpu
+            assert response.status_code == 302, 'legitimate login was rejected'
+    wall = time.perf_counter() - wall_start - sum(legit_samples)
+    cpu = time.process_time() - cpu_start - legit_cpu
+    return {
+        'attack_rps': attempts / wall,
+        'attack_cpu_ms': cpu / attempts * 1000,
+        'legit': summarize(legit_samples),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--attempts', type=int, default=300)
+    parser.add_argument('--hash-method', default='scrypt:32768:8:1')
+    args = parser.parse_args()
+
+    configs = (
+        ('no limit', {'LOGIN_RATE_LIMIT_ENABLED': False}),
+        ('memory', {'LOGIN_RATE_LIMIT_BACKEND': 'memory'}),
+        ('database', {'LOGIN_RATE_LIMIT_BACKEND': 'database'}),
+    )
+    print(f'hash method: {args.hash_method}, {args.attempts} attack attempts')
+    print(f'{"limiter":>10} {"attack req/s":>13} {"CPU ms/attack":>14} {"legit p50 ms":>13} {"legit p95 ms":>13}')
+    for label, config in configs:
+        r = run(args.attempts, PASSWORD_HASH_METHOD=args.hash_method, **config)
+        print(f'{label:>10} {r["attack_rps"]:13.1f} {r["attack_cpu_ms"]:14.2f} '
+              f'{r["legit"]["p50_ms"]:13.2f} {r["legit"]["p95_ms"]:13.2f}')
+
+
+if __name__ == '__main__':
+    main()
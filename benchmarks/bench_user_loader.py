@@ -0,0 +1,51 @@
+"""Per-request overhead of loading the logged-in user.
+
+Compares the uncached user loader (one `users` query per request, the old
+behaviour) with the TTL session-user cache from `app.authz`, on a cheap
+`login_required` endpoint so the loader dominates the measurement.
+
+    python -m benchmarks.bench_user_loader [--iterations 2000]
+"""
+import argparse
+
+from app import db
+
+from .common import QueryCounter, create_bench_app, create_user, login, reset_schema, summarize, time_calls
+
+ENDPOINT = '/api/record-types'
+
+
+def measure(ttl, iterations):
+    app = create_bench_app(USER_CACHE_TTL=ttl)
+    reset_schema(app)
+    create_user(app)
+    client = app.test_client()
+    login(client)
+
+    samples = time_calls(lambda: client.get(ENDPOINT), iterations)
+    with app.app_context():
+        engine = db.engine
+    with QueryCounter(engine) as counter:
+        for _ in range(100):
+            client.get(ENDPOINT)
+    result = summarize(samples)
+    result['queries_per_request'] = counter.count / 100
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=2000)
+    args = parser.parse_args()
+
+    before = measure(ttl=0, iterations=args.iterations)
+    after = measure(ttl=60, iterations=args.iterations)
+    print(f'{"":>10} {"mean ms":>9} {"p50 ms":>9} {"p95 ms":>9} {"queries/req":>12}')
+    for label, r in (('uncached', before), ('cached', after)):
+        print(f'{label:>10} {r["mean_ms"]:9.3f} {r["p50_ms"]:9.3f} {r["p95_ms"]:9.3f} {r["queries_per_request"]:12.2f}')
+    saved = before['mean_ms'] - after['mean_ms']
+    print(f'saved {saved:.3f} ms/request ({saved / before["mean_ms"]:.0%})')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""Shared helpers for the benchmark scripts.
+
+Benchmarks run against ``BENCH_DATABASE_URL`` when it is set (e.g. a local
+Postgres database) and otherwise against a throwaway SQLite file, so they
+never need network access.
+"""
+import os
+import statistics
+import tempfile
+import time
+
+from sqlalchemy import event
+
+BENCH_PASSWORD = 'bench-password'
+
+
+def create_bench_app(**config):
+    """Create the app pointed at the benchmark database."""
+    from app import create_app
+
+    url = os.environ.get('BENCH_DATABASE_URL')
+    if not url:
+        path = os.path.join(tempfile.gettempdir(), 'brms_bench.db')
+        url = f'sqlite:///{path}'
+    overrides = {
+        'SQLALCHEMY_DATABASE_URI': url,
+        'TESTING': True,
+        'WTF_CSRF_ENABLED': False,
+    }
+    overrides.update(config)
+    return create_app(overrides)
+
+
+def reset_schema(app):
+    from app import db
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+
+
+def create_user(app, username='bench-admin', role='admin'):
+    from app import db
+    from app.models import User
+
+    with app.app_context():
+        user = User.query.filter_by(username=username).first()
+        if user is None:
+            user = User(username=username, email=f'{username}@example.com', role=role)
+            user.set_password(BENCH_PASSWORD)
+            db.session.add(user)
+            db.session.commit()
+        return user.id
+
+
+def login(client, username='bench-admin', password=BENCH_PASSWORD):
+    response = client.post('/', data={'username': username, 'password': password})
+    if response.status_code != 302:
+        raise RuntimeError(f'Login failed for {username!r} (HTTP {response.status_code})')
+
+
+class QueryCounter:
+    """Counts statements sent to the database while active."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+
+    def _on_execute(self, *args, **kwargs):
+        self.count += 1
+
+    def __enter__(self):
+        self.count = 0
+        event.listen(self.engine, 'before_cursor_execute', self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, 'before_cursor_execute', self._on_execute)
+
+
+def time_calls(fn, iterations, warmup=10):
+    """Call `fn` repeatedly and return per-call wall times in seconds."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def summarize(samples):
+    """Latency percentiles in milliseconds."""
+    ordered = sorted(samples)
+
+    def pct(p):
+        return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))] * 1000
+
+    return {
+        'n': len(ordered),
+        'mean_ms': statistics.fmean(ordered) * 1000,
+        'p50_ms': pct(50),
+        'p95_ms': pct(95),
+        'p99_ms': pct(99),
+    }
@@ -0,0 +1,295 @@
+"""Latency and query-count benchmarks for the hot pages and API endpoints.
+
+Seeds the benchmark database at each requested scale with `app.seed` (same
+seed, same data on every run), logs in as an admin and times each scenario
+with the Flask test client. Per scenario it records wall-clock percentiles,
+CPU time per request, the number of SQL statements one request issues and
+the share of them whose compiled SQL came from SQLAlchemy's cache.
+Results are written as JSON; ``compare`` flags regressions between two runs.
+Scenarios listed in QUERY_BUDGETS must stay within their statement count;
+``run`` reports any that exceed it and exits non-zero.
+
+    python -m benchmarks.suite run [--scale 1000 --scale 10000] [--iterations 50] [-o results.json]
+    python -m benchmarks.suite compare baseline.json results.json [--threshold 0.10]
+
+SQLite runs use one database file per scale under the temp directory and
+reuse it with ``--reuse``; set ``BENCH_DATABASE_URL`` to run against a local
+Postgres database instead (it is reseeded for every scale).
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime
+
+from sqlalchemy import func, select
+
+from app import db
+from app.queries import CacheStats
+
+from .common import QueryCounter, create_bench_app, create_user, login, reset_schema, summarize, time_calls
+
+DEFAULT_SCALES = (1000, 10000)
+
+# Seeding date is pinned so every run measures identical data
+SEED_DAY = date(2025, 1, 15)
+
+# name -> URL; ``{household_id}`` is filled in from the seeded data
+SCENARIOS = {
+    'dashboard.index': '/dashboard',
+    'api.dashboard_stats': '/api/dashboard-stats',
+    'api.search': '/api/search?q=dela',
+    'api.residents': '/api/residents',
+    'residents.index': '/residents',
+    'residents.index?q': '/residents?q=santos',
+    'households.index': '/households',
+    'households.view': '/household/{household_id}',
+}
+
+# Most statements one request may issue, whatever the data size (the logged-in
+# user is served from the authz cache, so these are the page's own queries)
+QUERY_BUDGETS = {
+    'dashboard.index': 3,
+    'residents.index': 2,
+    'residents.index?q': 2,
+    'households.index': 3,
+    'households.view': 1,
+}
+
+# Relative slowdown allowed before a latency change counts as a regression,
+# and an absolute floor so sub-millisecond jitter is not reported
+DEFAULT_THRESHOLD = 0.10
+MIN_DELTA_MS = 0.5
+
+
+def _git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _bench_app(scale):
+    config = {}
+    if not os.environ.get('BENCH_DATABASE_URL'):
+        path = os.path.join(tempfile.gettempdir(), f'brms_bench_{scale}.db')
+        config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{path}'
+    return create_bench_app(**config)
+
+
+def _seeded(app):
+    from app.models import Resident
+
+    with app.app_context():
+        try:
+            return db.session.scalar(select(func.count()).select_from(Resident)) or 0
+        except Exception:
+            db.session.rollback()
+            return 0
+
+
+def prepare(scale, reuse=False):
+    """Return an app whose database holds `scale` seeded residents."""
+    from app.seed import seed_database
+
+    app = _bench_app(scale)
+    if not (reuse and _seeded(app) >= scale):
+        reset_schema(app)
+        with app.app_context():
+            start = time.perf_counter()
+            seed_database(scale, today=SEED_DAY)
+            print(f'  seeded {scale:,} residents in {time.perf_counter() - start:.1f}s', file=sys.stderr)
+    create_user(app)
+    return app
+
+
+def _scenario_params(app):
+    from app.models import Household, Resident
+
+    with app.app_context():
+        # The largest household, so the detail page renders a realistic member list
+        household_id = db.session.execute(
+            select(Resident.household_id)
+            .where(Resident.household_id.isnot(None))
+            .group_by(Resident.household_id)
+            .order_by(func.count().desc(), Resident.household_id)
+            .limit(1)
+        ).scalar() or db.session.scalar(select(func.min(Household.id)))
+    return {'household_id': household_id}
+
+
+def measure_scenario(app, client, url, iterations, budget=None):
+    with app.app_context():
+        engine = db.engine
+    response = client.get(url)
+    if response.status_code != 200:
+        return {'url': url, 'error': f'HTTP {response.status_code}'}
+
+    with QueryCounter(engine) as counter, CacheStats(engine) as cache:
+        client.get(url)
+    cpu_start = time.process_time()
+    samples = time_calls(lambda: client.get(url), iterations, warmup=3)
+    cpu = time.process_time() - cpu_start
+
+    result = {'url': url, 'queries': counter.count, 'cache_hit_rate': cache.hit_rate,
+              'response_bytes': len(response.data)}
+    if budget is not None:
+        result['query_budget'] = budget
+    result.update(summarize(samples))
+    # process_time also covers the warmup calls
+    result['cpu_ms'] = cpu / (iterations + 3) * 1000
+    return result
+
+
+def run(scales, iterations, reuse=False, only=None):
+    results = {
+        'created_at': datetime.utcnow().isoformat(timespec='seconds'),
+        'revision': _git_revision(),
+        'python': platform.python_version(),
+        'iterations': iterations,
+        'scales': {},
+    }
+    for scale in scales:
+        print(f'scale {scale:,}', file=sys.stderr)
+        app = prepare(scale, reuse=reuse)
+        with app.app_context():
+            results['database'] = db.engine.dialect.name
+        params = _scenario_params(app)
+        client = app.test_client()
+        login(client)
+
+        scenarios = {}
+        for name, url in SCENARIOS.items():
+            if only and name not in only:
+                continue
+            try:
+                # Some views print debugging output; keep it out of the report
+                with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                    scenarios[name] = measure_scenario(app, client, url.format(**params), iterations,
+                                                       QUERY_BUDGETS.get(name))
+            except Exception as e:  # a broken page should not abort the whole run
+                scenarios[name] = {'url': url, 'error': f'{type(e).__name__}: {e}'}
+            _print_row(name, scenarios[name])
+        results['scales'][str(scale)] = scenarios
+    return results
+
+
+def _print_row(name, r):
+    if 'error' in r:
+        print(f'  {name:<22} ERROR {r["error"]}', file=sys.stderr)
+    else:
+        rate = r.get('cache_hit_rate')
+        cached = f'{rate:4.0%} cached' if rate is not None else '   - cached'
+        over = f'  OVER BUDGET ({r["query_budget"]})' if r['queries'] > r.get('query_budget', r['queries']) else ''
+        print(f'  {name:<22} p50 {r["p50_ms"]:8.2f}  p95 {r["p95_ms"]:8.2f}  p99 {r["p99_ms"]:8.2f} ms'
+              f'  cpu {r["cpu_ms"]:7.2f} ms  {r["queries"]:3d} queries  {cached}{over}', file=sys.stderr)
+
+
+def over_budget(results):
+    """Messages for scenarios that issued more statements than their budget."""
+    return [
+        f'[{scale}] {name}: {r["queries"]} queries, budget {r["query_budget"]}'
+        for scale, scenarios in results['scales'].items()
+        for name, r in scenarios.items()
+        if 'query_budget' in r and r['queries'] > r['query_budget']
+    ]
+
+
+def compare(baseline, current, threshold=DEFAULT_THRESHOLD):
+    """Return a list of regression messages between two result documents."""
+    regressions = []
+    for scale, scenarios in current['scales'].items():
+        base_scenarios = baseline['scales'].get(scale, {})
+        for name, cur in scenarios.items():
+            base = base_scenarios.get(name)
+            if base is None:
+                continue
+            label = f'[{scale}] {name}'
+            if 'error' in cur:
+                if 'error' not in base:
+                    regressions.append(f'{label}: now fails ({cur["error"]})')
+                continue
+            if 'error' in base:
+                continue
+            if cur['queries'] > base['queries']:
+                regressions.append(f'{label}: queries {base["queries"]} -> {cur["queries"]}')
+            for metric in ('p50_ms', 'p95_ms'):
+                delta = cur[metric] - base[metric]
+                if delta > MIN_DELTA_MS and delta > base[metric] * threshold:
+                    regressions.append(
+                        f'{label}: {metric[:3]} {base[metric]:.2f} -> {cur[metric]:.2f} ms '
+                        f'(+{delta / base[metric]:.0%})'
+                    )
+    return regressions
+
+
+def _print_comparison(baseline, current):
+    print(f'{"scenario":<32} {"p50 before":>11} {"p50 after":>10} {"change":>8} {"queries":>9}')
+    for scale, scenarios in current['scales'].items():
+        for name, cur in scenarios.items():
+            base = baseline['scales'].get(scale, {}).get(name)
+            label = f'[{scale}] {name}'
+            if not base or 'error' in base or 'error' in cur:
+                status = (cur or {}).get('error') or (base or {}).get('error') or 'new'
+                print(f'{label:<32} {status}')
+                continue
+            change = (cur['p50_ms'] - base['p50_ms']) / base['p50_ms'] if base['p50_ms'] else 0
+            print(f'{label:<32} {base["p50_ms"]:11.2f} {cur["p50_ms"]:10.2f} {change:+8.0%} '
+                  f'{base["queries"]:>4}->{cur["queries"]:<4}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = sub.add_parser('run', help='run the suite and write JSON results')
+    run_parser.add_argument('--scale', type=int, action='append', dest='scales',
+                            help=f'residents to seed; repeatable (default {", ".join(map(str, DEFAULT_SCALES))})')
+    run_parser.add_argument('--iterations', type=int, default=50)
+    run_parser.add_argument('--scenario', action='append', dest='only', choices=sorted(SCENARIOS),
+                            help='run only this scenario; repeatable')
+    run_parser.add_argument('--reuse', action='store_true', help='reuse an already seeded SQLite database')
+    run_parser.add_argument('-o', '--output', default='benchmark-results.json')
+
+    compare_parser = sub.add_parser('compare', help='compare two result files and flag regressions')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                                help='allowed relative slowdown (default %(default)s)')
+    args = parser.parse_args()
+
+    if args.command == 'run':
+        results = run(args.scales or DEFAULT_SCALES, args.iterations, reuse=args.reuse, only=args.only)
+        with open(args.output, 'w') as fh:
+            json.dump(results, fh, indent=2)
+        print(f'results written to {args.output}', file=sys.stderr)
+        failures = over_budget(results)
+        for line in failures:
+            print(f'query budget exceeded: {line}', file=sys.stderr)
+        return 1 if failures else 0
+
+    with open(args.baseline) as fh:
+        baseline = json.load(fh)
+    with open(args.current) as fh:
+        current = json.load(fh)
+    _print_comparison(baseline, current)
+    regressions = compare(baseline, current, args.threshold)
+    if regressions:
+        print(f'\n{len(regressions)} regression(s):')
+        for line in regressions:
+            print(f'  {line}')
+        return 1
+    print('\nno regressions')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
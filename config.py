@@ -10,3 +10,101 @@ class Config:
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     MIGRATIONS_DIR = os.path.join('migrations')
     MIGRATION_REPO = os.path.join(MIGRATIONS_DIR, 'versions')
+
+    # JSON encoder for API responses (see app/serialization.py): 'auto'
+    # uses orjson when installed, else the standard library
+    JSON_PROVIDER = os.environ.get('JSON_PROVIDER', 'auto')
+
+    # Application cache (see app/cache.py): 'memory' is per worker; use
+    # 'sqlite' (one host) or 'redis' (CACHE_URL=redis://...) when running
+    # several workers so they share entries and invalidations
+    CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'memory')
+    CACHE_URL = os.environ.get('CACHE_URL')
+    CACHE_DEFAULT_TTL = 60
+
+    # Compiled templates are cached on disk (see app/templating.py);
+    # the directory defaults to instance/jinja_bytecode
+    JINJA_BYTECODE_CACHE = True
+    JINJA_BYTECODE_CACHE_DIR = os.environ.get('JINJA_BYTECODE_CACHE_DIR')
+    # {% cache %} fragments: on/off and the TTL used when a tag gives none
+    TEMPLATE_FRAGMENT_CACHE = True
+    TEMPLATE_FRAGMENT_TTL = 60
+
+    # On-demand request profiling for admins (see app/profiler.py):
+    # 'auto' samples with pyinstrument when installed, else uses cProfile.
+    # Profiles go to PROFILER_DIR (default instance/profiles).
+    PROFILER_ENABLED = True
+    PROFILER_ENGINE = os.environ.get('PROFILER_ENGINE', 'auto')
+    PROFILER_DIR = os.environ.get('PROFILER_DIR')
+    PROFILER_MAX_PROFILES = 50
+
+    # Slow-query log (see app/slowlog.py): statements slower than the
+    # threshold are stored with redacted parameters and their query plan
+    # (EXPLAIN ANALYZE on PostgreSQL, SELECTs only)
+    SLOW_QUERY_LOG_ENABLED = True
+    SLOW_QUERY_THRESHOLD_MS = int(os.environ.get('SLOW_QUERY_THRESHOLD_MS', 200))
+    SLOW_QUERY_EXPLAIN = True
+    # Seconds before the same statement is explained again, per worker
+    SLOW_QUERY_EXPLAIN_INTERVAL = 3600
+    SLOW_QUERY_EXPLAIN_TIMEOUT_MS = 10000
+    SLOW_QUERY_RETENTION_DAYS = 30
+
+    # Authorization: role -> permissions (see app/authz.py). '*' grants all.
+    ROLE_PERMISSIONS = {
+        'admin': ('*',),
+        'user': ('records.view', 'records.create', 'reports.view'),
+    }
+    # Seconds a logged-in user is served from cache before re-querying.
+    # Role changes apply to every worker at once with a shared CACHE_BACKEND;
+    # with 'memory', other workers may take up to this long to notice.
+    USER_CACHE_TTL = int(os.environ.get('USER_CACHE_TTL', 60))
+
+    # Password hashing (werkzeug method string). Existing hashes made with a
+    # different method or cost are upgraded on the user's next login.
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+    PASSWORD_SALT_LENGTH = 16
+
+    # Login throttling (see app/ratelimit.py). Use the 'database' backend
+    # when running several workers so they share one attempt log.
+    LOGIN_RATE_LIMIT_ENABLED = True
+    LOGIN_RATE_LIMIT_BACKEND = os.environ.get('LOGIN_RATE_LIMIT_BACKEND', 'memory')
+    LOGIN_RATE_LIMIT_WINDOW = 300
+    LOGIN_MAX_ATTEMPTS_PER_IP = 30
+    LOGIN_MAX_FAILURES_PER_USERNAME = 5
+
+    # Delta sync for offline clients (see app/services/sync.py). Rows newer
+    # than SYNC_SETTLE_SECONDS are held back until concurrent writes commit.
+    SYNC_PAGE_SIZE = 1000
+    SYNC_MAX_PAGE_SIZE = 5000
+    SYNC_SETTLE_SECONDS = 30
+    # Clients that have not synced for longer than this must re-download
+    SYNC_TOMBSTONE_RETENTION_DAYS = 180
+
+    # Audit trail (see app/audit.py). Entries are buffered and written in
+    # batches by a background thread unless AUDIT_ASYNC is off.
+    AUDIT_ENABLED = True
+    AUDIT_ASYNC = True
+    AUDIT_FLUSH_INTERVAL = 1.0
+    AUDIT_BATCH_SIZE = 500
+    AUDIT_MAX_BUFFER = 100000
+
+    # Household analytics (see app/services/analytics.py): monthly per-capita
+    # income thresholds in PHP. The defaults approximate the national PSA
+    # figures; set them from the latest official statistics for the region.
+    POVERTY_FOOD_THRESHOLD = float(os.environ.get('POVERTY_FOOD_THRESHOLD', 1940))
+    POVERTY_THRESHOLD = float(os.environ.get('POVERTY_THRESHOLD', 2780))
+
+    # QR verification of printed clearances (see app/verification.py). The
+    # key defaults to one derived from SECRET_KEY; changing it invalidates
+    # every QR code already printed.
+    CLEARANCE_SIGNING_KEY = os.environ.get('CLEARANCE_SIGNING_KEY')
+    # Seconds between reloads of the revoked-clearance set in each worker
+    CLEARANCE_REVOCATION_REFRESH = 60
+
+    # Voters' masterlist documents are cached here (see
+    # app/services/masterlist.py); defaults to instance/masterlists
+    MASTERLIST_CACHE_DIR = os.environ.get('MASTERLIST_CACHE_DIR')
+
+    # Where `flask partitions archive` writes old partitions (see
+    # app/partitions.py); defaults to instance/archive
+    PARTITION_ARCHIVE_DIR = os.environ.get('PARTITION_ARCHIVE_DIR')
@@ -0,0 +1,71 @@
+"""add audit log
+
+Revision ID: 2f8c6a0d9b31
+Revises: 9e6b1d4f7a25
+Create Date: 2026-10-19 14:52:16.471093
+
+"""
+from datetime import date
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2f8c6a0d9b31'
+down_revision = '9e6b1d4f7a25'
+branch_labels = None
+depends_on = None
+
+
+def _month_partition(month):
+    following = date(month.year + month.month // 12, month.month % 12 + 1, 1)
+    return (
+        f'CREATE TABLE IF NOT EXISTS audit_log_y{month:%Y}m{month:%m} PARTITION OF audit_log '
+        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{following.isoformat()}')"
+    )
+
+
+def upgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        # Partitioned by month; the app creates each month's partition before
+        # writing to it, the default partition only catches stray timestamps
+        op.execute("""
+            CREATE TABLE audit_log (
+                id BIGSERIAL NOT NULL,
+                occurred_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+                user_id INTEGER,
+                username VARCHAR(64),
+                action VARCHAR(10) NOT NULL,
+                entity VARCHAR(30) NOT NULL,
+                record_id INTEGER NOT NULL,
+                changes JSONB,
+                PRIMARY KEY (id, occurred_at)
+            ) PARTITION BY RANGE (occurred_at)
+        """)
+        op.execute('CREATE TABLE audit_log_default PARTITION OF audit_log DEFAULT')
+        this_month = date.today().replace(day=1)
+        op.execute(_month_partition(this_month))
+        op.execute(_month_partition(date(this_month.year + this_month.month // 12, this_month.month % 12 + 1, 1)))
+    else:
+        op.create_table(
+            'audit_log',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('occurred_at', sa.DateTime(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=True),
+            sa.Column('username', sa.String(length=64), nullable=True),
+            sa.Column('action', sa.String(length=10), nullable=False),
+            sa.Column('entity', sa.String(length=30), nullable=False),
+            sa.Column('record_id', sa.Integer(), nullable=False),
+            sa.Column('changes', sa.JSON(), nullable=True),
+            sa.PrimaryKeyConstraint('id')
+        )
+    op.create_index('ix_audit_log_entity_record', 'audit_log', ['entity', 'record_id', 'occurred_at'], unique=False)
+    op.create_index('ix_audit_log_user', 'audit_log', ['user_id', 'occurred_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_audit_log_user', table_name='audit_log')
+    op.drop_index('ix_audit_log_entity_record', table_name='audit_log')
+    # Dropping a partitioned table drops its partitions
+    op.drop_table('audit_log')
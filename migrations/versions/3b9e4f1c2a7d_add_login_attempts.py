@@ -0,0 +1,35 @@
+"""add login attempts
+
+Revision ID: 3b9e4f1c2a7d
+Revises: 48d02a68a0f7
+Create Date: 2026-10-19 09:12:40.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3b9e4f1c2a7d'
+down_revision = '48d02a68a0f7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'login_attempts',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('key', sa.String(length=190), nullable=False),
+        sa.Column('attempted_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('login_attempts', schema=None) as batch_op:
+        batch_op.create_index('ix_login_attempts_key_attempted_at', ['key', 'attempted_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('login_attempts', schema=None) as batch_op:
+        batch_op.drop_index('ix_login_attempts_key_attempted_at')
+
+    op.drop_table('login_attempts')
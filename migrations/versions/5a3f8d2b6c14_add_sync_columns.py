@@ -0,0 +1,62 @@
+"""add sync columns and tombstones
+
+Revision ID: 5a3f8d2b6c14
+Revises: c41e8b7a2d93
+Create Date: 2026-10-19 12:41:09.218734
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5a3f8d2b6c14'
+down_revision = 'c41e8b7a2d93'
+branch_labels = None
+depends_on = None
+
+# table -> expression used as the last-change time of existing rows
+BACKFILL = {
+    'households': 'created_at',
+    'blotters': 'reported_at',
+    'clearances': 'COALESCE(issued_at, approved_at, requested_at)',
+}
+
+
+def upgrade():
+    for table, expression in BACKFILL.items():
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+        op.execute(f'UPDATE {table} SET updated_at = {expression}')
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.alter_column('updated_at', existing_type=sa.DateTime(), nullable=False)
+            batch_op.create_index(f'ix_{table}_updated_at', ['updated_at'], unique=False)
+
+    with op.batch_alter_table('residents', schema=None) as batch_op:
+        batch_op.create_index('ix_residents_updated_at', ['updated_at'], unique=False)
+
+    op.create_table(
+        'sync_tombstones',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('entity', sa.String(length=30), nullable=False),
+        sa.Column('record_id', sa.Integer(), nullable=False),
+        sa.Column('deleted_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('sync_tombstones', schema=None) as batch_op:
+        batch_op.create_index('ix_sync_tombstones_deleted_at_id', ['deleted_at', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('sync_tombstones', schema=None) as batch_op:
+        batch_op.drop_index('ix_sync_tombstones_deleted_at_id')
+
+    op.drop_table('sync_tombstones')
+
+    with op.batch_alter_table('residents', schema=None) as batch_op:
+        batch_op.drop_index('ix_residents_updated_at')
+
+    for table in reversed(list(BACKFILL)):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_index(f'ix_{table}_updated_at')
+            batch_op.drop_column('updated_at')
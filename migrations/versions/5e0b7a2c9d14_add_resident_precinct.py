@@ -0,0 +1,40 @@
+"""add resident precinct and voters' masterlist indexes
+
+Revision ID: 5e0b7a2c9d14
+Revises: a1d7e3f9c240
+Create Date: 2026-10-19 19:02:47.118320
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e0b7a2c9d14'
+down_revision = 'a1d7e3f9c240'
+branch_labels = None
+depends_on = None
+
+VOTER_CONDITION = "voters_status = 'Registered' AND status = 'Active'"
+
+
+def upgrade():
+    with op.batch_alter_table('residents', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('precinct', sa.String(length=20), nullable=True))
+
+    where = sa.text(VOTER_CONDITION)
+    op.create_index(
+        'ix_residents_voters_purok', 'residents', ['purok', 'last_name', 'first_name', 'middle_name', 'id'],
+        unique=False, postgresql_where=where, sqlite_where=where,
+    )
+    op.create_index(
+        'ix_residents_voters_precinct', 'residents', ['precinct', 'last_name', 'first_name', 'middle_name', 'id'],
+        unique=False, postgresql_where=where, sqlite_where=where,
+    )
+
+
+def downgrade():
+    op.drop_index('ix_residents_voters_precinct', table_name='residents')
+    op.drop_index('ix_residents_voters_purok', table_name='residents')
+    with op.batch_alter_table('residents', schema=None) as batch_op:
+        batch_op.drop_column('precinct')
@@ -0,0 +1,26 @@
+"""add clearances.revoked_at
+
+Revision ID: 7c3f1b9e6a05
+Revises: 5e0b7a2c9d14
+Create Date: 2026-10-19 20:14:09.553871
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c3f1b9e6a05'
+down_revision = '5e0b7a2c9d14'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('clearances', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('revoked_at', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('clearances', schema=None) as batch_op:
+        batch_op.drop_column('revoked_at')
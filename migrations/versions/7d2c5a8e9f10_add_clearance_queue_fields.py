@@ -0,0 +1,31 @@
+"""add clearance queue fields
+
+Revision ID: 7d2c5a8e9f10
+Revises: 3b9e4f1c2a7d
+Create Date: 2026-10-19 10:03:17.552901
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7d2c5a8e9f10'
+down_revision = '3b9e4f1c2a7d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('clearances', schema=None) as batch_op:
+        # Existing rows get the migration time as their request time
+        batch_op.add_column(sa.Column('requested_at', sa.DateTime(), nullable=False, server_default=sa.func.now()))
+        batch_op.add_column(sa.Column('approved_at', sa.DateTime(), nullable=True))
+        batch_op.create_index('ix_clearances_status_requested_at', ['status', 'requested_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('clearances', schema=None) as batch_op:
+        batch_op.drop_index('ix_clearances_status_requested_at')
+        batch_op.drop_column('approved_at')
+        batch_op.drop_column('requested_at')
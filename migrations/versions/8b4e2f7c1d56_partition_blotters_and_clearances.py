@@ -0,0 +1,113 @@
+"""partition blotters and clearances by year
+
+Revision ID: 8b4e2f7c1d56
+Revises: 2f8c6a0d9b31
+Create Date: 2026-10-19 16:05:41.280317
+
+"""
+from datetime import date
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b4e2f7c1d56'
+down_revision = '2f8c6a0d9b31'
+branch_labels = None
+depends_on = None
+
+# table -> (partition column, indexes to rebuild as (name, columns, using), foreign keys)
+TABLES = {
+    'blotters': (
+        'reported_at',
+        [
+            ('ix_blotters_updated_at', 'updated_at', 'btree'),
+            ('ix_blotters_search_vector', 'search_vector', 'gin'),
+            ('ix_blotters_status_reported_at', 'status, reported_at', 'btree'),
+        ],
+        ['FOREIGN KEY (reported_by_id) REFERENCES residents (id)'],
+    ),
+    'clearances': (
+        'requested_at',
+        [
+            ('ix_clearances_updated_at', 'updated_at', 'btree'),
+            ('ix_clearances_status_requested_at', 'status, requested_at', 'btree'),
+            ('ix_clearances_status_issued_at', 'status, issued_at', 'btree'),
+        ],
+        ['FOREIGN KEY (resident_id) REFERENCES residents (id)'],
+    ),
+}
+
+# Added by this revision, so not rebuilt on downgrade
+NEW_INDEXES = {'ix_blotters_status_reported_at', 'ix_clearances_status_issued_at'}
+
+SEARCH_TRIGGER = """
+CREATE TRIGGER blotters_search_vector_trigger
+BEFORE INSERT OR UPDATE OF case_title, respondent_name, details, location ON blotters
+FOR EACH ROW EXECUTE FUNCTION blotters_search_vector_update()
+"""
+
+
+def _rebuild(table, partitioned):
+    """Copy `table` into a new (un)partitioned table of the same shape and swap it in."""
+    column, indexes, foreign_keys = TABLES[table]
+    bind = op.get_bind()
+    staging = f'{table}_rebuild'
+
+    # Keep the id sequence alive when the old table is dropped
+    op.execute(f"ALTER SEQUENCE {table}_id_seq OWNED BY NONE")
+    if partitioned:
+        op.execute(f'CREATE TABLE {staging} (LIKE {table} INCLUDING DEFAULTS) PARTITION BY RANGE ({column})')
+        # A partitioned table's unique keys must include the partition column
+        op.execute(f'ALTER TABLE {staging} ADD PRIMARY KEY (id, {column})')
+        first = bind.execute(sa.text(f'SELECT min({column}) FROM {table}')).scalar()
+        for year in range((first or date.today()).year, date.today().year + 2):
+            op.execute(
+                f'CREATE TABLE {table}_y{year} PARTITION OF {staging} '
+                f"FOR VALUES FROM ('{year}-01-01') TO ('{year + 1}-01-01')"
+            )
+        op.execute(f'CREATE TABLE {table}_default PARTITION OF {staging} DEFAULT')
+    else:
+        op.execute(f'CREATE TABLE {staging} (LIKE {table} INCLUDING DEFAULTS)')
+        op.execute(f'ALTER TABLE {staging} ADD PRIMARY KEY (id)')
+
+    op.execute(f'INSERT INTO {staging} SELECT * FROM {table}')
+    op.execute(f'DROP TABLE {table}')
+    op.execute(f'ALTER TABLE {staging} RENAME TO {table}')
+    op.execute(f'ALTER TABLE {table} RENAME CONSTRAINT {staging}_pkey TO {table}_pkey')
+    op.execute(f'ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id')
+
+    for name, columns, using in indexes:
+        if not partitioned and name in NEW_INDEXES:
+            continue
+        op.execute(f'CREATE INDEX {name} ON {table} USING {using} ({columns})')
+    for foreign_key in foreign_keys:
+        op.execute(f'ALTER TABLE {table} ADD {foreign_key}')
+
+
+def upgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        # Nothing to partition; add the indexes the dashboard counts use
+        op.create_index('ix_blotters_status_reported_at', 'blotters', ['status', 'reported_at'], unique=False)
+        op.create_index('ix_clearances_status_issued_at', 'clearances', ['status', 'issued_at'], unique=False)
+        return
+
+    # hearings.blotter_id cannot reference a key that excludes reported_at;
+    # the application keeps that relationship (see app/partitions.py)
+    op.execute('ALTER TABLE hearings DROP CONSTRAINT IF EXISTS hearings_blotter_id_fkey')
+    _rebuild('blotters', partitioned=True)
+    op.execute(SEARCH_TRIGGER)
+    _rebuild('clearances', partitioned=True)
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        op.drop_index('ix_clearances_status_issued_at', table_name='clearances')
+        op.drop_index('ix_blotters_status_reported_at', table_name='blotters')
+        return
+
+    _rebuild('clearances', partitioned=False)
+    _rebuild('blotters', partitioned=False)
+    op.execute(SEARCH_TRIGGER)
+    op.execute('ALTER TABLE hearings ADD FOREIGN KEY (blotter_id) REFERENCES blotters (id)')
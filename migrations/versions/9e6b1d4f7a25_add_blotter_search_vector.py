@@ -0,0 +1,60 @@
+"""add blotter full-text search vector
+
+Revision ID: 9e6b1d4f7a25
+Revises: 5a3f8d2b6c14
+Create Date: 2026-10-19 13:37:52.604118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '9e6b1d4f7a25'
+down_revision = '5a3f8d2b6c14'
+branch_labels = None
+depends_on = None
+
+TRIGGER_FUNCTION = """
+CREATE OR REPLACE FUNCTION blotters_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('simple', coalesce(NEW.case_title, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(NEW.respondent_name, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(NEW.details, '')), 'B') ||
+        setweight(to_tsvector('simple', coalesce(NEW.location, '')), 'C');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql
+"""
+
+TRIGGER = """
+CREATE TRIGGER blotters_search_vector_trigger
+BEFORE INSERT OR UPDATE OF case_title, respondent_name, details, location ON blotters
+FOR EACH ROW EXECUTE FUNCTION blotters_search_vector_update()
+"""
+
+
+def upgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        # Other databases search with ILIKE; keep the column so the model matches
+        with op.batch_alter_table('blotters', schema=None) as batch_op:
+            batch_op.add_column(sa.Column('search_vector', sa.Text(), nullable=True))
+        return
+
+    op.add_column('blotters', sa.Column('search_vector', postgresql.TSVECTOR(), nullable=True))
+    op.execute(TRIGGER_FUNCTION)
+    op.execute(TRIGGER)
+    # Fire the trigger once for existing rows
+    op.execute('UPDATE blotters SET case_title = case_title')
+    op.create_index('ix_blotters_search_vector', 'blotters', ['search_vector'], postgresql_using='gin')
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        op.drop_index('ix_blotters_search_vector', table_name='blotters')
+        op.execute('DROP TRIGGER IF EXISTS blotters_search_vector_trigger ON blotters')
+        op.execute('DROP FUNCTION IF EXISTS blotters_search_vector_update()')
+    with op.batch_alter_table('blotters', schema=None) as batch_op:
+        batch_op.drop_column('search_vector')
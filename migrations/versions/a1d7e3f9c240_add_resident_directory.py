@@ -0,0 +1,52 @@
+"""add resident_directory read model
+
+Revision ID: a1d7e3f9c240
+Revises: d63a9c1e4b72
+Create Date: 2026-10-19 17:21:36.804512
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a1d7e3f9c240'
+down_revision = 'd63a9c1e4b72'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'resident_directory',
+        sa.Column('resident_id', sa.Integer(), nullable=False),
+        sa.Column('first_name', sa.String(length=80), nullable=False),
+        sa.Column('last_name', sa.String(length=80), nullable=False),
+        sa.Column('birth_date', sa.Date(), nullable=True),
+        sa.Column('purok', sa.String(length=50), nullable=True),
+        sa.Column('household_id', sa.Integer(), nullable=True),
+        sa.Column('is_head', sa.Boolean(), nullable=False),
+        sa.Column('status', sa.String(length=30), nullable=False),
+        sa.PrimaryKeyConstraint('resident_id')
+    )
+    op.execute(
+        'INSERT INTO resident_directory '
+        '(resident_id, first_name, last_name, birth_date, purok, household_id, is_head, status) '
+        'SELECT r.id, r.first_name, r.last_name, r.birth_date, r.purok, r.household_id, '
+        'EXISTS (SELECT 1 FROM households h WHERE h.head_id = r.id), r.status '
+        'FROM residents r'
+    )
+    # Built after the backfill; the name index covers a listing page on PostgreSQL
+    op.create_index(
+        'ix_resident_directory_name', 'resident_directory', ['last_name', 'first_name', 'resident_id'],
+        unique=False, postgresql_include=['birth_date', 'purok', 'household_id', 'is_head', 'status'],
+    )
+    op.create_index('ix_resident_directory_purok_name', 'resident_directory', ['purok', 'last_name', 'first_name'], unique=False)
+    op.create_index('ix_resident_directory_status_name', 'resident_directory', ['status', 'last_name', 'first_name'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_resident_directory_status_name', table_name='resident_directory')
+    op.drop_index('ix_resident_directory_purok_name', table_name='resident_directory')
+    op.drop_index('ix_resident_directory_name', table_name='resident_directory')
+    op.drop_table('resident_directory')
@@ -0,0 +1,29 @@
+"""index hearings by lower(venue)
+
+Revision ID: b58e1f3a7c20
+Revises: f2a6c8d04e17
+Create Date: 2026-10-19 18:05:31.244019
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b58e1f3a7c20'
+down_revision = 'f2a6c8d04e17'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Venue conflicts are now found case-insensitively ("Hall" = "hall")
+    with op.batch_alter_table('hearings', schema=None) as batch_op:
+        batch_op.drop_index('ix_hearings_venue_starts_at')
+    op.create_index('ix_hearings_lower_venue_starts_at', 'hearings', [sa.text('lower(venue)'), 'starts_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_hearings_lower_venue_starts_at', table_name='hearings')
+    with op.batch_alter_table('hearings', schema=None) as batch_op:
+        batch_op.create_index('ix_hearings_venue_starts_at', ['venue', 'starts_at'], unique=False)
@@ -0,0 +1,62 @@
+"""add hearings
+
+Revision ID: c41e8b7a2d93
+Revises: 7d2c5a8e9f10
+Create Date: 2026-10-19 11:20:45.301876
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c41e8b7a2d93'
+down_revision = '7d2c5a8e9f10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'hearings',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('blotter_id', sa.Integer(), nullable=False),
+        sa.Column('official_id', sa.Integer(), nullable=True),
+        sa.Column('venue', sa.String(length=120), nullable=True),
+        sa.Column('starts_at', sa.DateTime(), nullable=False),
+        sa.Column('ends_at', sa.DateTime(), nullable=False),
+        sa.Column('status', sa.String(length=30), nullable=False),
+        sa.Column('notes', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.CheckConstraint('ends_at > starts_at', name='ck_hearings_interval'),
+        sa.ForeignKeyConstraint(['blotter_id'], ['blotters.id']),
+        sa.ForeignKeyConstraint(['official_id'], ['officials.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('hearings', schema=None) as batch_op:
+        batch_op.create_index('ix_hearings_official_starts_at', ['official_id', 'starts_at'], unique=False)
+        batch_op.create_index('ix_hearings_venue_starts_at', ['venue', 'starts_at'], unique=False)
+        batch_op.create_index('ix_hearings_starts_at', ['starts_at'], unique=False)
+        batch_op.create_index('ix_hearings_blotter_id', ['blotter_id'], unique=False)
+
+    # Carry existing single hearing dates over as one-hour hearings
+    if op.get_bind().dialect.name == 'postgresql':
+        one_hour_later = "hearing_date + INTERVAL '1 hour'"
+    else:
+        # In the format SQLAlchemy stores DateTime in, so comparisons stay textual
+        one_hour_later = "strftime('%Y-%m-%d %H:%M:%f000', hearing_date, '+1 hour')"
+    op.execute(
+        "INSERT INTO hearings (blotter_id, starts_at, ends_at, status, created_at) "
+        f"SELECT id, hearing_date, {one_hour_later}, 'Scheduled', CURRENT_TIMESTAMP "
+        "FROM blotters WHERE hearing_date IS NOT NULL"
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('hearings', schema=None) as batch_op:
+        batch_op.drop_index('ix_hearings_blotter_id')
+        batch_op.drop_index('ix_hearings_starts_at')
+        batch_op.drop_index('ix_hearings_venue_starts_at')
+        batch_op.drop_index('ix_hearings_official_starts_at')
+
+    op.drop_table('hearings')
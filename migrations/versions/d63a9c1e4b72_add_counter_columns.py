@@ -0,0 +1,50 @@
+"""add member, clearance and blotter counter columns
+
+Revision ID: d63a9c1e4b72
+Revises: 8b4e2f7c1d56
+Create Date: 2026-10-19 16:48:09.513274
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd63a9c1e4b72'
+down_revision = '8b4e2f7c1d56'
+branch_labels = None
+depends_on = None
+
+# (parent table, counter column, child table, child foreign key)
+COUNTERS = (
+    ('households', 'member_count', 'residents', 'household_id'),
+    ('residents', 'clearance_count', 'clearances', 'resident_id'),
+    ('residents', 'blotter_count', 'blotters', 'reported_by_id'),
+)
+
+
+def upgrade():
+    # Index the counted foreign keys first so the backfill (and reconcile) can use them
+    op.create_index('ix_residents_household_id', 'residents', ['household_id'], unique=False)
+    op.create_index('ix_clearances_resident_id', 'clearances', ['resident_id'], unique=False)
+    op.create_index('ix_blotters_reported_by_id', 'blotters', ['reported_by_id'], unique=False)
+
+    for parent, column, _, _ in COUNTERS:
+        with op.batch_alter_table(parent, schema=None) as batch_op:
+            batch_op.add_column(sa.Column(column, sa.Integer(), server_default='0', nullable=False))
+
+    for parent, column, child, foreign_key in COUNTERS:
+        op.execute(
+            f'UPDATE {parent} SET {column} = '
+            f'(SELECT count(*) FROM {child} WHERE {child}.{foreign_key} = {parent}.id)'
+        )
+
+
+def downgrade():
+    for parent, column, _, _ in reversed(COUNTERS):
+        with op.batch_alter_table(parent, schema=None) as batch_op:
+            batch_op.drop_column(column)
+
+    op.drop_index('ix_blotters_reported_by_id', table_name='blotters')
+    op.drop_index('ix_clearances_resident_id', table_name='clearances')
+    op.drop_index('ix_residents_household_id', table_name='residents')
@@ -0,0 +1,58 @@
+"""add slow query log
+
+Revision ID: f2a6c8d04e17
+Revises: 7c3f1b9e6a05
+Create Date: 2026-10-19 16:42:08.517310
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2a6c8d04e17'
+down_revision = '7c3f1b9e6a05'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'slow_queries',
+        sa.Column('fingerprint', sa.String(length=40), nullable=False),
+        sa.Column('statement', sa.Text(), nullable=False),
+        sa.Column('calls', sa.Integer(), nullable=False),
+        sa.Column('total_ms', sa.Float(), nullable=False),
+        sa.Column('max_ms', sa.Float(), nullable=False),
+        sa.Column('first_seen', sa.DateTime(), nullable=False),
+        sa.Column('last_seen', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('fingerprint')
+    )
+    op.create_table(
+        'slow_query_samples',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('fingerprint', sa.String(length=40), nullable=False),
+        sa.Column('occurred_at', sa.DateTime(), nullable=False),
+        sa.Column('duration_ms', sa.Float(), nullable=False),
+        sa.Column('statement', sa.Text(), nullable=False),
+        sa.Column('params', sa.JSON().with_variant(postgresql.JSONB(), 'postgresql'), nullable=True),
+        sa.Column('endpoint', sa.String(length=120), nullable=True),
+        sa.Column('method', sa.String(length=10), nullable=True),
+        sa.Column('path', sa.String(length=255), nullable=True),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('plan', sa.Text(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('slow_query_samples', schema=None) as batch_op:
+        batch_op.create_index('ix_slow_query_samples_fingerprint', ['fingerprint', 'occurred_at'], unique=False)
+        batch_op.create_index('ix_slow_query_samples_occurred_at', ['occurred_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('slow_query_samples', schema=None) as batch_op:
+        batch_op.drop_index('ix_slow_query_samples_occurred_at')
+        batch_op.drop_index('ix_slow_query_samples_fingerprint')
+
+    op.drop_table('slow_query_samples')
+    op.drop_table('slow_queries')